@@ -24,6 +24,7 @@ backend_stack = CdkBackend(app,
                            '{0}-{1}-stack-backend'.format(os.getenv('ENVIRONMENT'), os.getenv('APP_NAME')),
                            termination_protection=True,
                            endpoint_id=networking_stack.vpc.vpc_endpoint_api,
+                           vpc=networking_stack.vpc.app_vpc,
                            description='Backend - RESTAPI, LAMBDAS, DYNAMODB',
                            env=Environment(account=os.getenv('AWS_ACCOUNT'),
                                            region=os.getenv('AWS_REGION'))
@@ -4,7 +4,7 @@ from dotenv import load_dotenv
 from aws_cdk import (
     aws_apigateway as apigw,
     aws_iam as iam,
-    RemovalPolicy, CfnOutput,
+    Duration, RemovalPolicy, CfnOutput,
     aws_logs as logs)
 
 load_dotenv()
@@ -17,14 +17,26 @@ api_version = os.getenv('API_VERSION')
 
 class RestAPI(Construct):
     def __init__(self, scope: Construct, construct_id: str, api_name: str, api_endpoint_id: str,
-                 description: str = 'Private Rest API'):
+                 description: str = 'Private Rest API', cache_cluster_size: str = None, cache_ttls: dict = None):
         """
         :param scope:-
         :param id:-
         :param api_name: Api name used for api path Allowed values [a-zA-Z0-9._-],and an optional trailing '+'
         :param api_endpoint_id
+        :param cache_cluster_size: stage cache size in GB, e.g. '0.5'. The stage cache is disabled when omitted
+        :param cache_ttls: seconds each method's responses are cached, keyed by path below the api version and
+                           method e.g. {'projects/{project_id}/GET': 300}. Other methods are not cached
         """
         super().__init__(scope, construct_id)
+        self.stage_name = environment
+        self.cache_enabled = cache_cluster_size is not None
+
+        # Cache keys are the cache key parameters of each cached method's integration. Method options replace
+        # the stage wide logging settings of the method, they are repeated here
+        method_options = {f'/api/{api_version.lower()}/{path}': apigw.MethodDeploymentOptions(
+                              caching_enabled=True, cache_ttl=Duration.seconds(int(ttl)), cache_data_encrypted=True,
+                              logging_level=apigw.MethodLoggingLevel.INFO, data_trace_enabled=True)
+                          for path, ttl in (cache_ttls or {}).items()} if self.cache_enabled else None
 
         self.rest_api_policy = iam.PolicyDocument(statements=[iam.PolicyStatement(actions=["execute-api:Invoke"],
                                                                                   principals=[iam.AnyPrincipal()],
@@ -57,7 +69,10 @@ class RestAPI(Construct):
                                           ),
                                           tracing_enabled=True,
                                           data_trace_enabled=True,
-                                          stage_name=environment
+                                          stage_name=environment,
+                                          cache_cluster_enabled=self.cache_enabled,
+                                          cache_cluster_size=cache_cluster_size,
+                                          method_options=method_options
                                       ),
                                       endpoint_configuration=apigw.EndpointConfiguration(
                                           vpc_endpoints=[api_endpoint_id],
@@ -68,3 +83,27 @@ class RestAPI(Construct):
 
         self.output_rest_api_id = CfnOutput(self, 'OutputAPIRESTId', export_name=self.rest_api.rest_api_name,
                                             value=self.rest_api.rest_api_id)
+
+    def grant_flush_stage_cache(self, function):
+        """
+        Lets a function drop every entry of the stage cache, API_ID and API_STAGE tell it which one
+        """
+        function.add_environment('API_ID', self.rest_api.rest_api_id)
+        function.add_environment('API_STAGE', self.stage_name)
+        function.add_to_role_policy(iam.PolicyStatement(
+            actions=["apigateway:DELETE"],
+            resources=[f'arn:aws:apigateway:{aws_region}::/restapis/{self.rest_api.rest_api_id}/stages/'
+                       f'{self.stage_name}/cache/data'],
+            effect=iam.Effect.ALLOW))
+
+    def grant_invalidate_cache(self, function, resource):
+        """
+        Lets a function drop the cached GET responses below a resource one at a time by requesting them with
+        Cache-Control: max-age=0, API_URL is the stage URL of the resource
+        """
+        function.add_environment('API_ID', self.rest_api.rest_api_id)
+        function.add_environment('API_URL', self.rest_api.url_for_path(resource.path))
+        function.add_to_role_policy(iam.PolicyStatement(
+            actions=["execute-api:Invoke", "execute-api:InvalidateCache"],
+            resources=[self.rest_api.arn_for_execute_api('GET', f'{resource.path}/*', self.stage_name)],
+            effect=iam.Effect.ALLOW))
@@ -22,6 +22,8 @@ class LambdaLayer(Construct):
         self.lambda_layer = _lambda.LayerVersion(self, id=construct_id,
                                                  code=_lambda.Code.from_asset(source_dir),
                                                  compatible_runtimes=[_lambda.Runtime(runtime)],
+                                                 compatible_architectures=[_lambda.Architecture.X86_64,
+                                                                           _lambda.Architecture.ARM_64],
                                                  description=description,
                                                  layer_version_name=layer_name,
                                                  removal_policy=RemovalPolicy.DESTROY
@@ -1,9 +1,12 @@
 import os
 from dotenv import load_dotenv
 from aws_cdk import (
+    aws_events as events,
+    aws_events_targets as targets,
+    aws_iam as iam,
     aws_lambda as _lambda,
     aws_logs as logs,
-    Duration, RemovalPolicy
+    ArnFormat, Duration, RemovalPolicy, Stack
 )
 from constructs import Construct
 
@@ -13,23 +16,66 @@ environment = os.getenv('ENVIRONMENT')
 app_name = os.getenv('APP_NAME')
 prefix_name = environment.lower() + '-' + app_name.lower()
 
+class PerformanceProfile:
+    def __init__(self, memory_size: int = 128, arm64: bool = False, timeout: int = 60,
+                 reserved_concurrency: int = None, provisioned_concurrency: int = 0,
+                 max_provisioned_concurrency: int = 0, target_utilization: float = 0.7):
+        """
+        Compute settings of a lambda function, the defaults are those of a plain lambda function
+        :param memory_size: memory in MB, the CPU share grows with it (one full vCPU at 1769 MB)
+        :param arm64: run on Graviton (arm64) instead of x86_64
+        :param timeout: seconds, requests through the API gateway end after 29 seconds anyway
+        :param reserved_concurrency: concurrent executions reserved for, and at most used by, the function
+        :param provisioned_concurrency: initialized execution environments kept on the 'live' alias
+        :param max_provisioned_concurrency: when higher than provisioned_concurrency, application auto scaling
+                                            moves the provisioned concurrency between the two
+        :param target_utilization: provisioned concurrency utilization auto scaling keeps the alias at
+        """
+        self.memory_size = memory_size
+        self.arm64 = arm64
+        self.timeout = timeout
+        self.reserved_concurrency = reserved_concurrency
+        self.provisioned_concurrency = provisioned_concurrency
+        self.max_provisioned_concurrency = max_provisioned_concurrency
+        self.target_utilization = target_utilization
+
+
 class LambdaIntegation(Construct):
     def __init__(self, scope: Construct, construct_id: str, func_name: str, source_dir: str, runtime: str,
-                 func_environment, handler: str, layers: list, description: str = ''):
+                 func_environment, handler: str, layers: list, description: str = '',
+                 profile: PerformanceProfile = None, vpc=None):
         super().__init__(scope, construct_id)
+        profile = profile or PerformanceProfile()
+        self.func_name = func_name
 
         self.function = _lambda.Function(self, id=construct_id,
                                          function_name=func_name,
                                          runtime=_lambda.Runtime(runtime),
-                                         architecture=_lambda.Architecture.X86_64,
+                                         architecture=_lambda.Architecture.ARM_64 if profile.arm64
+                                         else _lambda.Architecture.X86_64,
                                          handler=handler,
                                          layers=layers,
                                          description=description,
                                          code=_lambda.Code.from_asset(source_dir),
-                                         timeout=Duration.seconds(60),
+                                         memory_size=profile.memory_size,
+                                         timeout=Duration.seconds(profile.timeout),
+                                         reserved_concurrent_executions=profile.reserved_concurrency,
                                          environment=func_environment,
+                                         vpc=vpc,
                                          tracing=_lambda.Tracing.ACTIVE)
 
+        # Provisioned concurrency is configured on an alias, callers have to invoke the alias to use it
+        self.alias = None
+        if profile.provisioned_concurrency:
+            self.alias = _lambda.Alias(self, 'LiveAlias', alias_name='live',
+                                       version=self.function.current_version,
+                                       provisioned_concurrent_executions=profile.provisioned_concurrency)
+            if profile.max_provisioned_concurrency > profile.provisioned_concurrency:
+                self.alias.add_auto_scaling(min_capacity=profile.provisioned_concurrency,
+                                            max_capacity=profile.max_provisioned_concurrency
+                                            ).scale_on_utilization(utilization_target=profile.target_utilization)
+        self.target = self.alias or self.function
+
         self.function_log_group = logs.LogGroup(self, 'LogsForWritingData',
                                                 log_group_name=f"/aws/lambda/{func_name}",
                                                 retention=logs.RetentionDays.ONE_MONTH,
@@ -38,3 +84,24 @@ class LambdaIntegation(Construct):
 
     def add_policy(self, policy):
         self.function.add_to_role_policy(policy)
+
+    def keep_warm(self, concurrency: int, rate_minutes: int = 5):
+        """
+        Invokes the function on a schedule with a warm-up event, its handler keeps that many environments warm
+        :param concurrency: environments to keep warm, the handler invokes its own function for all but one
+        :param rate_minutes: minutes between two warm-ups, idle environments are reclaimed after several minutes
+        """
+        events.Rule(self, 'WarmerRule',
+                    description=f'Keep {concurrency} environments of {self.func_name} warm',
+                    schedule=events.Schedule.rate(Duration.minutes(rate_minutes)),
+                    targets=[targets.LambdaFunction(self.target,
+                                                    event=events.RuleTargetInput.from_object(
+                                                        {'warmer': True, 'concurrency': concurrency}),
+                                                    retry_attempts=0)])
+        if concurrency > 1:
+            # Built from the function name, referencing the function would make its role depend on itself
+            function_arn = Stack.of(self).format_arn(service='lambda', resource='function',
+                                                     resource_name=self.func_name,
+                                                     arn_format=ArnFormat.COLON_RESOURCE_NAME)
+            self.add_policy(iam.PolicyStatement(actions=['lambda:InvokeFunction'],
+                                                resources=[function_arn, f'{function_arn}:*']))
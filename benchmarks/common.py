@@ -0,0 +1,78 @@
+import importlib.util
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+LAYER_DIR = os.path.join(ROOT_DIR, 'lambda_layer', 'python')
+
+# handler name => (source directory, handler function), as deployed by CdkBackend
+HANDLERS = {
+    'create_project': ('lambda_code/post_methods/create_project', 'create_project'),
+    'get_project': ('lambda_code/get_methods/get_project', 'get_project'),
+    'update_project': ('lambda_code/put_methods/update_project', 'update_project'),
+    'patch_project': ('lambda_code/patch_methods/patch_project', 'patch_project'),
+    'delete_project': ('lambda_code/delete_methods/delete_project', 'delete_project'),
+}
+
+
+def add_layer_to_path():
+    if LAYER_DIR not in sys.path:
+        sys.path.insert(0, LAYER_DIR)
+
+
+def load_handler(name):
+    """
+    Imports a handler module from its source directory under a unique module name,
+    the same way the Lambda runtime imports ``handler.<function>``
+
+    :return: handler function
+    """
+    add_layer_to_path()
+    source_dir, function_name = HANDLERS[name]
+    spec = importlib.util.spec_from_file_location(f'{name}_handler',
+                                                  os.path.join(ROOT_DIR, source_dir, 'handler.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, function_name)
+
+
+def mapped_event(body=None, path=None, querystring=None, header=None):
+    """Synthetic event shaped like the output of the ``parameter_mapping`` request template"""
+    return {'body': body or {},
+            'params': {'path': path or {},
+                       'querystring': querystring or {},
+                       'header': header or {'x-apigw-api-id': 'benchmark'}}}
+
+
+def create_event(project):
+    """POST /projects/create has no request template, the body is passed through as the event"""
+    return dict(project)
+
+
+def get_event(project_id):
+    return mapped_event(path={'project_id': project_id})
+
+
+def list_event(**querystring):
+    return mapped_event(querystring={key: str(value) for key, value in querystring.items()})
+
+
+def update_event(project_id, changes):
+    return mapped_event(body=changes, path={'project_id': project_id})
+
+
+def delete_event(project_id):
+    return mapped_event(path={'project_id': project_id})
+
+
+class FakeContext:
+    """Minimal stand-in for the Lambda context object"""
+
+    def __init__(self, function_name='benchmark', request_id='00000000-0000-0000-0000-000000000000'):
+        self.function_name = function_name
+        self.aws_request_id = request_id
+        self.invoked_function_arn = f'arn:aws:lambda:eu-west-1:000000000000:function:{function_name}'
+        self.memory_limit_in_mb = 128
+
+    def get_remaining_time_in_millis(self):
+        return 60000
@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+"""
+In-process benchmark of the create/get/list/update/delete project handlers.
+
+The handlers run against moto's DynamoDB mock by default, or against DynamoDB Local with
+--endpoint-url. Events are shaped like the output of the ``parameter_mapping`` request template.
+Every combination of table size, item size and concurrency reports p50/p95/p99 latency,
+throughput, peak RSS and consumed capacity per operation.
+
+moto's in-memory backend is not thread safe, with a concurrency above 1 its DynamoDB calls are
+serialized behind one lock. Only the handler code then runs concurrently, so latency includes
+the wait for the lock and throughput is bounded by the mock. Measure concurrent DynamoDB access
+against DynamoDB Local with --endpoint-url, where calls are not serialized.
+
+    python benchmarks/handlers_benchmark.py --table-sizes 1000 10000 --item-sizes 200 4000 \\
+        --concurrency 1 8 --iterations 200 --output handlers.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from common import (add_layer_to_path, load_handler, FakeContext, create_event, get_event, list_event,
+                    update_event, delete_event, ROOT_DIR)
+
+OPERATIONS = ['create_project', 'get_project', 'list_projects', 'member_projects', 'newest_projects', 'update_project',
+              'patch_project', 'delete_project']
+MEMBERS = [f'member-{index}' for index in range(100)]
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))]
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if platform.system() == 'Darwin' else 1024), 1)
+
+
+class CapacityRecorder:
+    """Asks every DynamoDB call for its consumed capacity and adds it up per operation"""
+
+    def __init__(self, client):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.totals = {}
+        client.meta.events.register('provide-client-params.dynamodb.*', self.request_capacity)
+        client.meta.events.register('after-call.dynamodb.*', self.record_capacity)
+
+    def request_capacity(self, params, model, **kwargs):
+        if 'ReturnConsumedCapacity' in model.input_shape.members:
+            params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+
+    def record_capacity(self, parsed, **kwargs):
+        consumed = parsed.get('ConsumedCapacity') or []
+        if isinstance(consumed, dict):
+            consumed = [consumed]
+        units = sum(entry.get('CapacityUnits', 0) for entry in consumed)
+        operation = getattr(self.local, 'operation', None)
+        if operation:
+            with self.lock:
+                self.totals[operation] = self.totals.get(operation, 0) + units
+
+    def reset(self):
+        self.totals = {}
+
+
+class SerializedClient:
+    """Client proxy that makes one call at a time, moto's in-memory backend is not thread safe"""
+
+    def __init__(self, client):
+        self.client = client
+        self.lock = threading.Lock()
+
+    def __getattr__(self, name):
+        attribute = getattr(self.client, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            with self.lock:
+                return attribute(*args, **kwargs)
+        return call
+
+
+def synthetic_project(item_size):
+    return {'project_name': f'project-{uuid.uuid4().hex[:8]}',
+            'description': 'x' * item_size,
+            'internal': random.random() < 0.5,
+            'on_project': random.sample(MEMBERS, 2)}
+
+
+def key_schema(key_names):
+    return [{'AttributeName': name, 'KeyType': key_type} for name, key_type in zip(key_names, ('HASH', 'RANGE'))]
+
+
+def create_table(client, table_name, key_names=('project_id',), indexes=None):
+    existing = client.list_tables()['TableNames']
+    if table_name in existing:
+        client.delete_table(TableName=table_name)
+        client.get_waiter('table_not_exists').wait(TableName=table_name)
+    indexes = indexes or {}
+    attribute_names = dict.fromkeys(list(key_names) + [name for names in indexes.values() for name in names])
+    table_arguments = {}
+    if indexes:
+        table_arguments['GlobalSecondaryIndexes'] = [{'IndexName': index_name, 'KeySchema': key_schema(names),
+                                                      'Projection': {'ProjectionType': 'ALL'}}
+                                                     for index_name, names in indexes.items()]
+    client.create_table(TableName=table_name,
+                        KeySchema=key_schema(key_names),
+                        AttributeDefinitions=[{'AttributeName': name, 'AttributeType': 'S'} for name in attribute_names],
+                        BillingMode='PAY_PER_REQUEST',
+                        **table_arguments)
+    client.get_waiter('table_exists').wait(TableName=table_name)
+
+
+def load_table(repository, table_size, item_size):
+    project_ids = []
+    projects = []
+    for _ in range(table_size):
+        project = dict(synthetic_project(item_size), project_id=str(uuid.uuid4()))
+        projects.append(project)
+        project_ids.append(project['project_id'])
+    repository.batch_create(projects)
+    return project_ids
+
+
+def build_events(operation, iterations, project_ids, item_size):
+    if operation == 'create_project':
+        return [create_event(synthetic_project(item_size)) for _ in range(iterations)]
+    if operation == 'get_project':
+        return [get_event(random.choice(project_ids)) for _ in range(iterations)]
+    if operation == 'list_projects':
+        return [list_event(limit=100) for _ in range(iterations)]
+    if operation == 'newest_projects':
+        return [list_event(limit=100, order='newest') for _ in range(iterations)]
+    if operation == 'member_projects':
+        return [list_event(limit=100, member=random.choice(MEMBERS)) for _ in range(iterations)]
+    if operation == 'update_project':
+        return [update_event(random.choice(project_ids), {'description': 'y' * item_size}) for _ in range(iterations)]
+    if operation == 'patch_project':
+        # Patches without expected_version commute, concurrent ones may hit the same project
+        return [update_event(random.choice(project_ids), {'add_members': [random.choice(MEMBERS)]})
+                for _ in range(iterations)]
+    if operation == 'delete_project':
+        return [delete_event(project_id) for project_id in random.sample(project_ids, min(iterations,
+                                                                                         len(project_ids)))]
+    raise ValueError(operation)
+
+
+def run_operation(operation, handler, events, concurrency, recorder):
+    latencies = []
+
+    def invoke(event):
+        recorder.local.operation = operation
+        started = time.perf_counter()
+        handler(event, FakeContext(function_name=operation, request_id=str(uuid.uuid4())))
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    recorder.reset()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(invoke, events))
+    wall_time = time.perf_counter() - started
+
+    return {'operation': operation,
+            'invocations': len(latencies),
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'mean_ms': round(statistics.mean(latencies), 3),
+            'throughput_per_s': round(len(latencies) / wall_time, 1),
+            'peak_rss_mb': peak_rss_mb(),
+            'consumed_capacity_units': round(recorder.totals.get(operation, 0), 2)}
+
+
+def run_suite(args, serialize=False):
+    add_layer_to_path()
+    from database.repository import get_repository, INDEX_SORT_KEYS
+
+    handlers = {'create_project': load_handler('create_project'),
+                'get_project': load_handler('get_project'),
+                'list_projects': load_handler('get_project'),
+                'member_projects': load_handler('get_project'),
+                'newest_projects': load_handler('get_project'),
+                'update_project': load_handler('update_project'),
+                'patch_project': load_handler('patch_project'),
+                'delete_project': load_handler('delete_project')}
+    repository = get_repository()
+    recorder = CapacityRecorder(repository.client)
+    if serialize:
+        repository._client = SerializedClient(repository.client)
+
+    results = []
+    for table_size in args.table_sizes:
+        for item_size in args.item_sizes:
+            create_table(repository.client, repository.table_name,
+                         indexes={index_name: ('entity_type', sort_key) for index_name, sort_key in INDEX_SORT_KEYS.items()})
+            create_table(repository.client, repository.membership_table_name, key_names=('member', 'project_id'))
+            project_ids = load_table(repository, table_size, item_size)
+            for concurrency in args.concurrency:
+                for operation in args.operations:
+                    events = build_events(operation, args.iterations, project_ids, item_size)
+                    result = run_operation(operation, handlers[operation], events, concurrency, recorder)
+                    result.update(table_size=table_size, item_size=item_size, concurrency=concurrency)
+                    results.append(result)
+                    print(f"{operation:<15} table={table_size:<7} item={item_size:<6} conc={concurrency:<3} "
+                          f"p50={result['p50_ms']:.2f}ms p95={result['p95_ms']:.2f}ms p99={result['p99_ms']:.2f}ms "
+                          f"tput={result['throughput_per_s']}/s rss={result['peak_rss_mb']}MB "
+                          f"cu={result['consumed_capacity_units']}")
+                    if operation == 'delete_project':
+                        deleted = {event['params']['path']['project_id'] for event in events}
+                        project_ids = [project_id for project_id in project_ids if project_id not in deleted]
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True,
+                              text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--table-sizes', type=int, nargs='+', default=[1000])
+    parser.add_argument('--item-sizes', type=int, nargs='+', default=[200], help='description size in bytes')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1])
+    parser.add_argument('--iterations', type=int, default=100, help='invocations per operation')
+    parser.add_argument('--operations', nargs='+', default=OPERATIONS, choices=OPERATIONS)
+    parser.add_argument('--endpoint-url', help='DynamoDB Local endpoint, e.g. http://localhost:8000')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE', 'handlers-benchmark')
+    os.environ.setdefault('MEMBERSHIP_DATABASE', 'handlers-benchmark-membership')
+    os.environ.setdefault('AWS_REGION', 'eu-west-1')
+    os.environ.setdefault('AWS_DEFAULT_REGION', os.environ['AWS_REGION'])
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+    os.environ.setdefault('LOGGER_LVL', 'WARNING')
+
+    if args.endpoint_url:
+        os.environ['DYNAMODB_ENDPOINT_URL'] = args.endpoint_url
+        results = run_suite(args)
+    else:
+        try:
+            from moto import mock_dynamodb as mock
+        except ImportError:
+            from moto import mock_aws as mock
+        with mock():
+            results = run_suite(args, serialize=max(args.concurrency) > 1)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump({'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                       'revision': git_revision(),
+                       'python': platform.python_version(),
+                       'backend': args.endpoint_url or 'moto',
+                       'parameters': {key: value for key, value in vars(args).items() if key != 'output'},
+                       'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
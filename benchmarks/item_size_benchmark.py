@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""
+Stored item size and read capacity of projects before and after compact storage.
+
+Descriptions are made of words drawn from a Zipf-like distribution over a synthetic vocabulary,
+so they compress about as well as prose. For every description size and member count the report
+lists the DynamoDB item size of the plain and of the compact item, the RCU of an eventually
+consistent GetItem and of a Scan over --scan-items such items, and the time to encode and decode one item.
+
+    python benchmarks/item_size_benchmark.py --description-bytes 200 2000 20000 60000 --members 2 50 500
+"""
+import argparse
+import json
+import math
+import random
+import timeit
+import uuid
+
+from common import add_layer_to_path
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ru', 'sa', 'ti', 'vo', 'ze', 'po', 'da', 'fe', 'gu', 'hi', 'ja', 'be']
+
+
+def attribute_size(attribute: dict) -> int:
+    """Size of an AttributeValue as DynamoDB bills it, without the attribute name"""
+    (attribute_type, value), = attribute.items()
+    if attribute_type == 'S':
+        return len(value.encode('utf-8'))
+    if attribute_type == 'B':
+        return len(value)
+    if attribute_type == 'N':
+        return len(value.lstrip('-').replace('.', '').strip('0') or '0') // 2 + 1
+    if attribute_type in ('BOOL', 'NULL'):
+        return 1
+    if attribute_type == 'SS':
+        return sum(len(item.encode('utf-8')) for item in value)
+    if attribute_type == 'L':
+        return 3 + sum(1 + attribute_size(item) for item in value)
+    if attribute_type == 'M':
+        return 3 + sum(1 + len(key.encode('utf-8')) + attribute_size(item) for key, item in value.items())
+    raise TypeError(attribute_type)
+
+
+def item_size(item: dict) -> int:
+    return sum(len(name.encode('utf-8')) + attribute_size(attribute) for name, attribute in item.items())
+
+
+def read_units(size_bytes: int) -> float:
+    """RCU of an eventually consistent read of this many bytes"""
+    return math.ceil(size_bytes / 4096) * 0.5
+
+
+def synthetic_project(description_bytes, member_count, rng):
+    words = [''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(2000)]
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    description = ''
+    while len(description) < description_bytes:
+        description += ' '.join(rng.choices(words, weights=weights, k=12)).capitalize() + '. '
+    members = [f'{rng.choice(words).title()} {rng.choice(words).title()}' for _ in range(member_count)]
+    return {'project_id': str(uuid.UUID(int=rng.getrandbits(128))), 'project_name': 'Benchmark project',
+            'description': description[:description_bytes], 'internal': True,
+            'on_project': list(dict.fromkeys(members)), 'version': 1, 'entity_type': 'project#0',
+            'created_at': '2022-09-30T12:00:00.000Z', 'updated_at': '2022-09-30T12:00:00.000Z'}
+
+
+def measure(project, scan_items, repeat):
+    from database.compact import compact_project, load_project
+    from database.serializer import serialize_item, deserialize_item
+
+    plain, compact = serialize_item(project), serialize_item(compact_project(project))
+    result = {'description_bytes': len(project['description']), 'members': len(project['on_project'])}
+    for name, item, encode, decode in (
+            ('plain', plain, lambda: serialize_item(project), lambda: deserialize_item(plain)),
+            ('compact', compact, lambda: serialize_item(compact_project(project)), lambda: load_project(compact))):
+        size = item_size(item)
+        result[name] = {'item_bytes': size, 'get_rcu': read_units(size),
+                        'scan_rcu': read_units(size * scan_items),
+                        'encode_us': round(min(timeit.repeat(encode, number=1, repeat=repeat)) * 1e6, 1),
+                        'decode_us': round(min(timeit.repeat(decode, number=1, repeat=repeat)) * 1e6, 1)}
+    result['size_ratio'] = round(result['compact']['item_bytes'] / result['plain']['item_bytes'], 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--description-bytes', type=int, nargs='+', default=[200, 2000, 20000, 60000])
+    parser.add_argument('--members', type=int, nargs='+', default=[2, 50, 500])
+    parser.add_argument('--scan-items', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=50, help='timing repetitions, the fastest is reported')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    add_layer_to_path()
+    rng = random.Random(args.seed)
+    results = []
+    for description_bytes in args.description_bytes:
+        for member_count in args.members:
+            result = measure(synthetic_project(description_bytes, member_count, rng), args.scan_items, args.repeat)
+            results.append(result)
+            plain, compact = result['plain'], result['compact']
+            print(f"description={description_bytes:<6} members={member_count:<4} "
+                  f"item={plain['item_bytes']}->{compact['item_bytes']}B ({result['size_ratio']:.2f}x) "
+                  f"get={plain['get_rcu']}->{compact['get_rcu']}RCU "
+                  f"scan={plain['scan_rcu']:.0f}->{compact['scan_rcu']:.0f}RCU "
+                  f"encode={plain['encode_us']}->{compact['encode_us']}us "
+                  f"decode={plain['decode_us']}->{compact['decode_us']}us")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
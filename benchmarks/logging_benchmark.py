@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Per-call overhead of the layer logger, in the default mode and in LOGGER_MODE=fast.
+
+Each mode runs in a fresh interpreter with log output sent to /dev/null. caller_us is the time
+spent on the calling (request) thread, drained_us also includes writing every queued record.
+
+    python benchmarks/logging_benchmark.py --calls 20000 --output logging.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from common import LAYER_DIR
+
+CHILD = r'''
+import json, sys, time
+from logger.logger import log, flush_logs
+
+calls = int(sys.argv[2])
+project_id, project_name, on_project = '4f1c7e0a-54c1-4d8e-9d38-6cb2f0a5a7b1', 'benchmark', ['Jonh Doe', 'Mike Lee']
+
+cases = {
+    'info_fstring': lambda: log.info(f'Project with id {project_id} successfully created. '
+                                     f'Project name: {project_name}. On project: {on_project}'),
+    'info_lazy': lambda: log.info('Project with id %s successfully created. Project name: %s. On project: %s',
+                                  project_id, project_name, on_project),
+    'debug_fstring_disabled': lambda: log.debug(f'Project with id {project_id} successfully created. '
+                                                f'Project name: {project_name}. On project: {on_project}'),
+    'debug_lazy_disabled': lambda: log.debug('Project with id %s successfully created. Project name: %s. '
+                                             'On project: %s', project_id, project_name, on_project),
+}
+results = {}
+for name, case in cases.items():
+    for _ in range(min(calls, 1000)):
+        case()
+    flush_logs()
+    started = time.perf_counter()
+    for _ in range(calls):
+        case()
+    caller = time.perf_counter() - started
+    flush_logs()
+    drained = time.perf_counter() - started
+    results[name] = {'caller_us': round(caller / calls * 1e6, 3), 'drained_us': round(drained / calls * 1e6, 3)}
+with open(sys.argv[1], 'w') as f:
+    json.dump(results, f)
+'''
+
+
+def run_mode(mode, calls):
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        result_path = f.name
+    env = dict(os.environ, PYTHONPATH=LAYER_DIR, LOGGER_MODE=mode, LOGGER_LVL='INFO',
+               AWS_LAMBDA_FUNCTION_NAME='logging-benchmark')
+    completed = subprocess.run([sys.executable, '-c', CHILD, result_path, str(calls)], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f'{mode} mode failed:\n{completed.stderr[-2000:]}')
+    with open(result_path) as f:
+        results = json.load(f)
+    os.remove(result_path)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=20000)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = {mode: run_mode(mode, args.calls) for mode in ('default', 'fast')}
+    print(f"{'case':<24} {'default caller':>15} {'fast caller':>12} {'fast drained':>13}  (microseconds per call)")
+    for case in results['default']:
+        print(f"{case:<24} {results['default'][case]['caller_us']:>15.2f} {results['fast'][case]['caller_us']:>12.2f} "
+              f"{results['fast'][case]['drained_us']:>13.2f}")
+    before, after = results['default']['info_fstring']['caller_us'], results['fast']['info_lazy']['caller_us']
+    print(f'INFO line on the request thread: {before:.2f}us before, {after:.2f}us after ({before / after:.1f}x)')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Wall time of a full-table read versus parallel scan segment count.
+
+Runs against an in-memory DynamoDB stand-in by default, or against DynamoDB Local when
+--endpoint-url is given (the table is created and loaded on the first run).
+
+    python benchmarks/parallel_scan_benchmark.py --items 10000 100000 1000000 --segments 1 2 4 8 16
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda_layer', 'python'))
+
+from database.parallel_scan import parallel_scan  # noqa: E402
+from stand_in import InMemoryScanTable  # noqa: E402
+
+
+def synthetic_projects(count, description_bytes):
+    return [{'project_id': str(uuid.uuid4()),
+             'project_name': f'project-{index}',
+             'description': 'x' * description_bytes,
+             'internal': index % 2 == 0,
+             'on_project': ['Jonh Doe', 'Mike Lee']} for index in range(count)]
+
+
+def local_dynamodb_table(endpoint_url, count, description_bytes):
+    from boto3 import resource
+    dynamodb = resource('dynamodb', endpoint_url=endpoint_url, region_name='eu-west-1')
+    table_name = f'parallel-scan-benchmark-{count}'
+    if table_name not in [table.name for table in dynamodb.tables.all()]:
+        table = dynamodb.create_table(TableName=table_name,
+                                      KeySchema=[{'AttributeName': 'project_id', 'KeyType': 'HASH'}],
+                                      AttributeDefinitions=[{'AttributeName': 'project_id',
+                                                             'AttributeType': 'S'}],
+                                      BillingMode='PAY_PER_REQUEST')
+        table.wait_until_exists()
+        with table.batch_writer() as batch:
+            for item in synthetic_projects(count, description_bytes):
+                batch.put_item(Item=item)
+    return dynamodb.Table(table_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--segments', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--description-bytes', type=int, default=200)
+    parser.add_argument('--request-latency', type=float, default=0.005,
+                        help='simulated seconds per scan request for the in-memory stand-in')
+    parser.add_argument('--latency-per-mb', type=float, default=0.1,
+                        help='simulated seconds per MB of scanned data for the in-memory stand-in')
+    parser.add_argument('--endpoint-url', help='DynamoDB Local endpoint, e.g. http://localhost:8000')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = []
+    for count in args.items:
+        if args.endpoint_url:
+            table = local_dynamodb_table(args.endpoint_url, count, args.description_bytes)
+        else:
+            table = InMemoryScanTable(synthetic_projects(count, args.description_bytes),
+                                      request_latency=args.request_latency,
+                                      latency_per_mb=args.latency_per_mb)
+        for total_segments in args.segments:
+            started = time.perf_counter()
+            response = parallel_scan(table.scan, total_segments=total_segments)
+            wall_time = time.perf_counter() - started
+            assert response['Count'] == count, f"expected {count} items, got {response['Count']}"
+            results.append({'items': count, 'segments': total_segments, 'wall_time_s': round(wall_time, 4)})
+            print(f'items={count:>8} segments={total_segments:>3} wall_time={wall_time:8.3f}s')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
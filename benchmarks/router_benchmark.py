@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""
+Cold starts of the two deployments of the project routes (BACKEND_MODE):
+
+- functions: create, get, update, patch and delete each have their own function and pool of execution environments
+- router: one function imports every handler and serves all routes from one pool
+
+The init duration of each function is measured by importing it in fresh interpreters. Poisson traffic over
+the routes (--mix) is then replayed against a model of Lambda execution environments: a request is served by
+an idle environment of its function, or starts a new one paying the init duration, and environments idle for
+longer than --idle-seconds are reclaimed. For every request rate the report lists the cold start rate and the
+latency of both modes.
+
+    python benchmarks/router_benchmark.py --rates 0.01 0.1 1 10 --minutes 60
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+
+from common import HANDLERS, LAYER_DIR, ROOT_DIR
+
+ROUTES = ['create_project', 'get_project', 'update_project', 'patch_project', 'delete_project']
+
+CHILD = r'''
+import importlib, json, sys, time
+started = time.perf_counter()
+importlib.import_module(sys.argv[1])
+print(json.dumps({'init_ms': (time.perf_counter() - started) * 1000}))
+'''
+
+
+def measure_init(module, path, runs):
+    """Median time to import ``module`` in a fresh interpreter, with the layer and ``path`` on the path"""
+    env = dict(os.environ,
+               PYTHONPATH=os.pathsep.join([LAYER_DIR, path]),
+               DATABASE=os.getenv('DATABASE', 'router-benchmark'),
+               MEMBERSHIP_DATABASE=os.getenv('MEMBERSHIP_DATABASE', 'router-benchmark-membership'),
+               AWS_REGION=os.getenv('AWS_REGION', 'eu-west-1'))
+    samples = []
+    for _ in range(runs):
+        completed = subprocess.run([sys.executable, '-c', CHILD, module], env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f'{module} failed to import:\n{completed.stderr[-2000:]}')
+        samples.append(json.loads(completed.stdout.strip().splitlines()[-1])['init_ms'])
+    return statistics.median(samples)
+
+
+def parse_mix(values):
+    mix = {}
+    for value in values:
+        route, _, weight = value.partition('=')
+        if route not in ROUTES:
+            raise SystemExit(f'Unknown route {route}, expected one of {", ".join(ROUTES)}')
+        mix[route] = float(weight)
+    return mix
+
+
+def arrivals(rate, seconds, mix, rng):
+    """Poisson arrivals over ``seconds`` at ``rate`` requests per second, as (time, route) tuples"""
+    routes, weights = list(mix), list(mix.values())
+    time = rng.expovariate(rate)
+    while time < seconds:
+        yield time, rng.choices(routes, weights=weights)[0]
+        time += rng.expovariate(rate)
+
+
+def simulate(requests, function_of, init_ms, duration_ms, idle_seconds):
+    """
+    Replays requests against per function pools of execution environments
+
+    :param requests: (time in seconds, route) tuples in time order
+    :param function_of: route => function serving it
+    :param init_ms: function => init duration
+    :param duration_ms: time a warm environment takes to serve a request
+    :param idle_seconds: environments idle for longer are reclaimed
+    :return: dict of the request, cold start and environment counts and latency percentiles
+    """
+    pools = {}
+    latencies, cold_starts, environments = [], 0, 0
+    for time, route in requests:
+        function = function_of[route]
+        # An environment is [busy until, last used], both in seconds
+        pool = [environment for environment in pools.get(function, []) if time - environment[1] <= idle_seconds]
+        idle = [environment for environment in pool if environment[0] <= time]
+        if idle:
+            environment = max(idle, key=lambda environment: environment[1])
+            latency_ms = duration_ms
+        else:
+            environment = [0, 0]
+            pool.append(environment)
+            latency_ms = init_ms[function] + duration_ms
+            cold_starts += 1
+            environments += 1
+        environment[0] = environment[1] = time + latency_ms / 1000
+        pools[function] = pool
+        latencies.append(latency_ms)
+    latencies.sort()
+    return {'requests': len(latencies),
+            'cold_starts': cold_starts,
+            'cold_start_rate': round(cold_starts / len(latencies), 4) if latencies else 0,
+            'environments': environments,
+            'mean_ms': round(statistics.mean(latencies), 2) if latencies else 0,
+            'p50_ms': round(latencies[len(latencies) // 2], 2) if latencies else 0,
+            'p99_ms': round(latencies[int(len(latencies) * 0.99)], 2) if latencies else 0,
+            'max_ms': round(latencies[-1], 2) if latencies else 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rates', type=float, nargs='+', default=[0.01, 0.1, 1, 10], help='requests per second')
+    parser.add_argument('--minutes', type=float, default=60, help='simulated traffic per rate')
+    parser.add_argument('--mix', nargs='+', default=['get_project=70', 'create_project=10', 'update_project=10',
+                                                     'patch_project=5', 'delete_project=5'],
+                        help='route=weight pairs')
+    parser.add_argument('--duration-ms', type=float, default=30, help='warm request duration')
+    parser.add_argument('--idle-seconds', type=float, default=600, help='idle time before an environment is reclaimed')
+    parser.add_argument('--runtime-init-ms', type=float, default=0,
+                        help='added to every init duration for the sandbox and runtime start, not measured locally')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per init measurement')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    init_ms = {route: measure_init('handler', os.path.join(ROOT_DIR, HANDLERS[route][0]), args.runs)
+               for route in ROUTES}
+    init_ms['router'] = measure_init('router.handler', os.path.join(ROOT_DIR, 'lambda_code'), args.runs)
+    init_ms = {function: round(duration + args.runtime_init_ms, 2) for function, duration in init_ms.items()}
+    print('init ' + ' '.join(f'{function}={duration:.1f}ms' for function, duration in init_ms.items()))
+
+    modes = {'functions': {route: route for route in ROUTES},
+             'router': {route: 'router' for route in ROUTES}}
+    mix = parse_mix(args.mix)
+    results = {'init_ms': init_ms, 'rates': []}
+    for rate in args.rates:
+        requests = list(arrivals(rate, args.minutes * 60, mix, random.Random(args.seed)))
+        for mode, function_of in modes.items():
+            result = dict(simulate(requests, function_of, init_ms, args.duration_ms, args.idle_seconds),
+                          mode=mode, rate=rate)
+            results['rates'].append(result)
+            print(f"rate={rate:<6} {mode:<9} requests={result['requests']:<6} cold_starts={result['cold_starts']:<4} "
+                  f"({result['cold_start_rate'] * 100:.2f}%) environments={result['environments']:<3} "
+                  f"mean={result['mean_ms']:.1f}ms p50={result['p50_ms']:.1f}ms p99={result['p99_ms']:.1f}ms "
+                  f"max={result['max_ms']:.1f}ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+"""
+Search index build time and query latency, compared with the scan and substring match it replaces.
+
+Projects get a name of 3 and a description of 40 words drawn from a Zipf-like distribution over a
+synthetic vocabulary. The index and the projects live in an in-memory DynamoDB stand-in with the
+same latency model as the parallel scan benchmark, writes are not delayed; the build report includes
+the time DynamoDB needs to absorb the postings at --write-capacity WCU per second.
+
+    python benchmarks/search_benchmark.py --projects 100000 --queries 50 --output search.json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+import uuid
+
+from common import add_layer_to_path
+from stand_in import InMemoryDynamoDBClient, InMemoryScanTable
+
+TABLE_NAME = 'search-benchmark-projects'
+SEARCH_TABLE_NAME = 'search-benchmark-index'
+SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ru', 'sa', 'ti', 'vo', 'ze', 'po', 'da', 'fe', 'gu', 'hi', 'ja', 'be']
+# (first rank, last rank) of the words used as query terms of each kind
+TERM_RANKS = {'common': (20, 200), 'medium': (200, 2000), 'rare': (2000, 10000)}
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))]
+
+
+def vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words, key=lambda word: rng.random())
+
+
+def synthetic_projects(count, words, rng):
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    projects = []
+    for _ in range(count):
+        sampled = rng.choices(words, weights=weights, k=43)
+        projects.append({'project_id': str(uuid.UUID(int=rng.getrandbits(128))),
+                         'project_name': ' '.join(sampled[:3]).title(),
+                         'description': ' '.join(sampled[3:]) + '.',
+                         'internal': rng.random() < 0.5,
+                         'on_project': ['Jonh Doe', 'Mike Lee']})
+    return projects
+
+
+def build_index(projects, client, write_capacity):
+    from database.repository import ProjectRepository
+    from database.serializer import serialize_item
+    from search.index import SearchIndex, posting_changes
+
+    repository = ProjectRepository(table_name=TABLE_NAME, client=client)
+    index = SearchIndex(repository, table_name=SEARCH_TABLE_NAME)
+    client.batch_write_item(RequestItems={TABLE_NAME: [{'PutRequest': {'Item': serialize_item(project)}}
+                                                       for project in projects]})
+
+    started = time.perf_counter()
+    postings = {(token, project['project_id']): weight for project in projects
+                for token, weight in posting_changes(None, project).items()}
+    tokenize_s = time.perf_counter() - started
+    started = time.perf_counter()
+    index.write(postings)
+    write_s = time.perf_counter() - started
+    tokens = len({token for token, _ in postings})
+    return index, {'projects': len(projects), 'postings': len(postings), 'distinct_tokens': tokens,
+                   'postings_per_project': round(len(postings) / len(projects), 1),
+                   'tokenize_s': round(tokenize_s, 3), 'stand_in_write_s': round(write_s, 3),
+                   'batch_write_requests': -(-len(postings) // 25),
+                   'dynamodb_write_s': round(len(postings) / write_capacity, 1)}
+
+
+def run_queries(index, words, kind, terms, queries, rng):
+    first, last = TERM_RANKS[kind]
+    latencies, matches = [], []
+    for _ in range(queries):
+        text = ' '.join(rng.choice(words[first:last]) for _ in range(terms))
+        started = time.perf_counter()
+        results = index.search(text, limit=20)
+        latencies.append((time.perf_counter() - started) * 1000)
+        matches.append(results['total'])
+    return {'terms': terms, 'kind': kind, 'queries': queries,
+            'p50_ms': round(percentile(latencies, 50), 2), 'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2), 'mean_matches': round(statistics.mean(matches), 1)}
+
+
+def scan_baseline(projects, words, queries, rng):
+    """The previous approach: read every project with a parallel scan and match substrings"""
+    from database.parallel_scan import parallel_scan
+
+    table = InMemoryScanTable(projects)
+    latencies = []
+    for _ in range(queries):
+        word = rng.choice(words[TERM_RANKS['medium'][0]:TERM_RANKS['medium'][1]])
+        started = time.perf_counter()
+        items = parallel_scan(table.scan, total_segments=4)['Items']
+        [item for item in items if word in item['project_name'].lower() or word in item['description'].lower()]
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {'kind': 'scan and substring match, 4 segments', 'queries': queries,
+            'p50_ms': round(percentile(latencies, 50), 2), 'p95_ms': round(percentile(latencies, 95), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--projects', type=int, default=100000)
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=50, help='queries per term count and kind')
+    parser.add_argument('--scan-queries', type=int, default=3)
+    parser.add_argument('--write-capacity', type=int, default=1000, help='index table WCU per second')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    add_layer_to_path()
+    from logger.metrics import metrics
+
+    metrics.stream = open(os.devnull, 'w')
+    rng = random.Random(args.seed)
+    words = vocabulary(args.vocabulary, rng)
+    projects = synthetic_projects(args.projects, words, rng)
+    client = InMemoryDynamoDBClient({TABLE_NAME: ('project_id', None),
+                                     SEARCH_TABLE_NAME: ('token', 'project_id')})
+
+    index, build = build_index(projects, client, args.write_capacity)
+    print(f"build: {build['projects']} projects, {build['postings']} postings ({build['postings_per_project']} per "
+          f"project, {build['distinct_tokens']} tokens), tokenize {build['tokenize_s']}s, "
+          f"{build['batch_write_requests']} BatchWriteItem requests, ~{build['dynamodb_write_s']}s at "
+          f"{args.write_capacity} WCU/s")
+
+    results = []
+    for terms in (1, 2, 3):
+        for kind in TERM_RANKS:
+            result = run_queries(index, words, kind, terms, args.queries, rng)
+            metrics.flush()
+            results.append(result)
+            print(f"search  terms={terms} {kind:<7} p50={result['p50_ms']:.2f}ms p95={result['p95_ms']:.2f}ms "
+                  f"p99={result['p99_ms']:.2f}ms matches={result['mean_matches']}")
+    baseline = scan_baseline(projects, words, args.scan_queries, rng)
+    print(f"{baseline['kind']}: p50={baseline['p50_ms']:.2f}ms p95={baseline['p95_ms']:.2f}ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'build': build, 'queries': results, 'scan_baseline': baseline}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
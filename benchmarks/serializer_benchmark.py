@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Time to turn low-level DynamoDB project items into a JSON response body, for:
+
+- ``boto3.dynamodb.types.TypeDeserializer``, which returns Decimal and set values that need a
+  ``default`` hook in json.dumps
+- ``database.serializer.deserialize_item``, the generic layer serializer
+- ``database.serializer.deserialize_project``, its fast path for the project schema
+
+Items are in the stored form: on_project a string set, version a number.
+
+    python benchmarks/serializer_benchmark.py --items 1000 10000 --members 5 50
+"""
+import argparse
+import decimal
+import json
+import random
+import statistics
+import time
+import uuid
+
+from common import add_layer_to_path
+
+
+def synthetic_items(count, members, rng):
+    return [{'project_id': {'S': str(uuid.UUID(int=rng.getrandbits(128)))},
+             'project_name': {'S': f'Project {index}'},
+             'description': {'S': 'Benchmark project description ' * 4},
+             'internal': {'BOOL': index % 2 == 0},
+             'on_project': {'SS': [f'Member {rng.randrange(10000)}' for _ in range(members)]},
+             'version': {'N': str(rng.randint(1, 50))},
+             'entity_type': {'S': 'project#0'},
+             'created_at': {'S': '2022-09-30T12:00:00.000Z'},
+             'updated_at': {'S': '2022-10-01T08:30:00.000Z'}} for index in range(count)]
+
+
+def json_default(value):
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, set):
+        return sorted(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def approaches():
+    from boto3.dynamodb.types import TypeDeserializer
+    from database.serializer import deserialize_item, deserialize_project
+
+    type_deserializer = TypeDeserializer()
+
+    def boto3_deserialize(item):
+        return {name: type_deserializer.deserialize(value) for name, value in item.items()}
+
+    return {'TypeDeserializer': (boto3_deserialize, json_default),
+            'deserialize_item': (deserialize_item, None),
+            'deserialize_project': (deserialize_project, None)}
+
+
+def run(items, deserialize, default, repeat):
+    deserialize_ms, total_ms = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        projects = [deserialize(item) for item in items]
+        deserialized = time.perf_counter()
+        json.dumps({'Projects': projects}, default=default)
+        finished = time.perf_counter()
+        deserialize_ms.append((deserialized - started) * 1000)
+        total_ms.append((finished - started) * 1000)
+    return {'deserialize_ms': round(statistics.median(deserialize_ms), 2),
+            'deserialize_and_dumps_ms': round(statistics.median(total_ms), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--members', type=int, nargs='+', default=[5, 50])
+    parser.add_argument('--repeat', type=int, default=7, help='runs per case, the median is reported')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    add_layer_to_path()
+    rng = random.Random(args.seed)
+    results = []
+    for count in args.items:
+        for members in args.members:
+            items = synthetic_items(count, members, rng)
+            baseline = None
+            for name, (deserialize, default) in approaches().items():
+                result = dict(run(items, deserialize, default, args.repeat), approach=name, items=count,
+                              members=members)
+                baseline = baseline or result['deserialize_and_dumps_ms']
+                results.append(result)
+                print(f"items={count:<6} members={members:<3} {name:<20} deserialize={result['deserialize_ms']:.2f}ms "
+                      f"+dumps={result['deserialize_and_dumps_ms']:.2f}ms "
+                      f"({baseline / result['deserialize_and_dumps_ms']:.1f}x)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
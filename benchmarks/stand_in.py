@@ -0,0 +1,156 @@
+import bisect
+import hashlib
+import threading
+import time
+
+PAGE_SIZE_BYTES = 1024 * 1024
+
+
+def _item_size(item):
+    return sum(len(key) + len(str(value)) for key, value in item.items())
+
+
+class InMemoryScanTable:
+    """
+    Local stand-in for a DynamoDB table that answers ``scan`` calls, including parallel scan segments.
+
+    Items are assigned to segments by hashing the partition key and pages are cut at 1 MB like
+    DynamoDB. Every request sleeps ``request_latency`` seconds plus ``latency_per_mb`` for each MB
+    of page data to model the network round trip and the server-side read.
+    """
+
+    def __init__(self, items, key='project_id', request_latency=0.005, latency_per_mb=0.1):
+        self.key = key
+        self.request_latency = request_latency
+        self.latency_per_mb = latency_per_mb
+        self.items = sorted(items, key=lambda item: item[key])
+        self._segments = {}
+        self._positions = {}
+        self._lock = threading.Lock()
+
+    def _segment_items(self, segment, total_segments):
+        with self._lock:
+            if total_segments not in self._segments:
+                buckets = [[] for _ in range(total_segments)]
+                for item in self.items:
+                    digest = hashlib.md5(item[self.key].encode('utf-8')).digest()
+                    buckets[int.from_bytes(digest[:4], 'big') % total_segments].append(item)
+                self._positions[total_segments] = [{item[self.key]: index for index, item in enumerate(bucket)}
+                                                   for bucket in buckets]
+                self._segments[total_segments] = buckets
+        return self._segments[total_segments][segment]
+
+    def scan(self, Segment=0, TotalSegments=1, ExclusiveStartKey=None, Limit=None, **kwargs):
+        items = self._segment_items(Segment, TotalSegments)
+        start = 0
+        if ExclusiveStartKey:
+            start = self._positions[TotalSegments][Segment][ExclusiveStartKey[self.key]] + 1
+
+        page, page_bytes = [], 0
+        for item in items[start:]:
+            if page_bytes >= PAGE_SIZE_BYTES or (Limit and len(page) >= Limit):
+                break
+            page.append(item)
+            page_bytes += _item_size(item)
+        time.sleep(self.request_latency + self.latency_per_mb * page_bytes / PAGE_SIZE_BYTES)
+
+        response = {'Items': page, 'Count': len(page),
+                    'ConsumedCapacity': {'CapacityUnits': page_bytes / 4096 / 2}}
+        if start + len(page) < len(items):
+            response['LastEvaluatedKey'] = {self.key: page[-1][self.key]}
+        return response
+
+
+def _key_value(attribute_value):
+    return next(iter(attribute_value.values()))
+
+
+class _ClientMeta:
+    method_to_api_mapping = {'query': 'Query', 'batch_get_item': 'BatchGetItem', 'batch_write_item': 'BatchWriteItem'}
+
+
+class InMemoryDynamoDBClient:
+    """
+    Local stand-in for the low-level DynamoDB client calls used by the search index: ``query`` on
+    the partition key, ``batch_write_item`` and ``batch_get_item``. Items are kept in AttributeValue form.
+
+    Reads sleep like :class:`InMemoryScanTable`, writes do not sleep so loading a large table stays fast.
+    """
+
+    meta = _ClientMeta()
+
+    def __init__(self, key_schemas, request_latency=0.005, latency_per_mb=0.1):
+        """
+        :param key_schemas: dict of table name => (partition key name, sort key name or None)
+        """
+        self.key_schemas = key_schemas
+        self.request_latency = request_latency
+        self.latency_per_mb = latency_per_mb
+        self.tables = {table_name: {} for table_name in key_schemas}
+        self._sorted = {}
+        self._lock = threading.Lock()
+
+    def _sleep(self, page_bytes):
+        time.sleep(self.request_latency + self.latency_per_mb * page_bytes / PAGE_SIZE_BYTES)
+
+    def _key(self, table_name, key):
+        hash_key, range_key = self.key_schemas[table_name]
+        return _key_value(key[hash_key]), _key_value(key[range_key]) if range_key else None
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        with self._lock:
+            for table_name, requests in RequestItems.items():
+                partitions = self.tables[table_name]
+                for request in requests:
+                    if 'PutRequest' in request:
+                        item = request['PutRequest']['Item']
+                        partition_key, sort_key = self._key(table_name, item)
+                        partitions.setdefault(partition_key, {})[sort_key] = item
+                    else:
+                        partition_key, sort_key = self._key(table_name, request['DeleteRequest']['Key'])
+                        partitions.get(partition_key, {}).pop(sort_key, None)
+                    self._sorted.pop((table_name, partition_key), None)
+        return {'UnprocessedItems': {}}
+
+    def batch_get_item(self, RequestItems, **kwargs):
+        responses, page_bytes = {}, 0
+        for table_name, request in RequestItems.items():
+            partitions = self.tables[table_name]
+            found = []
+            for key in request['Keys']:
+                partition_key, sort_key = self._key(table_name, key)
+                item = partitions.get(partition_key, {}).get(sort_key)
+                if item is not None:
+                    found.append(item)
+                    page_bytes += _item_size(item)
+            responses[table_name] = found
+        self._sleep(page_bytes)
+        return {'Responses': responses, 'UnprocessedKeys': {}}
+
+    def query(self, TableName, ExpressionAttributeValues, ExclusiveStartKey=None, Limit=None, **kwargs):
+        """Supports a single partition key equality condition, the first expression value"""
+        partition_key = _key_value(next(iter(ExpressionAttributeValues.values())))
+        with self._lock:
+            sort_keys = self._sorted.get((TableName, partition_key))
+            if sort_keys is None:
+                sort_keys = self._sorted[(TableName, partition_key)] = sorted(
+                    self.tables[TableName].get(partition_key, {}))
+            partition = self.tables[TableName].get(partition_key, {})
+        start = 0
+        if ExclusiveStartKey:
+            start = bisect.bisect_right(sort_keys, self._key(TableName, ExclusiveStartKey)[1])
+
+        page, page_bytes = [], 0
+        for sort_key in sort_keys[start:]:
+            if page_bytes >= PAGE_SIZE_BYTES or (Limit and len(page) >= Limit):
+                break
+            item = partition[sort_key]
+            page.append(item)
+            page_bytes += _item_size(item)
+        self._sleep(page_bytes)
+
+        response = {'Items': page, 'Count': len(page)}
+        if start + len(page) < len(sort_keys):
+            hash_key, range_key = self.key_schemas[TableName]
+            response['LastEvaluatedKey'] = {hash_key: page[-1][hash_key], range_key: page[-1][range_key]}
+        return response
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+"""
+Cold-start benchmark for the project handlers.
+
+Every sample runs in a fresh interpreter with ``python -X importtime`` and records:
+- init_ms: time to import the handler module (the Lambda init phase)
+- client_ms: time to create the shared DynamoDB client on the first request
+- invoke_ms: first invocation with a synthetic event (only with --endpoint-url, e.g. DynamoDB Local)
+- warmup_ms: with --warm, a warm-up event of the keep-warm schedule answered before that first invocation
+- the slowest imports reported by -X importtime
+
+    python benchmarks/startup_benchmark.py --runs 10 --output startup.json
+    python benchmarks/startup_benchmark.py --baseline startup.json --threshold 20
+    python benchmarks/startup_benchmark.py --endpoint-url http://localhost:8000 --warm
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from common import HANDLERS, LAYER_DIR, ROOT_DIR
+
+CHILD = r'''
+import json, sys, time
+started = time.perf_counter()
+import handler
+init_ms = (time.perf_counter() - started) * 1000
+result = {'init_ms': init_ms}
+try:
+    from database.repository import get_repository
+    started = time.perf_counter()
+    get_repository().client
+    result['client_ms'] = (time.perf_counter() - started) * 1000
+except ImportError as e:
+    result['client_error'] = str(e)
+if len(sys.argv) > 1:
+    sys.path.insert(0, sys.argv[2])
+    from common import FakeContext
+    event = json.loads(sys.argv[1])
+    if sys.argv[4] == 'warm':
+        from warmer.warmer import warmup_event
+        started = time.perf_counter()
+        getattr(handler, sys.argv[3])(warmup_event(), FakeContext())
+        result['warmup_ms'] = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    getattr(handler, sys.argv[3])(event, FakeContext())
+    result['invoke_ms'] = (time.perf_counter() - started) * 1000
+print(json.dumps(result))
+'''
+
+
+def parse_importtime(stderr, top):
+    """Returns the ``top`` slowest imports (cumulative microseconds) from -X importtime output"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, module = line.split('|', 2)
+        imports.append((int(cumulative_us), module.strip()))
+    return [{'module': module, 'cumulative_us': cumulative}
+            for cumulative, module in sorted(imports, reverse=True)[:top]]
+
+
+def sample_event(name):
+    from common import create_event, get_event, update_event, delete_event
+    project = {'project_name': 'benchmark', 'description': 'startup', 'internal': True, 'on_project': ['Jonh Doe']}
+    return {'create_project': create_event(project),
+            'get_project': get_event('startup-benchmark'),
+            'update_project': update_event('startup-benchmark', {'description': 'startup'}),
+            'delete_project': delete_event('startup-benchmark')}[name]
+
+
+def run_sample(name, endpoint_url, top, warm=False):
+    source_dir, function_name = HANDLERS[name]
+    env = dict(os.environ,
+               PYTHONPATH=os.pathsep.join([LAYER_DIR, os.path.join(ROOT_DIR, source_dir)]),
+               DATABASE=os.getenv('DATABASE', 'startup-benchmark'),
+               AWS_REGION=os.getenv('AWS_REGION', 'eu-west-1'),
+               AWS_ACCESS_KEY_ID=os.getenv('AWS_ACCESS_KEY_ID', 'benchmark'),
+               AWS_SECRET_ACCESS_KEY=os.getenv('AWS_SECRET_ACCESS_KEY', 'benchmark'))
+    command = [sys.executable, '-X', 'importtime', '-c', CHILD]
+    if endpoint_url:
+        env['DYNAMODB_ENDPOINT_URL'] = endpoint_url
+        command += [json.dumps(sample_event(name)), os.path.dirname(os.path.abspath(__file__)), function_name,
+                    'warm' if warm else 'cold']
+    completed = subprocess.run(command, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f'{name} failed to start:\n{completed.stderr[-2000:]}')
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['imports'] = parse_importtime(completed.stderr, top)
+    return result
+
+
+def summarize(samples):
+    summary = {}
+    for metric in ('init_ms', 'client_ms', 'warmup_ms', 'invoke_ms'):
+        values = [sample[metric] for sample in samples if metric in sample]
+        if values:
+            summary[metric] = {'median': round(statistics.median(values), 2),
+                               'min': round(min(values), 2),
+                               'max': round(max(values), 2)}
+    summary['slowest_imports'] = samples[-1]['imports']
+    errors = {sample['client_error'] for sample in samples if 'client_error' in sample}
+    if errors:
+        summary['client_error'] = errors.pop()
+    return summary
+
+
+def find_regressions(results, baseline, threshold):
+    regressions = []
+    for name, summary in results.items():
+        for metric in ('init_ms', 'client_ms', 'invoke_ms'):
+            if metric not in summary or metric not in baseline.get(name, {}):
+                continue
+            before, after = baseline[name][metric]['median'], summary[metric]['median']
+            if before and (after - before) / before * 100 > threshold:
+                regressions.append(f'{name} {metric}: {before}ms -> {after}ms')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--handlers', nargs='+', default=list(HANDLERS), choices=list(HANDLERS))
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='number of slowest imports to report')
+    parser.add_argument('--endpoint-url', help='DynamoDB endpoint for the cold invoke, e.g. http://localhost:8000')
+    parser.add_argument('--warm', action='store_true', help='send a warm-up event before the first invocation')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare against')
+    parser.add_argument('--threshold', type=float, default=20, help='allowed slowdown in percent')
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.handlers:
+        results[name] = summarize([run_sample(name, args.endpoint_url, args.top, args.warm) for _ in range(args.runs)])
+        line = ' '.join(f"{metric}={results[name][metric]['median']:.1f}"
+                        for metric in ('init_ms', 'client_ms', 'warmup_ms', 'invoke_ms') if metric in results[name])
+        print(f'{name:<16} {line}')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
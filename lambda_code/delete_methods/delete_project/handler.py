@@ -1,24 +1,26 @@
-from boto3 import resource
-from botocore.exceptions import ClientError
-from logger.logger import log
-import os
-
-dynamodb = resource('dynamodb', region_name=os.getenv('AWS_REGION'))
-table = dynamodb.Table(os.environ.get('DATABASE'))
+from logger.logger import log, log_invocation
+from logger.metrics import metrics
+from instrumentation.instrumentation import instrument, timed
+from warmer.warmer import warm_up
+from database.repository import get_repository
+from errors.errors import handle_errors, BadRequestError
 
 
+@warm_up
+@log_invocation
+@handle_errors
+@metrics.log_metrics
+@instrument
 def delete_project(event, context):
-    if 'params' in event:
-        project_id = event['params']['path']['project_id']
-        log.info(f'Deleting record from DynamoDB, project_id: {project_id}')
-        try:
-            table.delete_item(Key={'project_id': project_id})
-            response_string = f"Successfully deleted project with project_id: {project_id}"
-            response = {
-                "outcome:": response_string
-            }
-            log.info(f"Successfully deleted project with project_id: {project_id}")
-            return response
-        except ClientError as e:
-            log.error(f'Error: {e}')
-            raise SystemExit(1)
+    with timed('parse'):
+        project_id = event.get('params', {}).get('path', {}).get('project_id')
+        if not project_id:
+            raise BadRequestError('Missing project_id path parameter')
+    log.info('Deleting record from DynamoDB, project_id: %s', project_id)
+    get_repository().delete(project_id)
+    response_string = f"Successfully deleted project with project_id: {project_id}"
+    response = {
+        "outcome:": response_string
+    }
+    log.info('Successfully deleted project with project_id: %s', project_id)
+    return response
@@ -1,33 +1,165 @@
-from boto3 import resource
-from botocore.exceptions import ClientError
-from logger.logger import log
+from logger.logger import log, log_invocation
+from logger.metrics import metrics
+from instrumentation.instrumentation import instrument, timed
+from warmer.warmer import warm_up
+from database.parallel_scan import ScanMemoryLimitExceeded
+from database.repository import get_repository, parse_timestamp, CREATED_INDEX, UPDATED_INDEX
+from cache.cache import ReadThroughCache
+from errors.errors import handle_errors, BadRequestError, NotFoundError, PayloadTooLargeError
 import os
 
-dynamodb = resource('dynamodb', region_name=os.getenv('AWS_REGION'))
-table = dynamodb.Table(os.environ.get('DATABASE'))
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+SCAN_SEGMENTS = int(os.getenv('SCAN_SEGMENTS', 4))
+MAX_SCAN_SEGMENTS = 16
+# Synchronous Lambda responses are capped at 6 MB, leave room for the response envelope
+SCAN_MAX_BYTES = int(os.getenv('SCAN_MAX_BYTES', 5 * 1024 * 1024))
+# Opt-in cache of single projects, shared by the invocations of one execution environment
+PROJECT_CACHE_SIZE = int(os.getenv('PROJECT_CACHE_SIZE', 0))
+PROJECT_CACHE_TTL = float(os.getenv('PROJECT_CACHE_TTL', 30))
 
+project_cache = ReadThroughCache(PROJECT_CACHE_SIZE, PROJECT_CACHE_TTL) if PROJECT_CACHE_SIZE > 0 else None
+# Cache counters emitted as metrics of the ProjectCache operation, one value per request
+CACHE_METRICS = {'hits': 'CacheHits', 'misses': 'CacheMisses', 'revalidated': 'CacheRevalidations',
+                 'evictions': 'CacheEvictions'}
 
-def get_project(event, context):
-    if 'params' in event:
-        project_id = event['params']['path']['project_id']
-        log.info(f'Grabbing item from DynamoDB for project_id: {project_id}')
-        try:
-            response = table.get_item(Key={'project_id': project_id})
-            if response['Item']:
-                log.info(f"Successfully retrieved project with project_id: {project_id}")
-                return response['Item']
-            else:
-                log.error(f'There are no items for project_id: {project_id} in DynamoDB')
-                return {'message': f'There are no items for project_id: {project_id} in DynamoDB'}
-        except ClientError as e:
-            log.error(f'Error: {e}')
-            raise SystemExit(1)
+
+@timed('parse')
+def parse_int_param(query_params, name, default, maximum):
+    """Reads a bounded positive integer query string parameter, raises ValueError when it is invalid"""
+    try:
+        value = int(query_params.get(name, default))
+    except ValueError:
+        raise ValueError(f'Invalid {name}: {query_params[name]}')
+    if not 1 <= value <= maximum:
+        raise ValueError(f'Invalid {name}: must be between 1 and {maximum}')
+    return value
+
+
+@timed('parse')
+def parse_list_params(query_params):
+    """Reads the projection and consistency query string parameters shared by all list modes"""
+    fields = [field.strip() for field in query_params.get('fields', '').split(',') if field.strip()]
+    consistent = query_params.get('consistent', 'false').lower() == 'true'
+    return fields, consistent
+
+
+def read_project(project_id):
+    """Reads a single project, through the project cache when it is enabled"""
+    repository = get_repository()
+    if project_cache is None:
+        return repository.get(project_id)
+
+    def load():
+        item = repository.get(project_id)
+        return item, item.get('version', 0) if item else None
+
+    before = dict(project_cache.stats)
+    item = project_cache.read_through(project_id, load, lambda: repository.get_version(project_id))
+    for name, metric in CACHE_METRICS.items():
+        metrics.put_metric(metric, project_cache.stats[name] - before[name], 'Count', 'ProjectCache')
+    metrics.put_metric('CacheSize', len(project_cache.entries), 'Count', 'ProjectCache')
+    return item
+
+
+def list_projects(query_params):
+    """Reads one page of projects, used for GET /projects"""
+    fields, consistent = parse_list_params(query_params)
+    limit = parse_int_param(query_params, 'limit', DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT)
+    log.info('Grabbing a page of items from DynamoDB')
+    items, next_token = get_repository().list_page(limit, next_token=query_params.get('next_token'),
+                                                   fields=fields, consistent=consistent)
+    log.info('Retrieved %d items from DynamoDB', len(items))
+    page = {'Projects': items}
+    if next_token:
+        page['next_token'] = next_token
+    return page
+
+
+def list_sorted_projects(query_params):
+    """
+    Reads one page of projects from a time ordered index, used for GET /projects?order=newest|oldest
+    (by created_at) and GET /projects?changed_since=<ISO 8601 timestamp> (by updated_at, oldest change first).
+    changed_since also returns the projects deleted since, as {"project_id": ..., "deleted": true, "updated_at": ...}
+    """
+    fields, consistent = parse_list_params(query_params)
+    if consistent:
+        raise ValueError('Invalid consistent: strongly consistent reads are not supported with order or changed_since')
+    limit = parse_int_param(query_params, 'limit', DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT)
+    if query_params.get('changed_since'):
+        since = parse_timestamp(query_params['changed_since'])
+        log.info('Querying a page of projects changed since %s', since)
+        items, next_token = get_repository().list_sorted_page(UPDATED_INDEX, limit, query_params.get('next_token'),
+                                                              fields=fields, since=since)
     else:
-        log.info('Grabbing all items from DynamoDB')
-        try:
-            response = table.scan(Select='ALL_ATTRIBUTES', ReturnConsumedCapacity='INDEXES', ConsistentRead=True)
-            log.info('All items from DynamoDB successfully retrieved')
-            return {'Projects': response['Items']}
-        except ClientError as e:
-            log.error(f'Error: {e}')
-            raise SystemExit(1)
+        order = query_params['order'].lower()
+        if order not in ('newest', 'oldest'):
+            raise ValueError(f'Invalid order: {order}, must be newest or oldest')
+        log.info('Querying a page of projects, %s first', order)
+        items, next_token = get_repository().list_sorted_page(CREATED_INDEX, limit, query_params.get('next_token'),
+                                                              fields=fields, ascending=order == 'oldest')
+    log.info('Retrieved %d items from DynamoDB', len(items))
+    page = {'Projects': items}
+    if next_token:
+        page['next_token'] = next_token
+    return page
+
+
+def list_member_projects(query_params):
+    """Reads one page of the projects of a member from the membership index, used for GET /projects?member="""
+    fields, consistent = parse_list_params(query_params)
+    limit = parse_int_param(query_params, 'limit', DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT)
+    member = query_params['member']
+    log.info('Querying a page of projects for member: %s', member)
+    items, next_token, unprocessed = get_repository().list_member_page(
+        member, limit, next_token=query_params.get('next_token'), fields=fields, consistent=consistent)
+    log.info('Retrieved %d projects for member %s, %d unprocessed', len(items), member, len(unprocessed))
+    page = {'Projects': items}
+    if next_token:
+        page['next_token'] = next_token
+    if unprocessed:
+        page['unprocessed'] = unprocessed
+    return page
+
+
+def scan_all_projects(query_params):
+    """Reads every project with a parallel scan, used for GET /projects?all=true"""
+    fields, consistent = parse_list_params(query_params)
+    total_segments = parse_int_param(query_params, 'segments', SCAN_SEGMENTS, MAX_SCAN_SEGMENTS)
+    log.info('Grabbing all items from DynamoDB with a parallel scan over %d segments', total_segments)
+    response = get_repository().scan_all(total_segments, max_bytes=SCAN_MAX_BYTES, fields=fields,
+                                         consistent=consistent)
+    log.info('Retrieved %d items from DynamoDB, consumed capacity: %s',
+             response['Count'], response['ConsumedCapacity'])
+    return {'Projects': response['Items']}
+
+
+@warm_up
+@log_invocation
+@handle_errors
+@metrics.log_metrics
+@instrument
+def get_project(event, context):
+    params = event.get('params', {})
+    if params.get('path', {}).get('project_id'):
+        project_id = params['path']['project_id']
+        log.info('Grabbing item from DynamoDB for project_id: %s', project_id)
+        item = read_project(project_id)
+        if not item:
+            raise NotFoundError(f'There are no items for project_id: {project_id} in DynamoDB')
+        log.info('Successfully retrieved project with project_id: %s', project_id)
+        return item
+
+    query_params = params.get('querystring', {})
+    try:
+        if query_params.get('member'):
+            return list_member_projects(query_params)
+        if query_params.get('order') or query_params.get('changed_since'):
+            return list_sorted_projects(query_params)
+        if query_params.get('all', 'false').lower() == 'true':
+            return scan_all_projects(query_params)
+        return list_projects(query_params)
+    except ValueError as e:
+        raise BadRequestError(str(e))
+    except ScanMemoryLimitExceeded as e:
+        raise PayloadTooLargeError(f'{e}, use paginated requests instead')
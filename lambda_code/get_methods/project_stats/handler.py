@@ -0,0 +1,24 @@
+from logger.logger import log, log_invocation
+from logger.metrics import metrics
+from instrumentation.instrumentation import instrument
+from warmer.warmer import warm_up
+from database.stats import get_project_stats
+from errors.errors import handle_errors
+
+
+@warm_up
+@log_invocation
+@handle_errors
+@metrics.log_metrics
+@instrument
+def get_stats(event, context):
+    query_params = event.get('params', {}).get('querystring', {})
+    stats = get_project_stats()
+    log.info('Reading project stats')
+    response = stats.summary()
+    if query_params.get('member'):
+        response['member'] = {query_params['member']: stats.member(query_params['member'])}
+    if query_params.get('members', 'false').lower() == 'true':
+        response['members'] = stats.members()
+    log.info('Project stats: %s', response)
+    return response
@@ -0,0 +1,37 @@
+from logger.logger import log, log_invocation
+from logger.metrics import metrics
+from instrumentation.instrumentation import instrument, timed
+from warmer.warmer import warm_up
+from search.index import get_search_index
+from errors.errors import handle_errors, BadRequestError
+
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+
+@warm_up
+@log_invocation
+@handle_errors
+@metrics.log_metrics
+@instrument
+def search_projects(event, context):
+    query_params = event.get('params', {}).get('querystring', {})
+    with timed('parse'):
+        text = query_params.get('q', '').strip()
+        if not text:
+            raise BadRequestError('Missing q query string parameter')
+        try:
+            limit = int(query_params.get('limit', SEARCH_DEFAULT_LIMIT))
+        except ValueError:
+            raise BadRequestError(f"Invalid limit: {query_params['limit']}")
+        if not 1 <= limit <= SEARCH_MAX_LIMIT:
+            raise BadRequestError(f'Invalid limit: must be between 1 and {SEARCH_MAX_LIMIT}')
+        fields = [field.strip() for field in query_params.get('fields', '').split(',') if field.strip()]
+
+    log.info('Searching projects for: %s', text)
+    try:
+        results = get_search_index().search(text, limit, fields=fields)
+    except ValueError as e:
+        raise BadRequestError(str(e))
+    log.info('Search for %s matched %d projects, truncated: %s', text, results['total'], results['truncated'])
+    return results
@@ -0,0 +1,59 @@
+from logger.logger import log, log_invocation
+from logger.metrics import metrics
+from instrumentation.instrumentation import instrument, timed
+from warmer.warmer import warm_up
+from database.repository import get_repository, VersionConflict
+from errors.errors import handle_errors, BadRequestError, ConflictError, NotFoundError
+
+MEMBER_OPERATIONS = ["add_members", "remove_members"]
+
+
+def parse_members(body, operation, project_id):
+    members = body.get(operation, [])
+    if not isinstance(members, list) or not all(isinstance(member, str) and member for member in members):
+        raise BadRequestError(f'{operation} must be a list of names in PATCH method body for {project_id}')
+    return members
+
+
+@warm_up
+@log_invocation
+@handle_errors
+@metrics.log_metrics
+@instrument
+def patch_project(event, context):
+    """
+    Adds people to and removes people from a project without sending the whole on_project list,
+    e.g. {"add_members": ["Jane Roe"], "remove_members": ["Mike Lee"], "expected_version": 3}.
+    Returns the updated attributes only.
+    """
+    with timed('parse'):
+        project_id = event.get('params', {}).get('path', {}).get('project_id')
+        if not project_id:
+            raise BadRequestError('Missing project_id path parameter')
+        log.info('Patching members of DynamoDB record with project_id: %s', project_id)
+
+        body = event.get('body') or {}
+        if not isinstance(body, dict) or not any(operation in body for operation in MEMBER_OPERATIONS):
+            raise BadRequestError(f'PATCH method body for {project_id} needs add_members or remove_members')
+        for key in body:
+            if key not in MEMBER_OPERATIONS + ["expected_version"]:
+                raise BadRequestError(f'Non-existent operation {key} in PATCH method body for {project_id}')
+        add_members = parse_members(body, 'add_members', project_id)
+        remove_members = parse_members(body, 'remove_members', project_id)
+        if set(add_members) & set(remove_members):
+            raise BadRequestError(f'Names both added and removed in PATCH method body for {project_id}')
+        expected_version = body.get('expected_version')
+        if expected_version is not None and (not isinstance(expected_version, int) or
+                                             isinstance(expected_version, bool) or expected_version < 0):
+            raise BadRequestError(f'expected_version must be a non-negative integer for {project_id}')
+
+    try:
+        attributes = get_repository().patch_members(project_id, add_members, remove_members, expected_version)
+    except VersionConflict as e:
+        raise ConflictError(str(e))
+    except ValueError as e:
+        raise BadRequestError(str(e))
+    if attributes is None:
+        raise NotFoundError(f'There are no items for project_id: {project_id} in DynamoDB')
+    log.info('Members of project with id %s sucessfully patched.', project_id)
+    return {'Attributes': attributes}
@@ -0,0 +1,47 @@
+from logger.logger import log, log_invocation
+from logger.metrics import metrics
+from instrumentation.instrumentation import instrument, timed
+from warmer.warmer import warm_up
+from database.repository import get_repository
+from errors.errors import handle_errors, BadRequestError
+import os
+import uuid
+
+REQUIRED_ATTRIBUTES = ["project_name", "description", "internal", "on_project"]
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', 1000))
+
+
+@warm_up
+@log_invocation
+@handle_errors
+@metrics.log_metrics
+@instrument
+def create_projects(event, context):
+    if not isinstance(event, list) or not event:
+        raise BadRequestError('Batch CREATE method body must be a non-empty array of projects')
+    if len(event) > BATCH_MAX_ITEMS:
+        raise BadRequestError(f'Batch CREATE method body can contain at most {BATCH_MAX_ITEMS} projects')
+
+    results = []
+    projects = []
+    with timed('parse'):
+        for index, body in enumerate(event):
+            missing = [key for key in REQUIRED_ATTRIBUTES if not isinstance(body, dict) or key not in body]
+            if missing:
+                results.append({"index": index, "outcome": "invalid",
+                                "message": f"Missing attributes: {', '.join(missing)}"})
+                continue
+            project = {"project_id": str(uuid.uuid4())}
+            project.update({key: body[key] for key in REQUIRED_ATTRIBUTES})
+            projects.append(project)
+            results.append({"index": index, "project_id": project["project_id"]})
+
+    log.info('Writing %d projects to DynamoDB in batches', len(projects))
+    failed = get_repository().batch_create(projects) if projects else set()
+    for result in results:
+        if 'project_id' in result:
+            result["outcome"] = "failed" if result["project_id"] in failed else "created"
+
+    created = len(projects) - len(failed)
+    log.info('Batch create finished: %d created, %d failed, %d invalid', created, len(failed), len(event) - len(projects))
+    return {"created": created, "failed": len(failed), "invalid": len(event) - len(projects), "results": results}
@@ -0,0 +1,36 @@
+from logger.logger import log, log_invocation
+from logger.metrics import metrics
+from instrumentation.instrumentation import instrument, timed
+from warmer.warmer import warm_up
+from database.repository import get_repository
+from errors.errors import handle_errors, BadRequestError
+import os
+
+BATCH_GET_MAX_IDS = int(os.getenv('BATCH_GET_MAX_IDS', 500))
+
+
+@warm_up
+@log_invocation
+@handle_errors
+@metrics.log_metrics
+@instrument
+def get_projects(event, context):
+    with timed('parse'):
+        project_ids = event.get('project_ids') if isinstance(event, dict) else None
+        if not isinstance(project_ids, list) or not project_ids:
+            raise BadRequestError('Batch GET method body must contain a non-empty project_ids array')
+        if len(project_ids) > BATCH_GET_MAX_IDS:
+            raise BadRequestError(f'Batch GET method body can contain at most {BATCH_GET_MAX_IDS} project_ids')
+        fields = event.get('fields') or []
+
+    log.info('Grabbing %d items from DynamoDB in batches', len(project_ids))
+    try:
+        projects, unprocessed = get_repository().batch_get(project_ids, fields=fields,
+                                                           consistent=event.get('consistent', False) is True)
+    except ValueError as e:
+        raise BadRequestError(str(e))
+
+    missing = [project_id for project_id in dict.fromkeys(project_ids)
+               if project_id not in projects and project_id not in unprocessed]
+    log.info('Batch get finished: %d found, %d missing, %d unprocessed', len(projects), len(missing), len(unprocessed))
+    return {"Projects": projects, "missing": missing, "unprocessed": unprocessed}
@@ -1,34 +1,57 @@
-import os
-from boto3 import resource
-from botocore.exceptions import ClientError
-from logger.logger import log
+from logger.logger import log, log_invocation
+from logger.metrics import metrics
+from instrumentation.instrumentation import instrument, timed
+from warmer.warmer import warm_up
+from database.repository import get_repository
+from errors.errors import handle_errors, BadRequestError
 import uuid
 
-dynamodb = resource('dynamodb', region_name=os.getenv('AWS_REGION'))
-table = dynamodb.Table(os.environ.get('DATABASE'))
+# Type of every attribute of the CREATE method body
+ATTRIBUTE_TYPES = {"project_name": str, "description": str, "internal": bool, "on_project": list}
 
 
+def parse_project(event):
+    """
+    Checks the CREATE method body, raises BadRequestError when it is not a project
+
+    :return: the project attributes
+    """
+    if not isinstance(event, dict):
+        raise BadRequestError('CREATE method body must be a JSON object')
+    for key, attribute_type in ATTRIBUTE_TYPES.items():
+        if key not in event:
+            raise BadRequestError(f'Missing attribute in CREATE method body: {key}')
+        if not isinstance(event[key], attribute_type):
+            raise BadRequestError(f'Attribute {key} in CREATE method body must be a {attribute_type.__name__}')
+    if not all(isinstance(member, str) and member for member in event['on_project']):
+        raise BadRequestError('on_project must be a list of names in CREATE method body')
+    return {key: event[key] for key in ATTRIBUTE_TYPES}
+
+
+@warm_up
+@log_invocation
+@handle_errors
+@metrics.log_metrics
+@instrument
 def create_project(event, context):
+    project_id = str(uuid.uuid4())
+    with timed('parse'):
+        project = parse_project(event)
+        project_name, description = project['project_name'], project['description']
+        internal, on_project = project['internal'], project['on_project']
     try:
-        project_id = str(uuid.uuid4())
-        project_name = event['project_name']
-        description = event['description']
-        internal = event['internal']
-        on_project = event['on_project']
-        table.put_item(Item={"project_id": project_id, "project_name": project_name, "description": description,
-                             "internal": internal, "on_project": on_project})
+        get_repository().create(dict(project, project_id=project_id))
+    except ValueError as e:
+        raise BadRequestError(str(e))
 
-        response = {
-            "outcome: ": "project successfully added",
-            "project id: ": project_id,
-            "project name: ": project_name,
-            "description: ": description,
-            "internal:": internal,
-            "on_project: ": on_project
-        }
-        log.info(
-            f'Project with id {project_id} successfully created. Project name: {project_name}. On project: {on_project}')
-        return response
-    except ClientError as e:
-        log.error(f'Error:{e}')
-        raise SystemExit(1)
+    response = {
+        "outcome: ": "project successfully added",
+        "project id: ": project_id,
+        "project name: ": project_name,
+        "description: ": description,
+        "internal:": internal,
+        "on_project: ": on_project
+    }
+    log.info('Project with id %s successfully created. Project name: %s. On project: %s',
+             project_id, project_name, on_project)
+    return response
@@ -1,44 +1,37 @@
-from boto3 import resource
-from botocore.exceptions import ClientError
-from logger.logger import log
-import os
+from logger.logger import log, log_invocation
+from logger.metrics import metrics
+from instrumentation.instrumentation import instrument, timed
+from warmer.warmer import warm_up
+from database.repository import get_repository
+from errors.errors import handle_errors, BadRequestError, NotFoundError
 
-dynamodb = resource('dynamodb', region_name=os.getenv('AWS_REGION'))
-table = dynamodb.Table(os.environ.get('DATABASE'))
+ACCEPTED_ATTRIBUTES = ["project_name", "description", "internal", "on_project"]
 
 
+@warm_up
+@log_invocation
+@handle_errors
+@metrics.log_metrics
+@instrument
 def update_project(event, context):
-    if 'params' in event:
-        project_id = {"project_id": f"{event['params']['path']['project_id']}"}   
-        log.info(f'Changing DynamoDB record with project_id: {project_id}')
-        try:
-            update_expression= "SET"
-            expression_attribute_names = {}
-            expression_attribute_values= {}
-            body = event['body']
-            accepted_attributes= ["project_name", "description", "internal", "on_project"]
-            
-            for key, value in body.items():
-                if key in accepted_attributes:
-                    update_expression += f' #{key} = :{key},' 
-                    expression_attribute_names[f'#{key}'] = key
-                    expression_attribute_values[f':{key}'] = value
-                else:
-                    log.error(f'Error: non-existent attribute in UPDATE method body for {project_id}')
-                    raise SystemExit(1)
-                    
-            log.info(f'Project with id {project_id} sucessfully updated.')
-            
-            # Remove comma at the end of expression         
-            update_expression = update_expression[:-1]
-            
-            return table.update_item(Key=project_id,
-                                     UpdateExpression=update_expression,
-                                     ExpressionAttributeNames=expression_attribute_names,
-                                     ExpressionAttributeValues=expression_attribute_values,
-                                     ReturnValues="ALL_NEW"
-                                     )
+    with timed('parse'):
+        project_id = event.get('params', {}).get('path', {}).get('project_id')
+        if not project_id:
+            raise BadRequestError('Missing project_id path parameter')
+        log.info('Changing DynamoDB record with project_id: %s', project_id)
 
-        except ClientError as e:
-            log.error(f'Error: {e}')
-            raise SystemExit(1)
+        body = event.get('body') or {}
+        if not isinstance(body, dict) or not body:
+            raise BadRequestError(f'Empty UPDATE method body for {project_id}')
+        for key in body:
+            if key not in ACCEPTED_ATTRIBUTES:
+                raise BadRequestError(f'Non-existent attribute {key} in UPDATE method body for {project_id}')
+
+    try:
+        updated_project = get_repository().update(project_id, body)
+    except ValueError as e:
+        raise BadRequestError(str(e))
+    if updated_project is None:
+        raise NotFoundError(f'There are no items for project_id: {project_id} in DynamoDB')
+    log.info('Project with id %s sucessfully updated.', project_id)
+    return {'Attributes': updated_project}
@@ -0,0 +1,99 @@
+"""
+Single function deployment of the project routes, used when the stack is deployed with BACKEND_MODE=router.
+
+The REST API proxies the project routes to this function. Each request is turned into the event the
+non-proxy integration of its route would have passed, the matching handler is called in process and
+its result or error becomes the HTTP response. The handlers are imported once, during the init phase.
+"""
+import base64
+import importlib.util
+import json
+import os
+from logger.logger import log
+from warmer.warmer import warm_up
+from errors.errors import ApiError, BadRequestError, NotFoundError, InternalServerError
+
+LAMBDA_CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_handler(source_dir: str, function_name: str):
+    """
+    Imports ``handler.py`` of a function source directory under a unique module name
+
+    :param source_dir: directory below lambda_code, e.g. get_methods/get_project
+    :param function_name: handler function within the module
+    :return: handler function
+    """
+    spec = importlib.util.spec_from_file_location(f'{function_name}_handler',
+                                                  os.path.join(LAMBDA_CODE_DIR, source_dir, 'handler.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, function_name)
+
+
+get_project = load_handler('get_methods/get_project', 'get_project')
+
+# (HTTP method, resource from /projects on) => (handler, whether the handler takes the request body as its event)
+ROUTES = {
+    ('POST', '/projects/create'): (load_handler('post_methods/create_project', 'create_project'), True),
+    ('GET', '/projects'): (get_project, False),
+    ('GET', '/projects/{project_id}'): (get_project, False),
+    ('PUT', '/projects/{project_id}'): (load_handler('put_methods/update_project', 'update_project'), False),
+    ('PATCH', '/projects/{project_id}'): (load_handler('patch_methods/patch_project', 'patch_project'), False),
+    ('DELETE', '/projects/{project_id}'): (load_handler('delete_methods/delete_project', 'delete_project'), False),
+}
+
+
+def parse_body(request: dict):
+    """Reads the JSON request body of a proxy event, an empty body is an empty object"""
+    body = request.get('body')
+    if not body:
+        return {}
+    if request.get('isBase64Encoded'):
+        body = base64.b64decode(body).decode('utf-8')
+    try:
+        return json.loads(body)
+    except ValueError:
+        raise BadRequestError('Request body is not valid JSON')
+
+
+def to_event(request: dict, body_only: bool):
+    """
+    Maps a proxy event to the event of the non-proxy integrations, the output of ``parameter_mapping``
+    in the backend stack, or only the request body for the routes without a request template
+    """
+    body = parse_body(request)
+    if body_only:
+        return body
+    return {'body': body,
+            'params': {'path': request.get('pathParameters') or {},
+                       'querystring': request.get('queryStringParameters') or {},
+                       'header': request.get('headers') or {}}}
+
+
+def response(status_code: int, body: str) -> dict:
+    return {'statusCode': status_code, 'headers': {'Content-Type': 'application/json'}, 'body': body}
+
+
+@warm_up
+def route(event, context):
+    """
+    Lambda proxy integration handler of the project routes
+
+    :param event: API Gateway proxy event
+    :param context: Lambda context
+    :return: proxy response with the handler result, or the error document as returned by the non-proxy integrations
+    """
+    _, separator, path = event.get('resource', '').partition('/projects')
+    method = event.get('httpMethod')
+    try:
+        if (method, separator + path) not in ROUTES:
+            raise NotFoundError(f"No route for {method} {event.get('resource')}")
+        handler, body_only = ROUTES[(method, separator + path)]
+        result = handler(to_event(event, body_only), context)
+        return response(200, json.dumps(result))
+    except ApiError as e:
+        return response(e.status_code, str(e))
+    except Exception as e:
+        log.exception(f'Unexpected error routing {method} {event.get("resource")}: {e}')
+        return response(500, str(InternalServerError('Internal server error')))
@@ -0,0 +1,36 @@
+from logger.logger import log, log_invocation
+from logger.metrics import metrics
+from instrumentation.instrumentation import instrument, timed
+from database.compact import load_image
+from database.stats import get_project_stats, stats_changes
+
+
+@log_invocation
+@metrics.log_metrics
+@instrument
+def update_stats(event, context):
+    """
+    Keeps the project counters up to date, invoked with batches of DynamoDB Stream records.
+    The changes of a whole batch are added up and applied once, keyed by its first and last
+    event ids, so a retried batch is not counted twice.
+    """
+    records = event.get('Records', [])
+    if not records:
+        return {'applied': False}
+    with timed('parse'):
+        changes = []
+        for record in records:
+            images = record.get('dynamodb', {})
+            changes.append((load_image(images, 'OldImage'), load_image(images, 'NewImage')))
+        summary, members = stats_changes(changes)
+
+    batch_id = f"{records[0]['eventID']}#{records[-1]['eventID']}"
+    if not summary and not members:
+        log.info('Stats batch %s of %d records changes no counters', batch_id, len(records))
+        return {'applied': True}
+    log.info('Applying stats batch %s of %d records: summary %s, %d member counters',
+             batch_id, len(records), summary, len(members))
+    applied = get_project_stats().apply(batch_id, summary, members)
+    if not applied:
+        log.warning('Stats batch %s was already applied', batch_id)
+    return {'applied': applied}
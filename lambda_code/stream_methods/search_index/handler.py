@@ -0,0 +1,39 @@
+from logger.logger import log, log_invocation
+from logger.metrics import metrics
+from instrumentation.instrumentation import instrument, timed
+from database.compact import load_image
+from cache.stage_cache import refresh_stage_cache
+from search.index import get_search_index, posting_changes
+
+
+@log_invocation
+@metrics.log_metrics
+@instrument
+def index_projects(event, context):
+    """
+    Keeps the search index in sync with the projects table, invoked with batches of
+    DynamoDB Stream records. Raising makes Lambda retry the whole batch, which is safe
+    because writing the same postings again has no further effect.
+
+    With the stage cache enabled it also drops the cached responses the batch made stale,
+    after the postings were written, see cache.stage_cache.
+    """
+    postings = {}
+    with timed('parse'):
+        # Records of one project arrive in order, later changes of the same posting replace earlier ones
+        for record in event.get('Records', []):
+            images = record.get('dynamodb', {})
+            # Tombstones of deleted projects load as None, replacing a project with one removes its postings
+            old_project = load_image(images, 'OldImage')
+            new_project = load_image(images, 'NewImage')
+            project_id = (new_project or old_project or {}).get('project_id')
+            if not project_id:
+                continue
+            for token, weight in posting_changes(old_project, new_project).items():
+                postings[(token, project_id)] = weight
+
+    log.info('Writing %d search postings for %d stream records', len(postings), len(event.get('Records', [])))
+    unprocessed = get_search_index().write(postings) if postings else []
+    if unprocessed:
+        raise RuntimeError(f'{len(unprocessed)} search postings were not written')
+    return dict(refresh_stage_cache(event.get('Records', [])), postings=len(postings))
@@ -0,0 +1,24 @@
+from logger.logger import log, log_invocation
+from logger.metrics import metrics
+from instrumentation.instrumentation import instrument, timed
+from cache.stage_cache import invalidate_cached_projects
+
+
+@log_invocation
+@metrics.log_metrics
+@instrument
+def invalidate_projects(event, context):
+    """
+    Drops the cached GET /projects/{project_id} responses of the projects the search index function saw
+    change in the projects table stream, invoked asynchronously with {"project_ids": [...]}. Runs in the
+    VPC to reach the private API, see cache.stage_cache.
+    """
+    project_ids = [project_id for project_id in event.get('project_ids', []) if isinstance(project_id, str)]
+    if not project_ids:
+        return {'invalidated': 0, 'failed': 0}
+    log.info('Invalidating the cached responses of %d projects', len(project_ids))
+    with timed('cache_flush'):
+        failed = invalidate_cached_projects(project_ids)
+    if failed:
+        log.warning('%d cached projects expire with their TTL instead: %s', len(failed), failed)
+    return {'invalidated': len(project_ids) - len(failed), 'failed': len(failed)}
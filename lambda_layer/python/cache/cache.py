@@ -0,0 +1,70 @@
+import time
+from collections import OrderedDict
+
+
+class CacheEntry:
+    __slots__ = ('value', 'version', 'expires_at')
+
+    def __init__(self, value, version, expires_at: float):
+        self.value = value
+        self.version = version
+        self.expires_at = expires_at
+
+
+class ReadThroughCache:
+    """
+    Size-bounded LRU cache with a time to live, kept in the execution environment between invocations.
+
+    Entries past their TTL are not dropped right away: :meth:`read_through` first asks for the
+    current version of the record and keeps serving the cached value when it did not change.
+    """
+
+    def __init__(self, max_size: int, ttl: float, clock=time.monotonic):
+        """
+        :param max_size: maximum number of entries, least recently used entries are evicted first
+        :param ttl: seconds an entry is served without revalidation
+        :param clock: time source, returns seconds
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'evictions': 0}
+
+    def put(self, key, value, version):
+        self.entries[key] = CacheEntry(value, version, self.clock() + self.ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def invalidate(self, key):
+        self.entries.pop(key, None)
+
+    def read_through(self, key, load, load_version):
+        """
+        Returns the cached value for key, loading or revalidating it when needed
+
+        :param key: cache key
+        :param load: callable returning (value, version) for key, value None when it does not exist
+        :param load_version: callable returning the current version for key, None when it does not exist
+        :return: value or None
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            if self.clock() < entry.expires_at:
+                self.stats['hits'] += 1
+                return entry.value
+            if load_version() == entry.version:
+                self.stats['revalidated'] += 1
+                entry.expires_at = self.clock() + self.ttl
+                return entry.value
+
+        self.stats['misses'] += 1
+        value, version = load()
+        if value is None:
+            self.invalidate(key)
+        else:
+            self.put(key, value, version)
+        return value
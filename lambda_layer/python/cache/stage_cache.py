@@ -0,0 +1,150 @@
+"""
+Invalidation of the API Gateway stage cache after projects were written, driven by the search index function,
+the one consumer of the projects table stream that sees every change in order.
+
+- a changed project drops only its cached GET /projects/{project_id} response. The private API is reached from
+  within the VPC only, so the stream function asynchronously invokes the stage cache function, which runs in
+  the VPC and requests each project with ``Cache-Control: max-age=0``, see :func:`invalidate_cached_projects`
+- creating or deleting a project changes which projects GET /projects returns, it flushes the whole stage.
+  Cached list pages do not show other changes of a project until they expire after API_CACHE_LIST_TTL seconds
+
+Without the stage cache function (STAGE_CACHE_FUNCTION unset) every change flushes the whole stage.
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+from logger.logger import log
+from instrumentation.instrumentation import timed
+from database.compact import load_image
+
+# Records of items removed by TTL, i.e. expired tombstones of deleted projects, change no API response
+TTL_PRINCIPAL = 'dynamodb.amazonaws.com'
+STAGE_CACHE_WORKERS = int(os.getenv('STAGE_CACHE_WORKERS', 8))
+STAGE_CACHE_TIMEOUT = float(os.getenv('STAGE_CACHE_TIMEOUT', 5))
+
+_clients = {}
+
+
+def _client(service_name: str):
+    if service_name not in _clients:
+        import boto3
+
+        _clients[service_name] = boto3.client(service_name, region_name=os.getenv('AWS_REGION'))
+    return _clients[service_name]
+
+
+def stage_cache_changes(records: list) -> tuple:
+    """
+    Reads which cached responses a batch of projects table stream records makes stale
+
+    :param records: DynamoDB Stream records
+    :return: tuple of (ids of the changed projects in stream order, True when a project was created or deleted)
+    """
+    project_ids = {}
+    lists_changed = False
+    for record in records:
+        if record.get('userIdentity', {}).get('principalId') == TTL_PRINCIPAL:
+            continue
+        images = record.get('dynamodb', {})
+        project_id = images.get('Keys', {}).get('project_id', {}).get('S')
+        if not project_id:
+            continue
+        project_ids[project_id] = True
+        # Tombstones load as None, replacing a project with one deletes it
+        if (load_image(images, 'OldImage') is None) != (load_image(images, 'NewImage') is None):
+            lists_changed = True
+    return list(project_ids), lists_changed
+
+
+def flush_stage_cache() -> bool:
+    """
+    Drops every cached response of the API Gateway stage. Does nothing unless API_ID and API_STAGE are set,
+    which the stack only does when the stage cache is enabled. A failed flush is logged, the cached responses
+    then expire with their TTL.
+
+    :return: True when the cache was flushed
+    """
+    api_id, stage_name = os.getenv('API_ID'), os.getenv('API_STAGE')
+    if not api_id or not stage_name:
+        return False
+    from botocore.exceptions import BotoCoreError, ClientError
+
+    try:
+        with timed('cache_flush'):
+            _client('apigateway').flush_stage_cache(restApiId=api_id, stageName=stage_name)
+    except (BotoCoreError, ClientError) as e:
+        log.warning('Could not flush the stage cache of %s/%s, cached responses expire with their TTL: %s',
+                    api_id, stage_name, e)
+        return False
+    return True
+
+
+def refresh_stage_cache(records: list) -> dict:
+    """
+    Invalidates the cached responses made stale by a batch of projects table stream records, see the module
+    docstring. Failures are logged only, so they do not make Lambda retry the batch.
+
+    :return: dict with flushed, True when the whole stage was flushed, and invalidated, the number of projects
+             whose cached response the stage cache function was asked to drop
+    """
+    if not os.getenv('API_ID'):
+        return {'flushed': False, 'invalidated': 0}
+    project_ids, lists_changed = stage_cache_changes(records)
+    function_name = os.getenv('STAGE_CACHE_FUNCTION')
+    if lists_changed or (project_ids and not function_name):
+        return {'flushed': flush_stage_cache(), 'invalidated': 0}
+    if not project_ids:
+        return {'flushed': False, 'invalidated': 0}
+    from botocore.exceptions import BotoCoreError, ClientError
+
+    try:
+        with timed('cache_flush'):
+            _client('lambda').invoke(FunctionName=function_name, InvocationType='Event',
+                                     Payload=json.dumps({'project_ids': project_ids}).encode('utf-8'))
+    except (BotoCoreError, ClientError) as e:
+        log.warning('Could not invalidate %d cached projects, cached responses expire with their TTL: %s',
+                    len(project_ids), e)
+        return {'flushed': False, 'invalidated': 0}
+    return {'flushed': False, 'invalidated': len(project_ids)}
+
+
+def invalidate_cached_projects(project_ids: list, opener=urlopen) -> list:
+    """
+    Requests GET API_URL/{project_id} of every project with ``Cache-Control: max-age=0``, signed with the
+    function's role, which must be allowed execute-api:InvalidateCache. API Gateway then drops the cached
+    response and caches the current one.
+
+    :param project_ids: ids of the changed projects
+    :param opener: urlopen, replaced in tests
+    :return: ids of the projects whose cached response could not be invalidated, they expire with their TTL
+    """
+    import botocore.session
+    from botocore.auth import SigV4Auth
+    from botocore.awsrequest import AWSRequest
+
+    api_url, api_id, region = os.getenv('API_URL', '').rstrip('/'), os.getenv('API_ID'), os.getenv('AWS_REGION')
+    credentials = botocore.session.get_session().get_credentials().get_frozen_credentials()
+
+    def invalidate(project_id):
+        request = AWSRequest(method='GET', url=f'{api_url}/{quote(project_id, safe="")}',
+                             headers={'Cache-Control': 'max-age=0', 'x-apigw-api-id': api_id})
+        SigV4Auth(credentials, 'execute-api', region).add_auth(request)
+        try:
+            with opener(Request(request.url, headers=dict(request.headers), method='GET'),
+                        timeout=STAGE_CACHE_TIMEOUT):
+                return True
+        except HTTPError as e:
+            # The error response of a deleted project replaces the cached project as well
+            if e.code < 500 and e.code not in (401, 403):
+                return True
+            log.warning('Could not invalidate the cached project %s: %s', project_id, e)
+        except (URLError, OSError) as e:
+            log.warning('Could not invalidate the cached project %s: %s', project_id, e)
+        return False
+
+    with ThreadPoolExecutor(max_workers=min(STAGE_CACHE_WORKERS, len(project_ids)) or 1) as executor:
+        results = list(executor.map(invalidate, project_ids))
+    return [project_id for project_id, invalidated in zip(project_ids, results) if not invalidated]
@@ -0,0 +1,92 @@
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BATCH_WRITE_SIZE = 25
+BATCH_GET_SIZE = 100
+BATCH_GET_WORKERS = int(os.getenv('DYNAMODB_BATCH_GET_WORKERS', 8))
+BATCH_MAX_ATTEMPTS = int(os.getenv('DYNAMODB_BATCH_MAX_ATTEMPTS', 5))
+BATCH_BASE_DELAY = float(os.getenv('DYNAMODB_BATCH_BASE_DELAY', 0.05))
+BATCH_MAX_DELAY = float(os.getenv('DYNAMODB_BATCH_MAX_DELAY', 2))
+
+
+def chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def backoff_delay(attempt: int, base_delay: float = BATCH_BASE_DELAY, max_delay: float = BATCH_MAX_DELAY) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def batch_write(client, table_name: str, write_requests: list, max_attempts: int = BATCH_MAX_ATTEMPTS,
+                sleep=time.sleep) -> list:
+    """
+    Writes PutRequest/DeleteRequest entries with BatchWriteItem in chunks of 25, retrying
+    UnprocessedItems with jittered exponential backoff
+
+    :param client: low-level DynamoDB client
+    :param table_name: table to write to
+    :param write_requests: BatchWriteItem request entries for table_name
+    :param max_attempts: attempts per chunk, including the first one
+    :param sleep: sleep function, replaced in tests and benchmarks
+    :return: write requests that were still unprocessed after the last attempt
+    """
+    unprocessed = []
+    for chunk in chunks(write_requests, BATCH_WRITE_SIZE):
+        pending = chunk
+        for attempt in range(max_attempts):
+            if attempt:
+                sleep(backoff_delay(attempt))
+            response = client.batch_write_item(RequestItems={table_name: pending})
+            pending = response.get('UnprocessedItems', {}).get(table_name, [])
+            if not pending:
+                break
+        unprocessed.extend(pending)
+    return unprocessed
+
+
+def _batch_get_chunk(client, table_name, keys, request_arguments, max_attempts, sleep):
+    items = []
+    pending = keys
+    for attempt in range(max_attempts):
+        if attempt:
+            sleep(backoff_delay(attempt))
+        response = client.batch_get_item(RequestItems={table_name: dict(request_arguments, Keys=pending)})
+        items.extend(response.get('Responses', {}).get(table_name, []))
+        pending = response.get('UnprocessedKeys', {}).get(table_name, {}).get('Keys', [])
+        if not pending:
+            break
+    return items, pending
+
+
+def batch_get(client, table_name: str, keys: list, max_attempts: int = BATCH_MAX_ATTEMPTS,
+              max_workers: int = BATCH_GET_WORKERS, sleep=time.sleep, **request_arguments):
+    """
+    Reads items with BatchGetItem in chunks of 100 keys, issuing the chunks in parallel and
+    retrying UnprocessedKeys with jittered exponential backoff
+
+    :param client: low-level DynamoDB client
+    :param table_name: table to read from
+    :param keys: unique item keys in AttributeValue form
+    :param max_attempts: attempts per chunk, including the first one
+    :param max_workers: number of chunks requested concurrently
+    :param sleep: sleep function, replaced in tests and benchmarks
+    :param request_arguments: ProjectionExpression, ExpressionAttributeNames, ConsistentRead
+    :return: tuple of (items, keys still unprocessed after the last attempt)
+    """
+    key_chunks = list(chunks(keys, BATCH_GET_SIZE))
+    if len(key_chunks) == 1:
+        return _batch_get_chunk(client, table_name, key_chunks[0], request_arguments, max_attempts, sleep)
+
+    items, unprocessed = [], []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(key_chunks)) or 1) as executor:
+        futures = [executor.submit(_batch_get_chunk, client, table_name, chunk, request_arguments, max_attempts, sleep)
+                   for chunk in key_chunks]
+        for future in futures:
+            chunk_items, chunk_unprocessed = future.result()
+            items.extend(chunk_items)
+            unprocessed.extend(chunk_unprocessed)
+    return items, unprocessed
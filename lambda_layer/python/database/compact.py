@@ -0,0 +1,117 @@
+"""
+Compact storage of project items, applied on write and undone on read so callers only see plain projects.
+
+- descriptions of at least DESCRIPTION_COMPRESS_MIN_BYTES are stored zlib compressed in the binary
+  attribute ``description_z`` instead of ``description``
+- on_project is stored as a string set instead of a list, an empty one is not stored at all and
+  reads back as an empty list
+
+Items written before either change are read unchanged. The entity_type partition key of the time
+ordered indexes is storage only and dropped on read.
+
+A deleted project is replaced by a tombstone, an item with only project_id, entity_type, updated_at,
+``deleted`` and the TTL attribute ``expires_at``, so changed_since queries of the updated-index return
+deletions. Every other read treats a tombstone as a missing project.
+"""
+import base64
+import os
+import zlib
+from database.serializer import deserialize_project
+
+DESCRIPTION_COMPRESS_MIN_BYTES = int(os.getenv('DESCRIPTION_COMPRESS_MIN_BYTES', 1024))
+DESCRIPTION_COMPRESS_LEVEL = int(os.getenv('DESCRIPTION_COMPRESS_LEVEL', 3))
+COMPRESSED_DESCRIPTION = 'description_z'
+DELETED = 'deleted'
+PARTITION_KEY = 'entity_type'
+
+
+def compress_description(description):
+    """
+    :return: compressed UTF-8 bytes of the description, None when it is short or does not get smaller
+    """
+    if not isinstance(description, str):
+        return None
+    raw = description.encode('utf-8')
+    if len(raw) < DESCRIPTION_COMPRESS_MIN_BYTES:
+        return None
+    compressed = zlib.compress(raw, DESCRIPTION_COMPRESS_LEVEL)
+    return compressed if len(compressed) < len(raw) else None
+
+
+def member_set(members):
+    """
+    :return: set of the names when on_project only holds non-empty strings, otherwise the value unchanged
+    """
+    if isinstance(members, (list, tuple, set)) and all(isinstance(member, str) and member for member in members):
+        return set(members)
+    return members
+
+
+def compact_changes(attributes: dict) -> tuple:
+    """
+    Turns project attributes into the stored ones
+
+    :param attributes: attribute names and values as the handlers pass them
+    :return: tuple of (dict of attributes to set, list of attribute names to remove)
+    """
+    stored = dict(attributes)
+    removed = []
+    if 'description' in stored:
+        compressed = compress_description(stored['description'])
+        if compressed is None:
+            removed.append(COMPRESSED_DESCRIPTION)
+        else:
+            stored[COMPRESSED_DESCRIPTION] = compressed
+            del stored['description']
+            removed.append('description')
+    if 'on_project' in stored:
+        stored['on_project'] = member_set(stored['on_project'])
+        # DynamoDB does not store empty sets
+        if stored['on_project'] == set():
+            del stored['on_project']
+            removed.append('on_project')
+    return stored, removed
+
+
+def compact_project(project: dict) -> dict:
+    """Stored form of a whole new project"""
+    return compact_changes(project)[0]
+
+
+def load_project(item: dict, fields=None) -> dict:
+    """
+    Deserializes a stored project item, low-level client or stream image, and undoes the compaction
+
+    :param item: DynamoDB AttributeValue map
+    :param fields: attribute names the item was read with, None for whole items
+    :return: project with the description as text and on_project as a list, an empty one when it was
+             read but is not stored
+    """
+    project = deserialize_project(item)
+    project.pop(PARTITION_KEY, None)
+    compressed = project.pop(COMPRESSED_DESCRIPTION, None)
+    if compressed is not None:
+        # Stream images carry binary attributes base64 encoded
+        if isinstance(compressed, str):
+            compressed = base64.b64decode(compressed)
+        project['description'] = zlib.decompress(compressed).decode('utf-8')
+    if (not fields or 'on_project' in fields) and not is_tombstone(project):
+        project.setdefault('on_project', [])
+    return project
+
+
+def is_tombstone(project: dict) -> bool:
+    """True for the loaded tombstone of a deleted project"""
+    return project.get(DELETED) is True
+
+
+def load_image(images: dict, name: str):
+    """
+    Loads the OldImage or NewImage of a stream record
+
+    :return: project, None when the record has no such image or it is a tombstone
+    """
+    if name not in images:
+        return None
+    project = load_project(images[name])
+    return None if is_tombstone(project) else project
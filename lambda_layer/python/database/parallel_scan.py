@@ -0,0 +1,104 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+DEFAULT_TOTAL_SEGMENTS = 4
+MAX_TOTAL_SEGMENTS = 64
+
+
+class ScanMemoryLimitExceeded(Exception):
+    """
+    Raised by :func:`parallel_scan` when the collected items grow past ``max_bytes``
+    """
+
+
+def approximate_item_size(value) -> int:
+    """
+    Rough in-memory size of an item, following DynamoDB item size rules closely enough
+    to enforce a memory ceiling. Works for resource (python) and client (AttributeValue) items.
+
+    :param value: item or attribute value
+    :return: approximate size in bytes
+    """
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, bool) or value is None:
+        return 1
+    if isinstance(value, (int, float, Decimal)):
+        return len(str(value))
+    if isinstance(value, dict):
+        return sum(len(key.encode('utf-8')) + approximate_item_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sum(approximate_item_size(item) for item in value)
+    return len(str(value))
+
+
+class _ScanBudget:
+    """Byte budget shared by all segment workers of one parallel scan"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self.exceeded = threading.Event()
+        self._lock = threading.Lock()
+
+    def consume(self, items):
+        if self.max_bytes is None:
+            return
+        page_bytes = sum(approximate_item_size(item) for item in items)
+        with self._lock:
+            self.used_bytes += page_bytes
+            if self.used_bytes > self.max_bytes:
+                self.exceeded.set()
+
+
+def _scan_segment(scan, segment, total_segments, budget, scan_arguments):
+    items = []
+    consumed_capacity = 0.0
+    arguments = dict(scan_arguments, Segment=segment, TotalSegments=total_segments)
+    while not budget.exceeded.is_set():
+        response = scan(**arguments)
+        items.extend(response['Items'])
+        consumed_capacity += response.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
+        budget.consume(response['Items'])
+        if 'LastEvaluatedKey' not in response:
+            break
+        arguments['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return items, consumed_capacity
+
+
+def parallel_scan(scan, total_segments: int = DEFAULT_TOTAL_SEGMENTS, max_bytes: int = None,
+                  max_workers: int = None, **scan_arguments) -> dict:
+    """
+    Reads a whole table with a DynamoDB parallel scan, one thread per segment.
+
+    Segment results are merged in segment order, and pages within a segment in the order
+    DynamoDB returned them, so repeated scans of an unchanged table return the same order.
+
+    :param scan: scan callable, either ``Table.scan`` or ``client.scan`` with ``TableName`` in scan_arguments
+    :param total_segments: number of segments (and worker threads unless max_workers is given)
+    :param max_bytes: memory ceiling for collected items, None for unlimited
+    :param max_workers: thread pool size, defaults to total_segments
+    :param scan_arguments: extra scan arguments (ProjectionExpression, ConsistentRead, ...)
+    :return: dict with ``Items``, ``Count`` and ``ConsumedCapacity`` keys
+    """
+    if not 1 <= total_segments <= MAX_TOTAL_SEGMENTS:
+        raise ValueError(f'total_segments must be between 1 and {MAX_TOTAL_SEGMENTS}')
+    if 'ReturnConsumedCapacity' not in scan_arguments:
+        scan_arguments['ReturnConsumedCapacity'] = 'TOTAL'
+
+    budget = _ScanBudget(max_bytes)
+    with ThreadPoolExecutor(max_workers=max_workers or total_segments) as executor:
+        futures = [executor.submit(_scan_segment, scan, segment, total_segments, budget, scan_arguments)
+                   for segment in range(total_segments)]
+        results = [future.result() for future in futures]
+
+    if budget.exceeded.is_set():
+        raise ScanMemoryLimitExceeded(f'Parallel scan exceeded the memory ceiling of {max_bytes} bytes')
+
+    items = [item for segment_items, _ in results for item in segment_items]
+    return {'Items': items,
+            'Count': len(items),
+            'ConsumedCapacity': sum(capacity for _, capacity in results)}
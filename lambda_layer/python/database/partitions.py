@@ -0,0 +1,27 @@
+"""
+Partition keys of the time ordered indexes (created-index, updated-index).
+
+Every project is written to one of INDEX_PARTITIONS partitions, ``project#<crc32 of project_id % INDEX_PARTITIONS>``,
+so writes are spread over several partitions of the index instead of all going to a single ``project`` one.
+Reads query every partition and merge the results in time order.
+
+Changing INDEX_PARTITIONS moves projects to other partitions, run scripts/backfill_timestamps.py afterwards.
+"""
+import zlib
+
+ENTITY_TYPE = 'project'
+INDEX_PARTITIONS = 10
+
+
+def index_partition(project_id: str) -> str:
+    """
+    :return: entity_type value of the project, the partition key of the time ordered indexes
+    """
+    return f'{ENTITY_TYPE}#{zlib.crc32(project_id.encode("utf-8")) % INDEX_PARTITIONS}'
+
+
+def index_partitions() -> list:
+    """
+    :return: entity_type values of all partitions
+    """
+    return [f'{ENTITY_TYPE}#{partition}' for partition in range(INDEX_PARTITIONS)]
@@ -0,0 +1,702 @@
+import base64
+import binascii
+import datetime
+import heapq
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from database.batch import batch_get, batch_write, chunks
+from database.compact import COMPRESSED_DESCRIPTION, DELETED, PARTITION_KEY, compact_changes, compact_project, \
+    is_tombstone, load_project
+from database.parallel_scan import parallel_scan
+from database.partitions import index_partition, index_partitions
+from database.serializer import serialize_item, serialize_value, deserialize_item
+from instrumentation.instrumentation import timed, timer
+from logger.metrics import metrics
+
+INSTRUMENTED_METHODS = {'get_item', 'put_item', 'update_item', 'delete_item', 'scan', 'query',
+                        'batch_get_item', 'batch_write_item', 'transact_get_items', 'transact_write_items'}
+PROJECT_ATTRIBUTES = ["project_id", "project_name", "description", "internal", "on_project", "version",
+                      "created_at", "updated_at"]
+CREATED_INDEX = 'created-index'
+UPDATED_INDEX = 'updated-index'
+INDEX_SORT_KEYS = {CREATED_INDEX: 'created_at', UPDATED_INDEX: 'updated_at'}
+# Tombstones of deleted projects expire after this many seconds, changed_since clients have to sync within it
+TOMBSTONE_TTL = int(os.getenv('PROJECT_TOMBSTONE_TTL', 30 * 24 * 60 * 60))
+# TransactWriteItems accepts at most 100 actions, larger membership changes are written outside a transaction
+TRANSACT_MAX_ITEMS = 100
+# Membership items deleted per transaction after a patch, each name adds a contains() to the condition check
+MEMBERSHIP_DELETE_CHUNK = 24
+
+
+def client_config():
+    """
+    Botocore configuration for the DynamoDB client, tunable through function environment variables
+
+    :return: botocore Config object
+    """
+    from botocore.config import Config
+
+    options = {
+        'max_pool_connections': int(os.getenv('DYNAMODB_MAX_POOL_CONNECTIONS', 50)),
+        'connect_timeout': float(os.getenv('DYNAMODB_CONNECT_TIMEOUT', 1)),
+        'read_timeout': float(os.getenv('DYNAMODB_READ_TIMEOUT', 3)),
+        'retries': {'mode': os.getenv('DYNAMODB_RETRY_MODE', 'standard'),
+                    'max_attempts': int(os.getenv('DYNAMODB_MAX_ATTEMPTS', 3))}
+    }
+    # tcp_keepalive is only understood by newer botocore versions than the one bundled with the Lambda runtime
+    if 'tcp_keepalive' in Config.OPTION_DEFAULTS:
+        options['tcp_keepalive'] = os.getenv('DYNAMODB_TCP_KEEPALIVE', 'true').lower() == 'true'
+    return Config(**options)
+
+
+def utc_timestamp(seconds: float = None) -> str:
+    """
+    ISO 8601 UTC timestamp with millisecond precision, e.g. 2022-09-30T12:00:00.000Z.
+    Timestamps in this format sort in time order as strings.
+
+    :param seconds: seconds since the epoch, now when omitted
+    :return: timestamp string
+    """
+    moment = datetime.datetime.fromtimestamp(time.time() if seconds is None else seconds, tz=datetime.timezone.utc)
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+def parse_timestamp(value: str) -> str:
+    """
+    Normalizes an ISO 8601 timestamp to the stored format, raises ValueError when it is invalid.
+    Timestamps without a time zone are taken as UTC.
+    """
+    try:
+        moment = datetime.datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f'Invalid timestamp: {value}, expected ISO 8601 e.g. 2022-09-30T12:00:00Z')
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=datetime.timezone.utc)
+    return utc_timestamp(moment.timestamp())
+
+
+def encode_next_token(last_evaluated_key):
+    """Turns DynamoDB LastEvaluatedKey into an opaque, url-safe pagination token"""
+    if not last_evaluated_key:
+        return None
+    raw = json.dumps(last_evaluated_key, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_next_token(next_token, key_names=('project_id',)):
+    """Turns a pagination token back into an ExclusiveStartKey, raises ValueError on a malformed token"""
+    try:
+        start_key = json.loads(base64.urlsafe_b64decode(next_token.encode('ascii')))
+    except (binascii.Error, UnicodeError, json.JSONDecodeError) as e:
+        raise ValueError(f'Invalid next_token: {e}')
+    if not isinstance(start_key, dict) or set(start_key) != set(key_names):
+        raise ValueError('Invalid next_token: unexpected key')
+    return start_key
+
+
+def decode_partition_token(next_token, partitions: int) -> list:
+    """Turns a pagination token of a partitioned index back into the position in every partition"""
+    try:
+        positions = json.loads(base64.urlsafe_b64decode(next_token.encode('ascii')))
+    except (binascii.Error, UnicodeError, json.JSONDecodeError) as e:
+        raise ValueError(f'Invalid next_token: {e}')
+    if not isinstance(positions, list) or len(positions) != partitions or not all(
+            position is None or position == [] or
+            (isinstance(position, list) and len(position) == 2 and all(isinstance(value, str) for value in position))
+            for position in positions):
+        raise ValueError('Invalid next_token: unexpected positions')
+    return positions
+
+
+def projection_arguments(fields) -> dict:
+    """
+    Builds ProjectionExpression arguments for a list of project attributes
+
+    :param fields: attribute names, None or empty for all attributes
+    :return: keyword arguments for scan/get_item/query
+    """
+    if not fields:
+        return {}
+    for field in fields:
+        if field not in PROJECT_ATTRIBUTES:
+            raise ValueError(f'Invalid fields: non-existent attribute {field}')
+    # Tombstones are recognized by the deleted attribute whatever the projection
+    fields = list(fields) + [DELETED]
+    if 'description' in fields:
+        fields.append(COMPRESSED_DESCRIPTION)
+    return {'ProjectionExpression': ', '.join(f'#{field}' for field in fields),
+            'ExpressionAttributeNames': {f'#{field}': field for field in fields}}
+
+
+class InstrumentedClient:
+    """
+    Wraps the low-level DynamoDB client so every data call asks for its consumed capacity
+    and reports capacity, latency, item count and payload size to the metrics emitter
+    """
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if name not in INSTRUMENTED_METHODS:
+            return attribute
+        operation = self._client.meta.method_to_api_mapping[name]
+
+        def call(**kwargs):
+            kwargs.setdefault('ReturnConsumedCapacity', 'TOTAL')
+            started = time.perf_counter()
+            response = attribute(**kwargs)
+            latency_ms = (time.perf_counter() - started) * 1000
+            metrics.record_dynamodb_call(operation, latency_ms, response)
+            timer.add('dynamodb', latency_ms)
+            return response
+
+        # Cache the wrapper so later lookups skip __getattr__
+        setattr(self, name, call)
+        return call
+
+
+def _key(project_id: str) -> dict:
+    return {'project_id': {'S': project_id}}
+
+
+def _membership_key(member: str, project_id: str) -> dict:
+    return {'member': {'S': member}, 'project_id': {'S': project_id}}
+
+
+class VersionConflict(Exception):
+    """Raised when a project does not have the version a conditional change expects"""
+
+
+def apply_version_condition(arguments: dict, version):
+    """
+    Makes update arguments conditional on the project still having the given version
+
+    :param arguments: UpdateItem arguments with ExpressionAttributeNames/Values, changed in place
+    :param version: expected version, None for projects written before versioning
+    """
+    arguments['ExpressionAttributeNames']['#version'] = 'version'
+    if version is None:
+        arguments['ConditionExpression'] = ('attribute_exists(project_id) AND attribute_not_exists(#version) AND '
+                                            'attribute_not_exists(#deleted)')
+        arguments['ExpressionAttributeNames']['#deleted'] = DELETED
+    else:
+        arguments['ConditionExpression'] = '#version = :expected'
+        arguments['ExpressionAttributeValues'][':expected'] = serialize_value(version)
+
+
+def scan_arguments(arguments: dict) -> dict:
+    """Adds the tombstone filter to Scan arguments"""
+    return dict(arguments, FilterExpression='attribute_not_exists(#deleted)',
+                ExpressionAttributeNames=dict(arguments.get('ExpressionAttributeNames', {}), **{'#deleted': DELETED}))
+
+
+def new_project_item(project: dict, now: str) -> dict:
+    """Adds the attributes set by the repository to a new project"""
+    return dict(project, version=1, entity_type=index_partition(project['project_id']), created_at=now, updated_at=now)
+
+
+def project_members(project: dict) -> set:
+    """
+    Names listed in the on_project attribute, each one has a membership item
+
+    :param project: project attributes
+    :return: set of non-empty member names
+    """
+    members = project.get('on_project')
+    if not isinstance(members, (list, set)):
+        return set()
+    return {member for member in members if isinstance(member, str) and member}
+
+
+def update_arguments(attributes: dict) -> dict:
+    """
+    Builds the UpdateItem arguments setting the given attributes in their stored form and incrementing the version
+
+    :param attributes: attribute names and their new values
+    :return: keyword arguments for update_item or a transaction Update action
+    """
+    attributes, removed = compact_changes(attributes)
+    return {
+        'UpdateExpression': 'SET ' + ', '.join(f'#{key} = :{key}' for key in attributes) +
+                            ', #version = if_not_exists(#version, :zero) + :one' +
+                            (' REMOVE ' + ', '.join(f'#{key}' for key in removed) if removed else ''),
+        'ExpressionAttributeNames': dict({f'#{key}': key for key in list(attributes) + removed},
+                                         **{'#version': 'version'}),
+        'ExpressionAttributeValues': dict({f':{key}': serialize_value(value) for key, value in attributes.items()},
+                                          **{':zero': {'N': '0'}, ':one': {'N': '1'}})
+    }
+
+
+class ProjectRepository:
+    """
+    Data access for project items. Owns a single, lazily created low-level DynamoDB client
+    shared by every invocation of the execution environment. boto3 itself is only imported
+    when the first request needs the client, which keeps it out of the function init phase.
+
+    Every name in a project's on_project list also has a (member, project_id) item in the
+    membership table, so the projects of a member are read with a Query instead of a Scan.
+    Membership items of a project that no longer exists are skipped when reading them.
+
+    Items are stored in the compact form of database.compact, every read returns plain projects.
+    Deleting a project leaves a tombstone, which only changed_since reads of the updated-index return.
+    """
+
+    def __init__(self, table_name: str = None, region_name: str = None, config=None,
+                 membership_table_name: str = None, client=None):
+        self.table_name = table_name or os.environ.get('DATABASE')
+        self.membership_table_name = membership_table_name or os.environ.get('MEMBERSHIP_DATABASE')
+        self.region_name = region_name or os.getenv('AWS_REGION')
+        self.endpoint_url = os.getenv('DYNAMODB_ENDPOINT_URL')
+        self.config = config
+        self._client = InstrumentedClient(client) if client is not None else None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+
+            self._client = InstrumentedClient(boto3.client('dynamodb', region_name=self.region_name,
+                                                           endpoint_url=self.endpoint_url,
+                                                           config=self.config or client_config()))
+        return self._client
+
+    def _membership_put(self, member: str, project_id: str) -> dict:
+        return {'Put': {'TableName': self.membership_table_name, 'Item': _membership_key(member, project_id)}}
+
+    def _membership_delete(self, member: str, project_id: str) -> dict:
+        return {'Delete': {'TableName': self.membership_table_name, 'Key': _membership_key(member, project_id)}}
+
+    def _write_project(self, action: dict, project_id: str, added=(), removed=()):
+        """
+        Writes a project Put or Update action together with the membership items of the added and removed names.
+        Changes that fit into one TransactWriteItems are written in one transaction. Larger ones write the
+        added membership items before the project and delete the removed ones after it, so an interrupted
+        write leaves extra membership items only, which reads skip.
+
+        :param action: transaction action of the project item, {'Put': {...}} or {'Update': {...}}
+        :param added: names whose membership items are written
+        :param removed: names whose membership items are deleted
+        """
+        added, removed = sorted(added), sorted(removed)
+        if 1 + len(added) + len(removed) <= TRANSACT_MAX_ITEMS:
+            self.client.transact_write_items(TransactItems=[action] +
+                                             [self._membership_put(member, project_id) for member in added] +
+                                             [self._membership_delete(member, project_id) for member in removed])
+            return
+        if added:
+            batch_write(self.client, self.membership_table_name,
+                        [{'PutRequest': {'Item': _membership_key(member, project_id)}} for member in added])
+        (operation, arguments), = action.items()
+        try:
+            if operation == 'Put':
+                self.client.put_item(**arguments)
+            else:
+                self.client.update_item(**arguments)
+        except self.client.exceptions.ConditionalCheckFailedException:
+            if added:
+                batch_write(self.client, self.membership_table_name,
+                            [{'DeleteRequest': {'Key': _membership_key(member, project_id)}} for member in added])
+            raise
+        if removed:
+            batch_write(self.client, self.membership_table_name,
+                        [{'DeleteRequest': {'Key': _membership_key(member, project_id)}} for member in removed])
+
+    def create(self, project: dict) -> dict:
+        """
+        Writes a new project together with its membership items
+
+        :return: the stored project
+        """
+        project = new_project_item(project, utc_timestamp())
+        members = project_members(project)
+        if not members:
+            self.client.put_item(TableName=self.table_name, Item=serialize_item(compact_project(project)))
+            return project
+        self._write_project({'Put': {'TableName': self.table_name, 'Item': serialize_item(compact_project(project)),
+                                     'ConditionExpression': 'attribute_not_exists(project_id)'}},
+                            project['project_id'], added=members)
+        return project
+
+    def batch_create(self, projects: list) -> set:
+        """
+        Writes many new projects with BatchWriteItem
+
+        :param projects: project items, each with a unique project_id
+        :return: project_ids that could not be written
+        """
+        # Membership items go first, those of projects that fail to be written are skipped on read
+        membership_requests = [{'PutRequest': {'Item': _membership_key(member, project['project_id'])}}
+                               for project in projects for member in sorted(project_members(project))]
+        if membership_requests:
+            batch_write(self.client, self.membership_table_name, membership_requests)
+        now = utc_timestamp()
+        write_requests = [{'PutRequest': {'Item': serialize_item(compact_project(new_project_item(project, now)))}}
+                          for project in projects]
+        unprocessed = batch_write(self.client, self.table_name, write_requests)
+        return {request['PutRequest']['Item']['project_id']['S'] for request in unprocessed}
+
+    def get(self, project_id: str, fields=None, consistent: bool = False):
+        response = self.client.get_item(TableName=self.table_name, Key=_key(project_id), ConsistentRead=consistent,
+                                        **projection_arguments(fields))
+        if 'Item' not in response:
+            return None
+        project = load_project(response['Item'], fields)
+        return None if is_tombstone(project) else project
+
+    def batch_get(self, project_ids: list, fields=None, consistent: bool = False):
+        """
+        Reads many projects with BatchGetItem
+
+        :param project_ids: project ids, duplicates are ignored
+        :param fields: attribute names to return, project_id is always included
+        :return: tuple of (dict of project_id => project, project_ids that could not be read)
+        """
+        if fields and 'project_id' not in fields:
+            fields = ['project_id'] + list(fields)
+        keys = [_key(project_id) for project_id in dict.fromkeys(project_ids)]
+        items, unprocessed = batch_get(self.client, self.table_name, keys, ConsistentRead=consistent,
+                                       **projection_arguments(fields))
+        projects = {}
+        with timed('deserialize'):
+            for item in items:
+                project = load_project(item, fields)
+                if not is_tombstone(project):
+                    projects[project['project_id']] = project
+        return projects, [key['project_id']['S'] for key in unprocessed]
+
+    def get_version(self, project_id: str):
+        """
+        Reads only the version attribute, which create and update change on every write
+
+        :return: version number, 0 for projects written before versioning, None when the project does not exist
+        """
+        response = self.client.get_item(TableName=self.table_name, Key=_key(project_id),
+                                        ProjectionExpression='#version, #deleted',
+                                        ExpressionAttributeNames={'#version': 'version', '#deleted': DELETED})
+        if 'Item' not in response:
+            return None
+        item = deserialize_item(response['Item'])
+        return None if is_tombstone(item) else item.get('version', 0)
+
+    def list_page(self, limit: int, next_token: str = None, fields=None, consistent: bool = False):
+        """
+        Reads one scan page
+
+        :return: tuple of (items, next_token), next_token is None on the last page
+        """
+        arguments = scan_arguments(dict(TableName=self.table_name, Limit=limit, ConsistentRead=consistent,
+                                        **projection_arguments(fields)))
+        if next_token:
+            arguments['ExclusiveStartKey'] = serialize_item(decode_next_token(next_token))
+        response = self.client.scan(**arguments)
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        with timed('deserialize'):
+            items = [load_project(item, fields) for item in response['Items']]
+        return items, encode_next_token(deserialize_item(last_evaluated_key) if last_evaluated_key else None)
+
+    def scan_all(self, total_segments: int, max_bytes: int = None, fields=None, consistent: bool = False) -> dict:
+        response = parallel_scan(self.client.scan, total_segments=total_segments, max_bytes=max_bytes,
+                                 **scan_arguments(dict(TableName=self.table_name, ConsistentRead=consistent,
+                                                       **projection_arguments(fields))))
+        with timed('deserialize'):
+            response['Items'] = [load_project(item, fields) for item in response['Items']]
+        return response
+
+    def update(self, project_id: str, attributes: dict):
+        """
+        Sets the given attributes and updated_at on an existing project and increments its version
+
+        :return: all attributes of the updated project, None when the project does not exist
+        """
+        attributes = dict(attributes, entity_type=index_partition(project_id), updated_at=utc_timestamp())
+        if 'on_project' in attributes:
+            return self._update_members(project_id, attributes)
+        arguments = update_arguments(attributes)
+        arguments['ExpressionAttributeNames']['#deleted'] = DELETED
+        try:
+            response = self.client.update_item(TableName=self.table_name, Key=_key(project_id),
+                                               ConditionExpression='attribute_exists(project_id) AND '
+                                                                   'attribute_not_exists(#deleted)',
+                                               ReturnValues='ALL_NEW', **arguments)
+        except self.client.exceptions.ConditionalCheckFailedException:
+            return None
+        return load_project(response['Attributes'])
+
+    def _update_members(self, project_id: str, attributes: dict):
+        """
+        Updates a project and its membership items, in one transaction when they fit. The update is
+        conditioned on the version that was read, a concurrent write makes it fail with
+        TransactionCanceledException or ConditionalCheckFailedException.
+        """
+        current = self.get(project_id, consistent=True)
+        if current is None:
+            return None
+        arguments = update_arguments(attributes)
+        apply_version_condition(arguments, current.get('version'))
+        old_members, new_members = project_members(current), project_members(attributes)
+        self._write_project({'Update': dict(arguments, TableName=self.table_name, Key=_key(project_id))}, project_id,
+                            added=new_members - old_members, removed=old_members - new_members)
+        project = dict(current, **attributes, version=current.get('version', 0) + 1)
+        project.pop(PARTITION_KEY)
+        return project
+
+    def _membership_unlisted_check(self, project_id: str, members: list) -> dict:
+        names = {f':member{index}': {'S': member} for index, member in enumerate(members)}
+        return {'ConditionCheck': {'TableName': self.table_name, 'Key': _key(project_id),
+                                   'ConditionExpression': ' AND '.join(f'NOT contains(#on_project, {name})'
+                                                                       for name in names),
+                                   'ExpressionAttributeNames': {'#on_project': 'on_project'},
+                                   'ExpressionAttributeValues': names}}
+
+    def _delete_unlisted_memberships(self, project_id: str, removed):
+        """
+        Deletes the membership items of names removed from on_project, each one only while the project does
+        not list the name. A concurrent patch adding the name again writes its membership item after adding
+        the name, so that item is either kept or written after the delete.
+        """
+        for chunk in chunks(sorted(removed), MEMBERSHIP_DELETE_CHUNK):
+            try:
+                self.client.transact_write_items(TransactItems=[self._membership_unlisted_check(project_id, chunk)] +
+                                                 [self._membership_delete(member, project_id) for member in chunk])
+            except self.client.exceptions.TransactionCanceledException:
+                # Some names are listed again, delete the membership items of the others one by one
+                for member in chunk:
+                    try:
+                        self.client.transact_write_items(TransactItems=[
+                            self._membership_unlisted_check(project_id, [member]),
+                            self._membership_delete(member, project_id)])
+                    except self.client.exceptions.TransactionCanceledException:
+                        pass
+
+    def patch_members(self, project_id: str, add_members=(), remove_members=(), expected_version: int = None):
+        """
+        Adds names to and removes names from on_project without the client sending the whole set.
+        Additions compile into ADD and removals into DELETE on the string set. Both commute with other
+        patches, so the update is conditioned on the version only when expected_version is given. The
+        membership items of added names are written after the update, those of removed names are
+        deleted while the project does not list them again, see _delete_unlisted_memberships.
+
+        Adding and removing names in one patch, and lists written before on_project became a set,
+        rewrite the whole set instead, see _rewrite_members.
+
+        :param add_members: names to add, names already on the project are kept
+        :param remove_members: names to remove, names not on the project are skipped
+        :param expected_version: raise VersionConflict unless the project has this version
+        :return: the updated attributes only (on_project, version, updated_at), empty when no names
+                 were given, None when the project does not exist
+        """
+        removed = set(remove_members)
+        added = set(add_members) - removed
+        if not added and not removed:
+            return {} if self.get_version(project_id) is not None else None
+        if added and removed:
+            # ADD and DELETE of the same set in one expression overlap
+            return self._rewrite_members(project_id, added, removed, expected_version)
+
+        operation, members = ('ADD', added) if added else ('DELETE', removed)
+        arguments = {'UpdateExpression': 'SET #version = if_not_exists(#version, :zero) + :one, #updated_at = :now '
+                                         f'{operation} #on_project :members',
+                     'ExpressionAttributeNames': {'#on_project': 'on_project', '#updated_at': 'updated_at',
+                                                  '#version': 'version'},
+                     'ExpressionAttributeValues': {':now': {'S': utc_timestamp()}, ':zero': {'N': '0'},
+                                                   ':one': {'N': '1'}, ':members': serialize_value(members),
+                                                   ':string_set': {'S': 'SS'}}}
+        if expected_version is None:
+            arguments['ConditionExpression'] = 'attribute_exists(project_id) AND attribute_not_exists(#deleted)'
+            arguments['ExpressionAttributeNames']['#deleted'] = DELETED
+        else:
+            apply_version_condition(arguments, expected_version or None)
+        # Lists written before on_project became a set can not take ADD or DELETE
+        arguments['ConditionExpression'] += (' AND (attribute_not_exists(#on_project) OR '
+                                             'attribute_type(#on_project, :string_set))')
+        try:
+            response = self.client.update_item(TableName=self.table_name, Key=_key(project_id),
+                                               ReturnValues='UPDATED_NEW', **arguments)
+        except self.client.exceptions.ConditionalCheckFailedException:
+            # Missing and deleted projects, version conflicts and lists are told apart by the rewrite
+            return self._rewrite_members(project_id, added, removed, expected_version)
+
+        if added:
+            batch_write(self.client, self.membership_table_name,
+                        [{'PutRequest': {'Item': _membership_key(member, project_id)}} for member in sorted(added)])
+        else:
+            self._delete_unlisted_memberships(project_id, removed)
+        return load_project(response['Attributes'], ['on_project', 'version', 'updated_at'])
+
+    def _rewrite_members(self, project_id: str, added: set, removed: set, expected_version: int = None):
+        """
+        Writes the whole new on_project value, conditioned on the version that was read and written
+        together with the membership items, see _write_project. Arguments and result as patch_members.
+        """
+        response = self.client.get_item(TableName=self.table_name, Key=_key(project_id), ConsistentRead=True,
+                                        ProjectionExpression='#on_project, #version, #deleted',
+                                        ExpressionAttributeNames={'#on_project': 'on_project', '#version': 'version',
+                                                                  '#deleted': DELETED})
+        if 'Item' not in response:
+            return None
+        current = load_project(response['Item'], ['on_project', 'version'])
+        if is_tombstone(current):
+            return None
+        version = current.get('version')
+        if expected_version is not None and expected_version != (version or 0):
+            raise VersionConflict(f'Project {project_id} has version {version or 0}, expected {expected_version}')
+
+        members = project_members(current)
+        added, removed = added - members, removed & members
+        new_members = (members | added) - removed
+        now = utc_timestamp()
+        arguments = {'ExpressionAttributeNames': {'#on_project': 'on_project', '#updated_at': 'updated_at'},
+                     'ExpressionAttributeValues': {':now': {'S': now}, ':zero': {'N': '0'}, ':one': {'N': '1'}}}
+        expression = 'SET #version = if_not_exists(#version, :zero) + :one, #updated_at = :now'
+        if new_members:
+            expression += ', #on_project = :on_project'
+            arguments['ExpressionAttributeValues'][':on_project'] = serialize_value(new_members)
+        else:
+            expression += ' REMOVE #on_project'
+        arguments['UpdateExpression'] = expression
+        apply_version_condition(arguments, version)
+
+        self._write_project({'Update': dict(arguments, TableName=self.table_name, Key=_key(project_id))}, project_id,
+                            added=added, removed=removed)
+        return {'on_project': sorted(new_members), 'version': (version or 0) + 1, 'updated_at': now}
+
+    def delete(self, project_id: str):
+        """
+        Replaces a project with its tombstone, then deletes the membership items listed in its last on_project value.
+        Deleting a project that does not exist writes nothing.
+        """
+        tombstone = {'project_id': project_id, 'entity_type': index_partition(project_id), 'updated_at': utc_timestamp(),
+                     DELETED: True, 'expires_at': int(time.time()) + TOMBSTONE_TTL}
+        try:
+            response = self.client.put_item(TableName=self.table_name, Item=serialize_item(tombstone),
+                                            ConditionExpression='attribute_exists(project_id) AND '
+                                                                'attribute_not_exists(#deleted)',
+                                            ExpressionAttributeNames={'#deleted': DELETED}, ReturnValues='ALL_OLD')
+        except self.client.exceptions.ConditionalCheckFailedException:
+            return
+        members = project_members(deserialize_item(response.get('Attributes', {})))
+        if members:
+            batch_write(self.client, self.membership_table_name,
+                        [{'DeleteRequest': {'Key': _membership_key(member, project_id)}} for member in sorted(members)])
+
+    def _query_partition(self, query_arguments: dict, partition: str, start_key):
+        query_arguments = dict(query_arguments, ExpressionAttributeValues=dict(
+            query_arguments['ExpressionAttributeValues'], **{':entity_type': {'S': partition}}))
+        if start_key:
+            query_arguments['ExclusiveStartKey'] = start_key
+        return self.client.query(**query_arguments)
+
+    def list_sorted_page(self, index_name: str, limit: int, next_token: str = None, fields=None,
+                         ascending: bool = True, since: str = None):
+        """
+        Reads one page of projects in created_at or updated_at order from a time ordered index. Every
+        partition of the index (database.partitions) is queried in parallel for up to ``limit`` projects,
+        the results are merged and the first ``limit`` of them returned. The next_token holds the position
+        reached in every partition.
+
+        Tombstones of deleted projects have no created_at, the created-index never returns them. The
+        updated-index returns them as {"project_id": ..., "deleted": true, "updated_at": ...}.
+
+        :param index_name: CREATED_INDEX or UPDATED_INDEX
+        :param ascending: oldest first when True, newest first otherwise
+        :param since: only projects with a sort key later than this timestamp
+        :return: tuple of (items, next_token), next_token is None on the last page
+        """
+        sort_key = INDEX_SORT_KEYS[index_name]
+        partitions = index_partitions()
+        # Position in each partition: None before its first item, [] after its last one,
+        # otherwise the sort key and project_id of the last item read from it
+        positions = decode_partition_token(next_token, len(partitions)) if next_token else [None] * len(partitions)
+
+        # The sort key and project_id are needed to merge the partitions and to continue each of them
+        read_fields = list(dict.fromkeys(list(fields) + [sort_key, 'project_id'])) if fields else fields
+        query_arguments = dict(TableName=self.table_name, IndexName=index_name, Limit=limit,
+                               ScanIndexForward=ascending, **projection_arguments(read_fields))
+        query_arguments['KeyConditionExpression'] = '#entity_type = :entity_type'
+        query_arguments.setdefault('ExpressionAttributeNames', {})['#entity_type'] = 'entity_type'
+        query_arguments['ExpressionAttributeValues'] = {}
+        if since:
+            query_arguments['KeyConditionExpression'] += f' AND #{sort_key} > :since'
+            query_arguments['ExpressionAttributeNames'][f'#{sort_key}'] = sort_key
+            query_arguments['ExpressionAttributeValues'][':since'] = {'S': since}
+
+        pending = [index for index, position in enumerate(positions) if position != []]
+        start_keys = [{'entity_type': {'S': partitions[index]}, sort_key: {'S': positions[index][0]},
+                       'project_id': {'S': positions[index][1]}} if positions[index] else None for index in pending]
+        with ThreadPoolExecutor(max_workers=max(len(pending), 1)) as executor:
+            responses = dict(zip(pending, executor.map(self._query_partition, [query_arguments] * len(pending),
+                                                       [partitions[index] for index in pending], start_keys)))
+
+        with timed('deserialize'):
+            # heapq.merge keeps the order of each partition, so ties of the sort key keep DynamoDB's order
+            merged = heapq.merge(*[[(index, load_project(item, read_fields)) for item in response['Items']]
+                                   for index, response in responses.items()],
+                                 key=lambda entry: entry[1][sort_key], reverse=not ascending)
+            # A partition that returned fewer items than the limit, e.g. because its response reached 1 MB,
+            # has more items after its LastEvaluatedKey, the page must not pass it
+            bounds = [response['LastEvaluatedKey'][sort_key]['S'] for response in responses.values()
+                      if 'LastEvaluatedKey' in response]
+            bound = (min(bounds) if ascending else max(bounds)) if bounds else None
+            page, taken = [], dict.fromkeys(responses, 0)
+            for index, project in merged:
+                if len(page) == limit or bound is not None and (project[sort_key] > bound if ascending
+                                                                else project[sort_key] < bound):
+                    break
+                positions[index] = [project[sort_key], project['project_id']]
+                taken[index] += 1
+                page.append(project)
+        for index, response in responses.items():
+            if 'LastEvaluatedKey' not in response and taken[index] == len(response['Items']):
+                positions[index] = []
+        if read_fields is not fields:
+            for project in page:
+                for field in set(read_fields) - set(fields):
+                    project.pop(field, None)
+        return page, encode_next_token(positions) if any(position != [] for position in positions) else None
+
+    def list_member_page(self, member: str, limit: int, next_token: str = None, fields=None,
+                         consistent: bool = False):
+        """
+        Reads one page of the projects a member works on, with a Query on the membership table
+        followed by a BatchGetItem of the projects. Projects that no longer list the member are skipped.
+
+        :return: tuple of (projects in project_id order, next_token, project_ids that could not be read)
+        """
+        query_arguments = dict(TableName=self.membership_table_name, Limit=limit, ConsistentRead=consistent,
+                               KeyConditionExpression='#member = :member',
+                               ExpressionAttributeNames={'#member': 'member'},
+                               ExpressionAttributeValues={':member': {'S': member}})
+        if next_token:
+            query_arguments['ExclusiveStartKey'] = serialize_item(
+                decode_next_token(next_token, key_names=('member', 'project_id')))
+        response = self.client.query(**query_arguments)
+        project_ids = [item['project_id']['S'] for item in response['Items']]
+        read_fields = list(fields) + ['on_project'] if fields and 'on_project' not in fields else fields
+        projects, unprocessed = self.batch_get(project_ids, fields=read_fields, consistent=consistent) \
+            if project_ids else ({}, [])
+        page = [projects[project_id] for project_id in project_ids
+                if project_id in projects and member in project_members(projects[project_id])]
+        if read_fields is not fields:
+            for project in page:
+                project.pop('on_project', None)
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        return (page,
+                encode_next_token(deserialize_item(last_evaluated_key) if last_evaluated_key else None),
+                unprocessed)
+
+
+_repository = None
+
+
+def get_repository() -> ProjectRepository:
+    """
+    Returns the repository shared by all invocations, creating it on first use
+    """
+    global _repository
+    if _repository is None:
+        _repository = ProjectRepository()
+    return _repository
@@ -0,0 +1,157 @@
+import os
+import random
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from database.batch import batch_get
+from database.repository import TRANSACT_MAX_ITEMS, get_repository, project_members
+
+# Summary counters are split over this many items, each update goes to a random one
+STATS_SHARDS = int(os.getenv('STATS_SHARDS', 10))
+# Member counters are spread over this many partitions by a hash of the member name
+STATS_MEMBER_PARTITIONS = int(os.getenv('STATS_MEMBER_PARTITIONS', 10))
+# Batch markers are kept this long, stream records are retried for at most a day
+STATS_MARKER_TTL = 24 * 60 * 60
+SUMMARY_COUNTERS = ('total', 'internal', 'external')
+
+
+def summary_counts(project) -> dict:
+    """Contribution of one project to the summary counters, all zero for None"""
+    if not project:
+        return dict.fromkeys(SUMMARY_COUNTERS, 0)
+    internal = project.get('internal') is True
+    return {'total': 1, 'internal': int(internal), 'external': int(not internal)}
+
+
+def member_partition(member: str) -> str:
+    return f'members#{zlib.crc32(member.encode("utf-8")) % STATS_MEMBER_PARTITIONS}'
+
+
+def stats_changes(changes) -> tuple:
+    """
+    Adds up the counter changes of a sequence of project changes
+
+    :param changes: iterable of (old project or None, new project or None)
+    :return: tuple of (dict of summary counter => delta, dict of member => delta), zero deltas left out
+    """
+    summary = dict.fromkeys(SUMMARY_COUNTERS, 0)
+    members = {}
+    for old_project, new_project in changes:
+        old_counts, new_counts = summary_counts(old_project), summary_counts(new_project)
+        for counter in SUMMARY_COUNTERS:
+            summary[counter] += new_counts[counter] - old_counts[counter]
+        old_members = project_members(old_project) if old_project else set()
+        new_members = project_members(new_project) if new_project else set()
+        for member in new_members - old_members:
+            members[member] = members.get(member, 0) + 1
+        for member in old_members - new_members:
+            members[member] = members.get(member, 0) - 1
+    return ({counter: delta for counter, delta in summary.items() if delta},
+            {member: delta for member, delta in members.items() if delta})
+
+
+class ProjectStats:
+    """
+    Project counters maintained incrementally from the projects table stream.
+
+    Items of the stats table, partition key ``counter`` and sort key ``key``:
+    - ``summary#<shard>``: total, internal and external project counts, STATS_SHARDS items
+      whose sum is the real count, so write bursts are spread over several partitions
+    - ``members#<partition>``: one item per member (sort key) with its project count
+    - ``batch#...``: markers of applied stream batches, written in the same transaction as the
+      counters so a retried batch is not counted twice, removed by TTL
+    """
+
+    def __init__(self, client, table_name: str = None):
+        self.client = client
+        self.table_name = table_name or os.environ.get('STATS_DATABASE')
+
+    def _add_action(self, counter: str, key: str, deltas: dict) -> dict:
+        return {'Update': {'TableName': self.table_name,
+                           'Key': {'counter': {'S': counter}, 'key': {'S': key}},
+                           'UpdateExpression': 'ADD ' + ', '.join(f'#{name} :{name}' for name in deltas),
+                           'ExpressionAttributeNames': {f'#{name}': name for name in deltas},
+                           'ExpressionAttributeValues': {f':{name}': {'N': str(delta)}
+                                                         for name, delta in deltas.items()}}}
+
+    def apply(self, batch_id: str, summary: dict, members: dict) -> bool:
+        """
+        Applies counter changes once per batch_id, in transactions of at most 100 actions
+
+        :param batch_id: identifies the stream batch, e.g. its first and last sequence numbers
+        :param summary: dict of summary counter => delta
+        :param members: dict of member => delta
+        :return: False when every part of the batch had already been applied, True otherwise,
+                 also for a batch without counter changes, which writes nothing
+        """
+        if not summary and not members:
+            return True
+        actions = []
+        if summary:
+            actions.append(self._add_action(f'summary#{random.randrange(STATS_SHARDS)}', '-', summary))
+        actions.extend(self._add_action(member_partition(member), member, {'projects': delta})
+                       for member, delta in sorted(members.items()))
+        applied = False
+        part_size = TRANSACT_MAX_ITEMS - 1
+        for part, start in enumerate(range(0, len(actions), part_size)):
+            marker = {'Put': {'TableName': self.table_name,
+                              'Item': {'counter': {'S': f'batch#{batch_id}#{part}'}, 'key': {'S': '-'},
+                                       'expires_at': {'N': str(int(time.time()) + STATS_MARKER_TTL)}},
+                              'ConditionExpression': 'attribute_not_exists(#counter)',
+                              'ExpressionAttributeNames': {'#counter': 'counter'}}}
+            try:
+                self.client.transact_write_items(TransactItems=[marker] + actions[start:start + part_size])
+                applied = True
+            except self.client.exceptions.TransactionCanceledException as e:
+                reasons = e.response.get('CancellationReasons') or [{}]
+                if reasons[0].get('Code') != 'ConditionalCheckFailed':
+                    raise
+        return applied
+
+    def summary(self) -> dict:
+        """Sums the summary counter shards, read with one BatchGetItem"""
+        keys = [{'counter': {'S': f'summary#{shard}'}, 'key': {'S': '-'}} for shard in range(STATS_SHARDS)]
+        items, unprocessed = batch_get(self.client, self.table_name, keys)
+        if unprocessed:
+            raise RuntimeError(f'{len(unprocessed)} stats shards could not be read')
+        return {counter: sum(int(item[counter]['N']) for item in items if counter in item)
+                for counter in SUMMARY_COUNTERS}
+
+    def member(self, member: str) -> int:
+        response = self.client.get_item(TableName=self.table_name,
+                                        Key={'counter': {'S': member_partition(member)}, 'key': {'S': member}})
+        return int(response.get('Item', {}).get('projects', {}).get('N', 0))
+
+    def _member_partition(self, partition: int) -> dict:
+        query_arguments = dict(TableName=self.table_name, KeyConditionExpression='#counter = :counter',
+                               ExpressionAttributeNames={'#counter': 'counter'},
+                               ExpressionAttributeValues={':counter': {'S': f'members#{partition}'}})
+        counts = {}
+        while True:
+            response = self.client.query(**query_arguments)
+            counts.update({item['key']['S']: int(item['projects']['N']) for item in response['Items']
+                           if int(item.get('projects', {}).get('N', 0)) > 0})
+            if 'LastEvaluatedKey' not in response:
+                return counts
+            query_arguments['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def members(self) -> dict:
+        """Project count of every member with at least one project, the member partitions are queried in parallel"""
+        counts = {}
+        with ThreadPoolExecutor(max_workers=STATS_MEMBER_PARTITIONS) as executor:
+            for partition_counts in executor.map(self._member_partition, range(STATS_MEMBER_PARTITIONS)):
+                counts.update(partition_counts)
+        return dict(sorted(counts.items()))
+
+
+_project_stats = None
+
+
+def get_project_stats() -> ProjectStats:
+    """
+    Returns the stats shared by all invocations, using the repository's DynamoDB client
+    """
+    global _project_stats
+    if _project_stats is None:
+        _project_stats = ProjectStats(get_repository().client)
+    return _project_stats
@@ -0,0 +1,115 @@
+import functools
+import json
+from botocore.exceptions import ClientError
+from logger.logger import log
+
+
+class ApiError(Exception):
+    """
+    Base class for errors returned to API callers.
+
+    The exception message is a single line of JSON starting with the HTTP status, e.g.
+    ``{"status": 404, "error": "NotFound", "message": "..."}``. The REST API integration
+    responses select the status code by matching ``{"status": <code>,`` against it.
+    """
+    status_code = 500
+    error = 'InternalServerError'
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+    def __str__(self):
+        return json.dumps({'status': self.status_code, 'error': self.error, 'message': self.message})
+
+
+class BadRequestError(ApiError):
+    status_code = 400
+    error = 'BadRequest'
+
+
+class NotFoundError(ApiError):
+    status_code = 404
+    error = 'NotFound'
+
+
+class ConflictError(ApiError):
+    status_code = 409
+    error = 'Conflict'
+
+
+class PayloadTooLargeError(ApiError):
+    status_code = 413
+    error = 'PayloadTooLarge'
+
+
+class TooManyRequestsError(ApiError):
+    status_code = 429
+    error = 'TooManyRequests'
+
+
+class InternalServerError(ApiError):
+    status_code = 500
+    error = 'InternalServerError'
+
+
+class ServiceUnavailableError(ApiError):
+    status_code = 503
+    error = 'ServiceUnavailable'
+
+
+ERROR_STATUS_CODES = [400, 404, 409, 413, 429, 500, 503]
+
+CLIENT_ERRORS = {
+    'ConditionalCheckFailedException': ConflictError,
+    'TransactionConflictException': ConflictError,
+    'TransactionCanceledException': ConflictError,
+    'ValidationException': BadRequestError,
+    'ProvisionedThroughputExceededException': TooManyRequestsError,
+    'ThrottlingException': TooManyRequestsError,
+    'RequestLimitExceeded': TooManyRequestsError,
+    'InternalServerError': ServiceUnavailableError,
+    'ServiceUnavailable': ServiceUnavailableError,
+}
+
+
+def from_client_error(e: ClientError) -> ApiError:
+    """
+    Maps a botocore ClientError to the matching API error
+
+    :param e: error raised by a DynamoDB call
+    :return: API error object
+    """
+    code = e.response.get('Error', {}).get('Code', '')
+    error_class = CLIENT_ERRORS.get(code, InternalServerError)
+    if error_class is InternalServerError:
+        return error_class('Internal server error')
+    return error_class(e.response.get('Error', {}).get('Message') or code)
+
+
+def handle_errors(handler):
+    """
+    Handler decorator that turns every failure into an :class:`ApiError`.
+
+    Raising from the handler reports the error to API Gateway while keeping the
+    execution environment alive for the next request.
+    """
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        try:
+            return handler(event, context)
+        except ApiError as e:
+            if e.status_code >= 500:
+                log.error('Error: %s', e)
+            else:
+                log.warning('Error: %s', e)
+            raise
+        except ClientError as e:
+            log.error('Error: %s', e)
+            raise from_client_error(e) from None
+        except Exception:
+            log.exception('Unhandled error')
+            raise InternalServerError('Internal server error') from None
+
+    return wrapper
@@ -0,0 +1,150 @@
+import contextlib
+import functools
+import io
+import os
+import random
+import threading
+import time
+from logger.logger import log
+from logger.metrics import metrics
+
+# cprofile or tracemalloc, profiling is off when empty
+PROFILER = os.getenv('PROFILER', '').lower()
+PROFILER_SAMPLE_RATE = float(os.getenv('PROFILER_SAMPLE_RATE', 0.01))
+PROFILER_TOP_N = int(os.getenv('PROFILER_TOP_N', 20))
+
+_module_loaded = time.perf_counter()
+# One per execution environment, also when a router calls several instrumented handlers
+_cold_start = True
+
+
+def end_cold_start() -> bool:
+    """
+    Marks the execution environment as warm
+
+    :return: True for the first call in the execution environment
+    """
+    global _cold_start
+    cold_start, _cold_start = _cold_start, False
+    return cold_start
+
+
+def process_age_ms():
+    """
+    Milliseconds since the process started, read from /proc
+
+    :return: process age, None where /proc is not available
+    """
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return (uptime - start_ticks / os.sysconf('SC_CLK_TCK')) * 1000
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class PhaseTimer:
+    """
+    Adds up the time spent in each named phase of one invocation. Phases timed from several
+    threads at once, e.g. parallel DynamoDB calls, add up to more than the wall time.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, duration_ms: float):
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0) + duration_ms
+
+    def reset(self):
+        with self._lock:
+            phases, self.phases = self.phases, {}
+        return phases
+
+
+timer: PhaseTimer = PhaseTimer()
+
+
+@contextlib.contextmanager
+def timed(phase: str):
+    """
+    Context manager (or function decorator) adding its duration to ``phase``
+
+    :param phase: phase name, e.g. parse
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(phase, (time.perf_counter() - started) * 1000)
+
+
+def _profile_cprofile(handler, event, context):
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(handler, event, context)
+    finally:
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(PROFILER_TOP_N)
+        log.warning('cProfile of invocation %s, top %d functions by cumulative time:\n%s',
+                    getattr(context, 'aws_request_id', None), PROFILER_TOP_N, output.getvalue())
+
+
+def _profile_tracemalloc(handler, event, context):
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        return handler(event, context)
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        top = snapshot.statistics('lineno')[:PROFILER_TOP_N]
+        log.warning('tracemalloc of invocation %s, current %d B, peak %d B, top %d allocations:\n%s',
+                    getattr(context, 'aws_request_id', None), current, peak, PROFILER_TOP_N,
+                    '\n'.join(str(statistic) for statistic in top))
+
+
+PROFILERS = {'cprofile': _profile_cprofile, 'tracemalloc': _profile_tracemalloc}
+
+
+def instrument(handler):
+    """
+    Handler decorator reporting cold starts, the init duration and the time spent in each
+    phase as metrics, and profiling a sample of invocations when ``PROFILER`` is set.
+    Apply it below :meth:`MetricsEmitter.log_metrics` so its metrics are flushed with the rest.
+    """
+    # Decorators run when the handler module is imported, i.e. at the end of the init phase
+    age_ms = process_age_ms()
+    init_duration_ms = age_ms if age_ms is not None else (time.perf_counter() - _module_loaded) * 1000
+    profile = PROFILERS.get(PROFILER)
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        cold_start = end_cold_start()
+        timer.reset()
+        started = time.perf_counter()
+        try:
+            if profile is not None and random.random() < PROFILER_SAMPLE_RATE:
+                return profile(handler, event, context)
+            return handler(event, context)
+        finally:
+            total_ms = (time.perf_counter() - started) * 1000
+            phases = timer.reset()
+            for phase, duration_ms in phases.items():
+                metrics.put_metric('Latency', round(duration_ms, 3), 'Milliseconds', f'phase:{phase}')
+            if cold_start:
+                metrics.put_metric('ColdStart', 1, 'Count', 'Invocation')
+                metrics.put_metric('InitDuration', round(init_duration_ms, 3), 'Milliseconds', 'Invocation')
+            log.info('Invocation timings: cold_start=%s init_ms=%s total_ms=%.3f phases=%s',
+                     cold_start, round(init_duration_ms, 3) if cold_start else None, total_ms,
+                     {phase: round(duration_ms, 3) for phase, duration_ms in phases.items()})
+
+    return wrapper
@@ -1,7 +1,13 @@
+import atexit
+import functools
 import logging
 import os
+import random
 import sys
-from pythonjsonlogger import jsonlogger
+import time
+import zlib
+from logging.handlers import QueueHandler, QueueListener
+from queue import Queue
 
 
 class LogFilter(logging.Filter):
@@ -13,20 +19,186 @@ class LogFilter(logging.Filter):
         return rec.levelno in (logging.DEBUG, logging.INFO, logging.WARNING)
 
 
-class JsonFormatterWrapper(jsonlogger.JsonFormatter):
-    def add_fields(self, log_record, record, message):
-        super(JsonFormatterWrapper, self).add_fields(log_record, record, message)
+def json_formatter(fmt: str) -> logging.Formatter:
+    """
+    Builds the JSON formatter, importing ``pythonjsonlogger`` only when it is first needed
+
+    :param fmt: log record format
+    :return: formatter object
+    """
+    from pythonjsonlogger import jsonlogger
+
+    lambda_fields = {}
+    if 'AWS_LAMBDA_FUNCTION_NAME' in os.environ:
+        lambda_fields = {'awsService': "aws:lambda",
+                         'awsFunctionName': os.environ['AWS_LAMBDA_FUNCTION_NAME']}
+
+    class JsonFormatterWrapper(jsonlogger.JsonFormatter):
+        def add_fields(self, log_record, record, message):
+            super(JsonFormatterWrapper, self).add_fields(log_record, record, message)
+            log_record.update(lambda_fields)
+
+    return JsonFormatterWrapper(fmt)
+
+
+class LazyJsonFormatter(logging.Formatter):
+    """
+    Keeps the JSON formatter (and its imports) out of the function init phase,
+    it is built when the first record is formatted
+    """
+
+    def __init__(self, fmt: str):
+        super().__init__()
+        self.fmt = fmt
+        self._formatter = None
+
+    def format(self, record):
+        if self._formatter is None:
+            self._formatter = json_formatter(self.fmt)
+        return self._formatter.format(record)
+
+
+class FastJsonFormatter(logging.Formatter):
+    """
+    Compact JSON formatter for the ``fast`` logger mode. Writes the same fields as the default
+    formatter from a fixed field list, with orjson when it is installed and a precompiled
+    json encoder otherwise.
+    """
+
+    def __init__(self):
+        super().__init__()
+        try:
+            import orjson
+
+            self._dumps = lambda entry: orjson.dumps(entry, default=str).decode('utf-8')
+        except ImportError:
+            import json
+
+            self._dumps = json.JSONEncoder(separators=(',', ':'), default=str, ensure_ascii=False).encode
+        self.lambda_fields = {}
         if 'AWS_LAMBDA_FUNCTION_NAME' in os.environ:
-            log_record['awsService'] = "aws:lambda"
-            log_record['awsFunctionName'] = os.environ['AWS_LAMBDA_FUNCTION_NAME']
+            self.lambda_fields = {'awsService': "aws:lambda",
+                                  'awsFunctionName': os.environ['AWS_LAMBDA_FUNCTION_NAME']}
+        self._second = None
+        self._second_text = ''
+
+    def _asctime(self, created: float) -> str:
+        second = int(created)
+        if second != self._second:
+            self._second = second
+            self._second_text = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second))
+        return f'{self._second_text},{int((created - second) * 1000):03d}'
+
+    def format(self, record):
+        entry = {'levelname': record.levelname,
+                 'asctime': self._asctime(record.created),
+                 'filename': record.filename,
+                 'funcName': record.funcName,
+                 'lineno': record.lineno,
+                 'message': record.getMessage()}
+        if record.exc_info:
+            entry['exc_info'] = record.exc_text or self.formatException(record.exc_info)
+        if self.lambda_fields:
+            entry.update(self.lambda_fields)
+        return self._dumps(entry)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Puts records on the queue without formatting them, the message is built by the
+    :class:`QueueListener` thread. Log arguments must therefore not be mutated after logging.
+    """
+
+    def prepare(self, record):
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        return record
+
+
+class SampledLevelFilter(logging.Filter):
+    """
+    Chooses the logger level once per invocation. A ``sample_rate`` share of invocations, picked
+    by request id, logs at ``sampled_level`` and the rest at ``base_level``. Once an error is
+    logged the level drops to ``sampled_level`` for the rest of the invocation.
+    """
+
+    def __init__(self, logger: logging.Logger, base_level: int, sampled_level: int, sample_rate: float):
+        super().__init__()
+        self.logger = logger
+        self.base_level = base_level
+        self.sampled_level = sampled_level
+        self.sample_rate = sample_rate
+
+    def is_sampled(self, request_id: str = None) -> bool:
+        """
+        The same request id is always either sampled or not, so retries log the same way
+
+        :param request_id: Lambda request id, a random draw is used without one
+        :return: True if the invocation logs at the sampled level
+        """
+        if self.sample_rate <= 0:
+            return False
+        if self.sample_rate >= 1:
+            return True
+        if not request_id:
+            return random.random() < self.sample_rate
+        return zlib.crc32(request_id.encode('utf-8')) / 0xFFFFFFFF < self.sample_rate
+
+    def start_invocation(self, request_id: str = None):
+        sampled = self.is_sampled(request_id)
+        self.logger.setLevel(self.sampled_level if sampled else self.base_level)
+        if sampled:
+            self.logger.debug('Invocation %s sampled for %s logging', request_id,
+                              logging.getLevelName(self.sampled_level))
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR and self.logger.level > self.sampled_level:
+            self.logger.setLevel(self.sampled_level)
+        return True
+
+
+_log_queue = None
+_level_filter = None
+
+
+def flush_logs():
+    """
+    Waits until the background writer has written every queued record. Call it before the
+    invocation returns, since the execution environment is frozen right after.
+    """
+    if _log_queue is not None:
+        _log_queue.join()
+
+
+def log_invocation(handler):
+    """
+    Handler decorator picking the log level of the invocation when sampling is enabled
+    and flushing the log queue at the end of every invocation
+    """
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        if _level_filter is not None:
+            _level_filter.start_invocation(getattr(context, 'aws_request_id', None))
+        try:
+            return handler(event, context)
+        finally:
+            flush_logs()
+
+    return wrapper
 
 
 def initialize_logger() -> logging.Logger:
     """
-    Log initialization
+    Log initialization. With ``LOGGER_MODE=fast`` records are formatted by :class:`FastJsonFormatter`
+    and written by a background thread, the calling thread only puts them on a queue.
+
+    Setting ``LOGGER_SAMPLE_RATE`` (0 to 1) logs that share of invocations at ``LOGGER_SAMPLED_LVL``
+    (*Default: DEBUG*) and the rest at ``LOGGER_LVL``, see :class:`SampledLevelFilter`.
 
     :return: logger object
     """
+    global _log_queue, _level_filter
 
     levels = {'DEBUG': logging.DEBUG,
               'INFO': logging.INFO,
@@ -36,8 +208,12 @@ def initialize_logger() -> logging.Logger:
     log_level = levels[os.getenv('LOGGER_LVL', 'INFO').upper()]
     logger = logging.getLogger()
 
-    formatter = JsonFormatterWrapper(
-        "%(levelname)s\n%(asctime)s\n%(filename)s\n%(funcName)s\n%(lineno)d\n%(message)s\n")
+    fast_mode = os.getenv('LOGGER_MODE', 'default').lower() == 'fast'
+    if fast_mode:
+        formatter = FastJsonFormatter()
+    else:
+        formatter = LazyJsonFormatter(
+            "%(levelname)s\n%(asctime)s\n%(filename)s\n%(funcName)s\n%(lineno)d\n%(message)s\n")
 
     stdout_handler = logging.StreamHandler(sys.stdout)
     stdout_handler.setLevel(logging.DEBUG)
@@ -47,9 +223,21 @@ def initialize_logger() -> logging.Logger:
     stderr_handler.setLevel(logging.ERROR)
     stderr_handler.setFormatter(formatter)
     logger.propagate = 0
-    logger.addHandler(stdout_handler)
-    logger.addHandler(stderr_handler)
+    if fast_mode:
+        _log_queue = Queue(-1)
+        listener = QueueListener(_log_queue, stdout_handler, stderr_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        logger.addHandler(DeferredQueueHandler(_log_queue))
+    else:
+        logger.addHandler(stdout_handler)
+        logger.addHandler(stderr_handler)
     logger.setLevel(log_level)
+    sample_rate = os.getenv('LOGGER_SAMPLE_RATE')
+    if sample_rate:
+        sampled_level = levels[os.getenv('LOGGER_SAMPLED_LVL', 'DEBUG').upper()]
+        _level_filter = SampledLevelFilter(logger, log_level, sampled_level, float(sample_rate))
+        logger.addFilter(_level_filter)
     return logger
 
 
@@ -0,0 +1,114 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+READ_OPERATIONS = {'GetItem', 'BatchGetItem', 'Query', 'Scan', 'TransactGetItems'}
+# CloudWatch accepts at most 100 values per metric in one EMF document
+MAX_VALUES_PER_METRIC = 100
+
+
+def _capacity_units(consumed_capacity) -> float:
+    if isinstance(consumed_capacity, dict):
+        consumed_capacity = [consumed_capacity]
+    return sum(entry.get('CapacityUnits', 0) for entry in consumed_capacity or [])
+
+
+def _item_count(response: dict) -> int:
+    if 'Items' in response:
+        return len(response['Items'])
+    if 'Item' in response or 'Attributes' in response:
+        return 1
+    if 'Responses' in response:
+        return sum(len(items) for items in response['Responses'].values())
+    return 0
+
+
+class MetricsEmitter:
+    """
+    Buffers metrics during an invocation and writes them to the log in CloudWatch Embedded
+    Metric Format (EMF) when flushed, so CloudWatch extracts them without PutMetricData calls.
+
+    Every metric has the dimensions ``function`` and ``operation``.
+    """
+
+    def __init__(self, namespace: str = None, function_name: str = None, stream=None):
+        self.namespace = namespace or os.getenv('METRICS_NAMESPACE', 'ProjectsApi')
+        self.function_name = function_name or os.getenv('AWS_LAMBDA_FUNCTION_NAME', 'local')
+        self.stream = stream or sys.stdout
+        self._buffer = {}
+        self._units = {}
+        self._lock = threading.Lock()
+
+    def put_metric(self, name: str, value: float, unit: str, operation: str):
+        with self._lock:
+            self._buffer.setdefault(operation, {}).setdefault(name, []).append(value)
+            self._units[name] = unit
+
+    def record_dynamodb_call(self, operation: str, latency_ms: float, response: dict):
+        """
+        Records capacity, latency, item count and payload size of one DynamoDB call
+
+        :param operation: DynamoDB operation name, e.g. GetItem
+        :param latency_ms: call duration in milliseconds
+        :param response: parsed DynamoDB response
+        """
+        units = _capacity_units(response.get('ConsumedCapacity'))
+        capacity_metric = 'ReadCapacityUnits' if operation in READ_OPERATIONS else 'WriteCapacityUnits'
+        payload_bytes = response.get('ResponseMetadata', {}).get('HTTPHeaders', {}).get('content-length', 0)
+        self.put_metric(capacity_metric, units, 'Count', operation)
+        self.put_metric('Latency', round(latency_ms, 3), 'Milliseconds', operation)
+        self.put_metric('ItemCount', _item_count(response), 'Count', operation)
+        self.put_metric('PayloadBytes', int(payload_bytes), 'Bytes', operation)
+
+    def _documents(self, operation, metrics):
+        longest = max(len(values) for values in metrics.values())
+        for start in range(0, longest, MAX_VALUES_PER_METRIC):
+            chunk = {name: values[start:start + MAX_VALUES_PER_METRIC] for name, values in metrics.items()
+                     if values[start:start + MAX_VALUES_PER_METRIC]}
+            document = {
+                '_aws': {
+                    'Timestamp': int(time.time() * 1000),
+                    'CloudWatchMetrics': [{
+                        'Namespace': self.namespace,
+                        'Dimensions': [['function', 'operation']],
+                        'Metrics': [{'Name': name, 'Unit': self._units[name]} for name in chunk]
+                    }]
+                },
+                'function': self.function_name,
+                'operation': operation
+            }
+            document.update(chunk)
+            yield document
+
+    def flush(self):
+        """Writes all buffered metrics, one EMF document per operation"""
+        with self._lock:
+            buffer, self._buffer = self._buffer, {}
+        lines = [json.dumps(document, separators=(',', ':'))
+                 for operation, metrics in buffer.items() for document in self._documents(operation, metrics)]
+        if lines:
+            self.stream.write('\n'.join(lines) + '\n')
+            self.stream.flush()
+
+    def log_metrics(self, handler):
+        """
+        Handler decorator recording the handler duration and flushing the buffer once per invocation
+        """
+
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            started = time.perf_counter()
+            try:
+                return handler(event, context)
+            finally:
+                self.put_metric('Latency', round((time.perf_counter() - started) * 1000, 3), 'Milliseconds',
+                                'Invocation')
+                self.flush()
+
+        return wrapper
+
+
+metrics: MetricsEmitter = MetricsEmitter()
@@ -0,0 +1,140 @@
+import heapq
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from database.batch import batch_write
+from search.tokenizer import tokenize, token_weights
+
+# Postings read per query token, results of more common tokens are marked truncated
+SEARCH_MAX_POSTINGS = int(os.getenv('SEARCH_MAX_POSTINGS', 10000))
+SEARCH_MAX_TERMS = 8
+
+
+def posting_changes(old_project, new_project) -> dict:
+    """
+    Postings to write when a project changes from old_project to new_project
+
+    :param old_project: attributes before the change, None for a new project
+    :param new_project: attributes after the change, None for a deleted project
+    :return: dict of token => new weight, None for postings to delete
+    """
+    old_weights = token_weights(old_project) if old_project else {}
+    new_weights = token_weights(new_project) if new_project else {}
+    changes = {token: weight for token, weight in new_weights.items() if old_weights.get(token) != weight}
+    changes.update({token: None for token in old_weights if token not in new_weights})
+    return changes
+
+
+def posting_requests(postings: dict) -> list:
+    """
+    BatchWriteItem requests for the index table
+
+    :param postings: dict of (token, project_id) => weight, None to delete the posting
+    :return: PutRequest/DeleteRequest entries
+    """
+    requests = []
+    for (token, project_id), weight in postings.items():
+        key = {'token': {'S': token}, 'project_id': {'S': project_id}}
+        if weight is None:
+            requests.append({'DeleteRequest': {'Key': key}})
+        else:
+            requests.append({'PutRequest': {'Item': dict(key, weight={'N': str(weight)})}})
+    return requests
+
+
+class SearchIndex:
+    """
+    Inverted index of project_name and description. Every (token, project_id) pair is an item
+    of the index table with the token weight in the project, see :func:`token_weights`.
+
+    A search reads the postings of every query token, keeps the projects that have all of them
+    and ranks these by the sum of their token weights times the relative rarity of each token.
+    """
+
+    def __init__(self, repository, table_name: str = None, max_postings: int = SEARCH_MAX_POSTINGS):
+        self.repository = repository
+        self.table_name = table_name or os.environ.get('SEARCH_DATABASE')
+        self.max_postings = max_postings
+
+    def write(self, postings: dict) -> list:
+        """
+        Writes and deletes postings, see :func:`posting_requests`
+
+        :return: requests that were still unprocessed after retrying
+        """
+        return batch_write(self.repository.client, self.table_name, posting_requests(postings))
+
+    def postings(self, token: str):
+        """
+        Reads the postings of one token
+
+        :return: tuple of (dict of project_id => weight, True when more than max_postings exist)
+        """
+        query_arguments = dict(TableName=self.table_name, KeyConditionExpression='#token = :token',
+                               ExpressionAttributeNames={'#token': 'token', '#weight': 'weight'},
+                               ExpressionAttributeValues={':token': {'S': token}},
+                               ProjectionExpression='project_id, #weight')
+        postings = {}
+        while True:
+            response = self.repository.client.query(**query_arguments)
+            for item in response['Items']:
+                postings[item['project_id']['S']] = int(item['weight']['N'])
+            if 'LastEvaluatedKey' not in response:
+                return postings, False
+            if len(postings) >= self.max_postings:
+                return postings, True
+            query_arguments['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def search(self, text: str, limit: int, fields=None) -> dict:
+        """
+        Finds the projects containing every token of text
+
+        :param text: search query
+        :param limit: maximum number of projects returned
+        :param fields: attribute names to return, project_id is always included
+        :return: dict with the ranked Projects (each with its score), the total number of matches
+                 and truncated, True when some postings were not read
+        """
+        tokens = list(dict.fromkeys(tokenize(text)))[:SEARCH_MAX_TERMS]
+        if not tokens:
+            return {'Projects': [], 'total': 0, 'truncated': False}
+        if len(tokens) == 1:
+            results = [self.postings(tokens[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=len(tokens)) as executor:
+                results = list(executor.map(self.postings, tokens))
+
+        by_size = sorted(results, key=lambda result: len(result[0]))
+        matches = set(by_size[0][0])
+        for postings, _ in by_size[1:]:
+            matches.intersection_update(postings)
+        largest = max(len(postings) for postings, _ in results) or 1
+        rarity = [math.log(1 + largest / len(postings)) if postings else 0 for postings, _ in results]
+        scores = {project_id: sum(postings[project_id] * token_rarity
+                                  for (postings, _), token_rarity in zip(results, rarity))
+                  for project_id in matches}
+        top = heapq.nlargest(limit, scores, key=lambda project_id: (scores[project_id], project_id))
+
+        projects = {}
+        if top:
+            projects, _ = self.repository.batch_get(top, fields=fields)
+        # Postings of projects that were deleted a moment ago may still be in the index
+        return {'Projects': [dict(projects[project_id], score=round(scores[project_id], 4))
+                             for project_id in top if project_id in projects],
+                'total': len(matches),
+                'truncated': any(truncated for _, truncated in results)}
+
+
+_search_index = None
+
+
+def get_search_index() -> SearchIndex:
+    """
+    Returns the search index shared by all invocations, creating it on first use
+    """
+    global _search_index
+    if _search_index is None:
+        from database.repository import get_repository
+
+        _search_index = SearchIndex(get_repository())
+    return _search_index
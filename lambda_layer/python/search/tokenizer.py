@@ -0,0 +1,62 @@
+"""
+Normalization and tokenization of project text for the search index. Search queries go
+through the same functions as indexed text, so both sides agree on the tokens.
+"""
+import re
+import unicodedata
+
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = 64
+# Distinct tokens indexed per project, the ones with the highest weight are kept
+MAX_TOKENS_PER_PROJECT = 256
+NAME_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+
+STOPWORDS = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'from', 'has', 'have', 'if', 'in', 'into',
+    'is', 'it', 'its', 'no', 'not', 'of', 'on', 'or', 'our', 'so', 'such', 'that', 'the', 'their', 'then',
+    'there', 'these', 'they', 'this', 'to', 'was', 'we', 'were', 'will', 'with'
+])
+
+# Runs of letters and digits, in any script
+_WORD = re.compile(r'[^\W_]+')
+
+
+def normalize(text: str) -> str:
+    """Case folds the text and strips accents, e.g. 'Café Über' -> 'cafe uber'"""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def tokenize(text) -> list:
+    """
+    Splits text into normalized search tokens, dropping stopwords and very short words
+
+    :param text: text to split, anything else than a string has no tokens
+    :return: tokens in text order, with repetitions
+    """
+    if not isinstance(text, str):
+        return []
+    return [token[:MAX_TOKEN_LENGTH] for token in _WORD.findall(normalize(text))
+            if len(token) >= MIN_TOKEN_LENGTH and token not in STOPWORDS]
+
+
+def token_weights(project: dict) -> dict:
+    """
+    Weight of every token of a project: occurrences in project_name count NAME_WEIGHT,
+    occurrences in description count DESCRIPTION_WEIGHT
+
+    :param project: project attributes
+    :return: dict of token => weight, at most MAX_TOKENS_PER_PROJECT entries
+    """
+    weights = {}
+    for token in tokenize(project.get('project_name')):
+        weights[token] = weights.get(token, 0) + NAME_WEIGHT
+    for token in tokenize(project.get('description')):
+        weights[token] = weights.get(token, 0) + DESCRIPTION_WEIGHT
+    if len(weights) > MAX_TOKENS_PER_PROJECT:
+        kept = sorted(weights, key=lambda token: (-weights[token], token))[:MAX_TOKENS_PER_PROJECT]
+        weights = {token: weights[token] for token in kept}
+    return weights
@@ -0,0 +1,125 @@
+"""
+Keep-warm support for the API functions.
+
+When WARMER_CONCURRENCY is set the stack invokes each API function on a schedule with the warm-up event
+``{"warmer": true, "concurrency": N}``. The handler answers it before doing any work. The invoked
+environment primes the DynamoDB connection pool and invokes its own function N - 1 times at once, each of
+those invocations holds its environment for WARMER_HOLD_MS so they overlap, and N environments stay warm.
+"""
+import functools
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logger.logger import log, flush_logs
+from instrumentation.instrumentation import end_cold_start
+
+WARMUP_KEY = 'warmer'
+# A fanned out invocation keeps its environment busy this long, so the others cannot reuse it
+WARMER_HOLD_MS = int(os.getenv('WARMER_HOLD_MS', 100))
+MAX_CONCURRENCY = 50
+
+_client = None
+
+
+def warmup_event(concurrency: int = 1) -> dict:
+    """Warm-up event as sent by the schedule, also used to warm environments locally"""
+    return {WARMUP_KEY: True, 'concurrency': concurrency}
+
+
+def is_warmup_event(event) -> bool:
+    return isinstance(event, dict) and event.get(WARMUP_KEY) is True
+
+
+def prime_connection() -> bool:
+    """
+    Creates the shared DynamoDB client and opens a connection of its pool with DescribeEndpoints,
+    which reads no table. Only reaching DynamoDB matters, a refused call leaves the connection open as well.
+
+    :return: True when DynamoDB answered
+    """
+    from botocore.exceptions import BotoCoreError, ClientError
+    from database.repository import get_repository
+
+    try:
+        get_repository().client.describe_endpoints()
+    except ClientError:
+        pass
+    except BotoCoreError as e:
+        log.warning('Could not prime the DynamoDB connection: %s', e)
+        return False
+    return True
+
+
+def fan_out(function_arn: str, count: int) -> list:
+    """
+    Invokes the function ``count`` times at once with a warm-up event of concurrency 1
+
+    :param function_arn: ARN of the invoked function, with the alias it was invoked through
+    :return: response payload of every invocation, None for the failed ones
+    """
+    global _client
+    if _client is None:
+        import boto3
+        from botocore.config import Config
+
+        _client = boto3.client('lambda', region_name=os.getenv('AWS_REGION'),
+                               config=Config(max_pool_connections=MAX_CONCURRENCY))
+    from botocore.exceptions import BotoCoreError, ClientError
+
+    payload = json.dumps(warmup_event()).encode('utf-8')
+
+    def invoke(_):
+        try:
+            response = _client.invoke(FunctionName=function_arn, Payload=payload)
+        except (BotoCoreError, ClientError) as e:
+            log.warning('Warm-up invocation of %s failed: %s', function_arn, e)
+            return None
+        if 'FunctionError' in response:
+            log.warning('Warm-up invocation of %s failed: %s', function_arn, response['Payload'].read())
+            return None
+        return json.loads(response['Payload'].read())
+
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        return list(executor.map(invoke, range(count)))
+
+
+def warm(event: dict, context) -> dict:
+    """
+    Answers a warm-up event
+
+    :return: number of warm environments and how many of them were cold, 1 and 0 or 1 without fan-out
+    """
+    started = time.perf_counter()
+    cold_start = end_cold_start()
+    primed = prime_connection()
+    try:
+        concurrency = min(max(int(event.get('concurrency', 1)), 1), MAX_CONCURRENCY)
+    except (TypeError, ValueError):
+        concurrency = 1
+    result = {'warm': 1, 'cold_starts': int(cold_start), 'primed': primed}
+    if concurrency > 1:
+        for response in fan_out(context.invoked_function_arn, concurrency - 1):
+            if response is not None:
+                result['warm'] += response.get('warm', 0)
+                result['cold_starts'] += response.get('cold_starts', 0)
+    else:
+        time.sleep(WARMER_HOLD_MS / 1000)
+    log.info('Warm-up of %d environments, %d of them cold, took %.3f ms', result['warm'], result['cold_starts'],
+             (time.perf_counter() - started) * 1000)
+    flush_logs()
+    return result
+
+
+def warm_up(handler):
+    """
+    Handler decorator answering warm-up events without calling the handler, apply it outermost
+    """
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        if is_warmup_event(event):
+            return warm(event, context)
+        return handler(event, context)
+
+    return wrapper
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+from boto3 import client
+from botocore.exceptions import ClientError
+from logger import log
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda_layer', 'python'))
+
+from database.batch import batch_write  # noqa: E402
+from database.parallel_scan import parallel_scan  # noqa: E402
+from database.serializer import deserialize_value  # noqa: E402
+
+load_dotenv()
+
+environment = os.getenv('ENVIRONMENT')
+app_name = os.getenv('APP_NAME')
+
+prefix_name = f'{environment.lower()}-{app_name.lower()}'
+
+dynamodb = client('dynamodb', region_name=os.getenv('AWS_REGION'))
+
+
+def backfill_memberships(total_segments):
+    """Writing the membership items of every existing project, projects written before the membership index had none"""
+    table_name = f'{prefix_name}-dynamodb'
+    membership_table_name = f'{prefix_name}-membership-dynamodb'
+    log.info(f'Reading members of every project in {table_name} with a parallel scan over {total_segments} segments')
+    try:
+        response = parallel_scan(dynamodb.scan, total_segments=total_segments, TableName=table_name,
+                                 ProjectionExpression='project_id, on_project',
+                                 FilterExpression='attribute_not_exists(deleted)')
+        write_requests = []
+        for item in response['Items']:
+            members = deserialize_value(item['on_project']) if 'on_project' in item else []
+            project_id = item['project_id']['S']
+            write_requests.extend({'PutRequest': {'Item': {'member': {'S': member}, 'project_id': {'S': project_id}}}}
+                                  for member in sorted(set(members)) if isinstance(member, str) and member)
+        unprocessed = batch_write(dynamodb, membership_table_name, write_requests)
+    except ClientError as e:
+        log.error(f"Error:{e}")
+        raise SystemExit(1)
+
+    log.info(f"Wrote {len(write_requests) - len(unprocessed)} membership items for {response['Count']} projects "
+             f"to {membership_table_name}")
+    if unprocessed:
+        log.error(f'{len(unprocessed)} membership items were not written, run the backfill again')
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write the membership items of all existing projects')
+    parser.add_argument('--segments', type=int, default=8)
+    args = parser.parse_args()
+    backfill_memberships(args.segments)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+import os
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from boto3 import client
+from botocore.exceptions import ClientError
+from logger import log
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda_layer', 'python'))
+
+from database.parallel_scan import parallel_scan  # noqa: E402
+from database.partitions import index_partition  # noqa: E402
+
+load_dotenv()
+
+environment = os.getenv('ENVIRONMENT')
+app_name = os.getenv('APP_NAME')
+
+prefix_name = f'{environment.lower()}-{app_name.lower()}'
+
+dynamodb = client('dynamodb', region_name=os.getenv('AWS_REGION'))
+
+
+def backfill_timestamps(total_segments, timestamp, workers):
+    """
+    Adding entity_type, created_at and updated_at to projects written before the time ordered indexes,
+    and moving projects to their index partition when it is missing or out of date
+    """
+    table_name = f'{prefix_name}-dynamodb'
+    log.info(f'Looking for projects without timestamps in {table_name} with a parallel scan over {total_segments} segments')
+
+    def add_timestamps(item):
+        key = {'project_id': item['project_id']}
+        dynamodb.update_item(TableName=table_name, Key=key,
+                             ConditionExpression='attribute_exists(project_id)',
+                             UpdateExpression='SET #entity_type = :entity_type, '
+                                              '#created_at = if_not_exists(#created_at, :timestamp), '
+                                              '#updated_at = if_not_exists(#updated_at, :timestamp)',
+                             ExpressionAttributeNames={'#entity_type': 'entity_type', '#created_at': 'created_at',
+                                                       '#updated_at': 'updated_at'},
+                             ExpressionAttributeValues={':entity_type': {'S': index_partition(key['project_id']['S'])},
+                                                        ':timestamp': {'S': timestamp}})
+
+    try:
+        response = parallel_scan(dynamodb.scan, total_segments=total_segments, TableName=table_name,
+                                 ProjectionExpression='project_id, entity_type, created_at',
+                                 FilterExpression='attribute_not_exists(deleted)')
+        items = [item for item in response['Items']
+                 if 'created_at' not in item or
+                 item.get('entity_type', {}).get('S') != index_partition(item['project_id']['S'])]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(add_timestamps, items))
+    except ClientError as e:
+        log.error(f"Error:{e}")
+        raise SystemExit(1)
+    log.info(f"Added timestamps {timestamp} or index partitions to {len(items)} of {response['Count']} projects")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Add timestamps to projects written before created_at/updated_at '
+                                                 'and move projects to their time ordered index partition')
+    parser.add_argument('--segments', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--timestamp', default='1970-01-01T00:00:00.000Z',
+                        help='created_at/updated_at of the old projects, the default sorts them before all new ones')
+    args = parser.parse_args()
+    backfill_timestamps(args.segments, args.timestamp, args.workers)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+import os
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from boto3 import client
+from botocore.exceptions import ClientError
+from logger import log
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda_layer', 'python'))
+
+from database.compact import (DESCRIPTION_COMPRESS_MIN_BYTES, compact_changes, compress_description,  # noqa: E402
+                              member_set)
+from database.parallel_scan import parallel_scan  # noqa: E402
+from database.serializer import deserialize_item, serialize_value  # noqa: E402
+
+load_dotenv()
+
+environment = os.getenv('ENVIRONMENT')
+app_name = os.getenv('APP_NAME')
+
+prefix_name = f'{environment.lower()}-{app_name.lower()}'
+
+dynamodb = client('dynamodb', region_name=os.getenv('AWS_REGION'))
+
+
+def compact_projects(total_segments, workers):
+    """
+    Rewriting projects written before compact storage: long descriptions are compressed into
+    description_z and on_project lists become string sets. Version and updated_at are kept, the
+    stored form changes but the project does not. Deploy the functions reading the compact form first.
+    """
+    table_name = f'{prefix_name}-dynamodb'
+    log.info(f'Looking for projects to compact in {table_name} with a parallel scan over {total_segments} segments')
+
+    def compact(item):
+        project = deserialize_item(item)
+        changes = {}
+        if compress_description(project.get('description')) is not None:
+            changes['description'] = project['description']
+        # Lists holding anything but names stay lists
+        if 'L' in item.get('on_project', {}) and isinstance(member_set(project['on_project']), set):
+            changes['on_project'] = project['on_project']
+        if not changes:
+            return 'unchanged'
+        stored, removed = compact_changes(changes)
+        arguments = {'ExpressionAttributeNames': {f'#{key}': key for key in list(stored) + removed + ['version']},
+                     'ExpressionAttributeValues': {f':{key}': serialize_value(value) for key, value in stored.items()}}
+        expression = (' SET ' + ', '.join(f'#{key} = :{key}' for key in stored) if stored else '') + \
+                     (' REMOVE ' + ', '.join(f'#{key}' for key in removed) if removed else '')
+        # A project changed since it was read has a higher version and is skipped
+        if 'version' in project:
+            condition = '#version = :expected'
+            arguments['ExpressionAttributeValues'][':expected'] = item['version']
+        else:
+            condition = 'attribute_exists(project_id) AND attribute_not_exists(#version)'
+        if not arguments['ExpressionAttributeValues']:
+            del arguments['ExpressionAttributeValues']
+        try:
+            dynamodb.update_item(TableName=table_name, Key={'project_id': item['project_id']},
+                                 UpdateExpression=expression.strip(), ConditionExpression=condition, **arguments)
+        except dynamodb.exceptions.ConditionalCheckFailedException:
+            return 'changed'
+        return 'compacted'
+
+    try:
+        response = parallel_scan(dynamodb.scan, total_segments=total_segments, TableName=table_name,
+                                 ProjectionExpression='#project_id, #description, #on_project, #version',
+                                 FilterExpression='attribute_type(#on_project, :list) OR '
+                                                  '(attribute_exists(#description) AND size(#description) >= :min_length)',
+                                 ExpressionAttributeNames={'#project_id': 'project_id', '#description': 'description',
+                                                           '#on_project': 'on_project', '#version': 'version'},
+                                 ExpressionAttributeValues={':list': {'S': 'L'},
+                                                            # size() counts characters, each one is at most 4 bytes
+                                                            ':min_length': {'N': str(DESCRIPTION_COMPRESS_MIN_BYTES // 4)}})
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(compact, response['Items']))
+    except ClientError as e:
+        log.error(f"Error:{e}")
+        raise SystemExit(1)
+
+    log.info(f"Compacted {outcomes.count('compacted')} of {response['Count']} candidate projects, "
+             f"{outcomes.count('unchanged')} were already compact")
+    if outcomes.count('changed'):
+        log.warning(f"{outcomes.count('changed')} projects changed while compacting, run the migration again")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compress long descriptions and store on_project as a string set')
+    parser.add_argument('--segments', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+    compact_projects(args.segments, args.workers)
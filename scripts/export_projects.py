@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+import os
+import sys
+import json
+import argparse
+from dotenv import load_dotenv
+from boto3 import resource
+from botocore.exceptions import ClientError
+from logger import log
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda_layer', 'python'))
+
+from database.parallel_scan import parallel_scan  # noqa: E402
+
+load_dotenv()
+
+environment = os.getenv('ENVIRONMENT')
+app_name = os.getenv('APP_NAME')
+
+prefix_name = f'{environment.lower()}-{app_name.lower()}'
+
+dynamodb = resource('dynamodb', region_name=os.getenv('AWS_REGION'))
+
+
+def export_projects(output, total_segments):
+    """Exporting all projects from the DynamoDB table to a JSON lines file"""
+    table = dynamodb.Table(f'{prefix_name}-dynamodb')
+    log.info(f'Exporting table {table.name} with a parallel scan over {total_segments} segments')
+    try:
+        response = parallel_scan(table.scan, total_segments=total_segments,
+                                 FilterExpression='attribute_not_exists(deleted)')
+    except ClientError as e:
+        log.error(f"Error:{e}")
+        raise SystemExit(1)
+
+    with open(output, 'w') as f:
+        for item in response['Items']:
+            f.write(json.dumps(item, default=str) + '\n')
+    log.info(f"Exported {response['Count']} projects to {output}, consumed capacity: {response['ConsumedCapacity']}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export all projects to a JSON lines file')
+    parser.add_argument('--output', default='projects.jsonl')
+    parser.add_argument('--segments', type=int, default=8)
+    args = parser.parse_args()
+    export_projects(args.output, args.segments)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+import os
+import sys
+import zlib
+import argparse
+from dotenv import load_dotenv
+from boto3 import client
+from botocore.exceptions import ClientError
+from logger import log
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda_layer', 'python'))
+
+from database.batch import batch_write  # noqa: E402
+from database.parallel_scan import parallel_scan  # noqa: E402
+from database.compact import load_project  # noqa: E402
+
+load_dotenv()
+
+environment = os.getenv('ENVIRONMENT')
+app_name = os.getenv('APP_NAME')
+
+prefix_name = f'{environment.lower()}-{app_name.lower()}'
+
+dynamodb = client('dynamodb', region_name=os.getenv('AWS_REGION'))
+
+
+def rebuild_project_stats(total_segments, shards, member_partitions):
+    """
+    Recounting every project and overwriting the counters in the stats table.
+    Run it while no projects are written, changes made during the rebuild are lost.
+    """
+    table_name = f'{prefix_name}-dynamodb'
+    stats_table_name = f'{prefix_name}-stats-dynamodb'
+    log.info(f'Counting every project in {table_name} with a parallel scan over {total_segments} segments')
+    try:
+        response = parallel_scan(dynamodb.scan, total_segments=total_segments, TableName=table_name,
+                                 ProjectionExpression='internal, on_project',
+                                 FilterExpression='attribute_not_exists(deleted)')
+        internal = 0
+        members = {}
+        for item in response['Items']:
+            project = load_project(item)
+            internal += project.get('internal') is True
+            on_project = project.get('on_project') if isinstance(project.get('on_project'), list) else []
+            for member in {member for member in on_project if isinstance(member, str) and member}:
+                members[member] = members.get(member, 0) + 1
+
+        # Members that no longer have projects are set to 0
+        for partition in range(member_partitions):
+            paginator = dynamodb.get_paginator('query')
+            for page in paginator.paginate(TableName=stats_table_name, KeyConditionExpression='#counter = :counter',
+                                           ExpressionAttributeNames={'#counter': 'counter'},
+                                           ExpressionAttributeValues={':counter': {'S': f'members#{partition}'}}):
+                for item in page['Items']:
+                    members.setdefault(item['key']['S'], 0)
+
+        summary = [{'counter': {'S': f'summary#{shard}'}, 'key': {'S': '-'},
+                    'total': {'N': str(response['Count'] if shard == 0 else 0)},
+                    'internal': {'N': str(internal if shard == 0 else 0)},
+                    'external': {'N': str(response['Count'] - internal if shard == 0 else 0)}}
+                   for shard in range(shards)]
+        member_items = [{'counter': {'S': f'members#{zlib.crc32(member.encode("utf-8")) % member_partitions}'},
+                         'key': {'S': member}, 'projects': {'N': str(count)}}
+                        for member, count in members.items()]
+        unprocessed = batch_write(dynamodb, stats_table_name,
+                                  [{'PutRequest': {'Item': item}} for item in summary + member_items])
+    except ClientError as e:
+        log.error(f"Error:{e}")
+        raise SystemExit(1)
+
+    log.info(f"Counted {response['Count']} projects, {internal} internal, {len(members)} members")
+    if unprocessed:
+        log.error(f'{len(unprocessed)} counters were not written, run the rebuild again')
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Recount all projects into the stats table')
+    parser.add_argument('--segments', type=int, default=8)
+    parser.add_argument('--shards', type=int, default=10, help='STATS_SHARDS of the stats functions')
+    parser.add_argument('--member-partitions', type=int, default=10,
+                        help='STATS_MEMBER_PARTITIONS of the stats functions')
+    args = parser.parse_args()
+    rebuild_project_stats(args.segments, args.shards, args.member_partitions)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+import os
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from boto3 import client
+from botocore.exceptions import ClientError
+from logger import log
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda_layer', 'python'))
+
+from database.batch import batch_write, chunks  # noqa: E402
+from database.parallel_scan import parallel_scan  # noqa: E402
+from database.compact import load_project  # noqa: E402
+from search.index import posting_changes, posting_requests  # noqa: E402
+
+load_dotenv()
+
+environment = os.getenv('ENVIRONMENT')
+app_name = os.getenv('APP_NAME')
+
+prefix_name = f'{environment.lower()}-{app_name.lower()}'
+
+dynamodb = client('dynamodb', region_name=os.getenv('AWS_REGION'))
+
+
+def rebuild_search_index(total_segments, workers):
+    """Writing the search postings of every project, e.g. for projects written before the search index existed"""
+    table_name = f'{prefix_name}-dynamodb'
+    search_table_name = f'{prefix_name}-search-dynamodb'
+    log.info(f'Reading every project in {table_name} with a parallel scan over {total_segments} segments')
+
+    def write_postings(projects):
+        postings = {(token, project['project_id']): weight for project in projects
+                    for token, weight in posting_changes(None, project).items()}
+        return postings, batch_write(dynamodb, search_table_name, posting_requests(postings))
+
+    try:
+        response = parallel_scan(dynamodb.scan, total_segments=total_segments, TableName=table_name,
+                                 ProjectionExpression='project_id, project_name, description, description_z',
+                                 FilterExpression='attribute_not_exists(deleted)')
+        projects = [load_project(item) for item in response['Items']]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(write_postings, chunks(projects, 100)))
+    except ClientError as e:
+        log.error(f"Error:{e}")
+        raise SystemExit(1)
+
+    written = sum(len(postings) for postings, _ in results)
+    unprocessed = sum(len(unprocessed) for _, unprocessed in results)
+    log.info(f"Wrote {written - unprocessed} search postings for {len(projects)} projects to {search_table_name}")
+    if unprocessed:
+        log.error(f'{unprocessed} search postings were not written, run the rebuild again')
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write the search postings of all projects')
+    parser.add_argument('--segments', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+    rebuild_search_index(args.segments, args.workers)
@@ -4,8 +4,10 @@ from aws_cdk import (
     aws_dynamodb as dynamodb,
     aws_ec2 as ec2,
     aws_apigateway as apigw,
-    RemovalPolicy, Stack)
-from base_constructs.functions import LambdaIntegation
+    aws_lambda as _lambda,
+    aws_lambda_event_sources as event_sources,
+    Duration, RemovalPolicy, Stack)
+from base_constructs.functions import LambdaIntegation, PerformanceProfile
 from base_constructs.api import RestAPI
 from base_constructs.function_layer import LambdaLayer
 
@@ -18,27 +20,99 @@ app_name = os.getenv('APP_NAME')
 
 
 class CdkBackend(Stack):
-    def __init__(self, scope: Construct, construct_id: str, endpoint_id=ec2.InterfaceVpcEndpoint, **kwargs):
+    def __init__(self, scope: Construct, construct_id: str, endpoint_id=ec2.InterfaceVpcEndpoint, vpc: ec2.IVpc = None,
+                 **kwargs):
         super().__init__(scope, construct_id, **kwargs)
 
         prefix_name = f'{environment.lower()}-{app_name.lower()}'
 
+        # Opt-in stage cache of the project GET methods, stale cached responses are dropped after writes ==> Example ==>
+        cache_ttls = {'projects/GET': os.getenv('API_CACHE_LIST_TTL', '60'),
+                      'projects/{project_id}/GET': os.getenv('API_CACHE_TTL', '300')}
+
         if 'API_DESCRIPTION' in os.environ:
             self.backed_api = RestAPI(self, "BackedRESTAPI", api_name=f'{prefix_name}-api',
-                                      api_endpoint_id=endpoint_id, description=os.getenv('API_DESCRIPTION'))
+                                      api_endpoint_id=endpoint_id, description=os.getenv('API_DESCRIPTION'),
+                                      cache_cluster_size=os.getenv('API_CACHE_CLUSTER_SIZE'), cache_ttls=cache_ttls)
         if 'API_DESCRIPTION' not in os.environ:
             self.backed_api = RestAPI(self, "BackedRESTAPI", api_name=f'{prefix_name}-api',
-                                      api_endpoint_id=endpoint_id)
+                                      api_endpoint_id=endpoint_id,
+                                      cache_cluster_size=os.getenv('API_CACHE_CLUSTER_SIZE'), cache_ttls=cache_ttls)
 
         # Define your DynamoDB database ==> Example ==>
+        # Deleted projects are kept as tombstones for changed_since queries until they expire through TTL
         self.db_table = dynamodb.Table(self, 'BackedDynamoDBExample', table_name=f'{prefix_name}-dynamodb',
                                        point_in_time_recovery=True,
                                        removal_policy=RemovalPolicy.DESTROY,
+                                       time_to_live_attribute='expires_at',
+                                       stream=dynamodb.StreamViewType.NEW_AND_OLD_IMAGES,
                                        partition_key=dynamodb.Attribute(
                                            name='project_id',
                                            type=dynamodb.AttributeType.STRING
                                        ))
 
+        # Time ordered indexes over every project, used for newest first listing and changed since queries ==> Example ==>
+        # The entity_type partition key spreads projects over several partitions (database.partitions),
+        # the timestamps are ISO 8601 UTC strings
+        for index_name, sort_key in [('created-index', 'created_at'), ('updated-index', 'updated_at')]:
+            self.db_table.add_global_secondary_index(index_name=index_name,
+                                                     partition_key=dynamodb.Attribute(
+                                                         name='entity_type',
+                                                         type=dynamodb.AttributeType.STRING
+                                                     ),
+                                                     sort_key=dynamodb.Attribute(
+                                                         name=sort_key,
+                                                         type=dynamodb.AttributeType.STRING
+                                                     ),
+                                                     projection_type=dynamodb.ProjectionType.ALL)
+
+        # Membership index, one (member, project_id) item per name in a project's on_project list ==> Example ==>
+        # Serves GET /projects?member= with a Query instead of scanning every project
+        self.membership_table = dynamodb.Table(self, 'MembershipDynamoDBExample',
+                                               table_name=f'{prefix_name}-membership-dynamodb',
+                                               point_in_time_recovery=True,
+                                               removal_policy=RemovalPolicy.DESTROY,
+                                               partition_key=dynamodb.Attribute(
+                                                   name='member',
+                                                   type=dynamodb.AttributeType.STRING
+                                               ),
+                                               sort_key=dynamodb.Attribute(
+                                                   name='project_id',
+                                                   type=dynamodb.AttributeType.STRING
+                                               ))
+
+        # Search index, one (token, project_id) posting per word of a project's name and description ==> Example ==>
+        # Kept in sync from the projects table stream, serves GET /projects/search
+        self.search_table = dynamodb.Table(self, 'SearchDynamoDBExample',
+                                           table_name=f'{prefix_name}-search-dynamodb',
+                                           point_in_time_recovery=True,
+                                           removal_policy=RemovalPolicy.DESTROY,
+                                           partition_key=dynamodb.Attribute(
+                                               name='token',
+                                               type=dynamodb.AttributeType.STRING
+                                           ),
+                                           sort_key=dynamodb.Attribute(
+                                               name='project_id',
+                                               type=dynamodb.AttributeType.STRING
+                                           ))
+
+        # Project counters (total, internal/external, projects per member) kept up to date from the projects table stream ==> Example ==>
+        # Summary counters are sharded over several items, member counters over several partitions,
+        # markers of applied stream batches expire through TTL
+        self.stats_table = dynamodb.Table(self, 'StatsDynamoDBExample',
+                                          table_name=f'{prefix_name}-stats-dynamodb',
+                                          point_in_time_recovery=True,
+                                          removal_policy=RemovalPolicy.DESTROY,
+                                          time_to_live_attribute='expires_at',
+                                          partition_key=dynamodb.Attribute(
+                                              name='counter',
+                                              type=dynamodb.AttributeType.STRING
+                                          ),
+                                          sort_key=dynamodb.Attribute(
+                                              name='key',
+                                              type=dynamodb.AttributeType.STRING
+                                          ))
+
         # Add a layer(custom dependency) for your Lambda functions ==> Example ==>
         self.fn_sample_layer = LambdaLayer(self, "BackendLambdaLayer",
                                            layer_name=f'{prefix_name}-lambda-layer',
@@ -46,58 +120,305 @@ class CdkBackend(Stack):
                                            runtime='python3.9',
                                            description='Backed API Lambda Layer')
 
+        # Pick memory, architecture, timeout and concurrency of the lambda functions per endpoint ==> Example ==>
+        # All functions are pure python and run on arm64. Provisioned concurrency of the get function
+        # and the reserved concurrency of the batch functions are opt-in
+        get_profile = PerformanceProfile(memory_size=1024, arm64=True, timeout=29,
+                                         provisioned_concurrency=int(os.getenv('GET_PROVISIONED_CONCURRENCY', 0)),
+                                         max_provisioned_concurrency=int(os.getenv('GET_MAX_PROVISIONED_CONCURRENCY', 0)))
+        read_profile = PerformanceProfile(memory_size=1024, arm64=True, timeout=29)
+        write_profile = PerformanceProfile(memory_size=512, arm64=True, timeout=29)
+        batch_profile = PerformanceProfile(memory_size=1769, arm64=True, timeout=29,
+                                           reserved_concurrency=int(os.environ['BATCH_RESERVED_CONCURRENCY'])
+                                           if 'BATCH_RESERVED_CONCURRENCY' in os.environ else None)
+        stream_profile = PerformanceProfile(memory_size=512, arm64=True, timeout=60)
+
         # Define lambda functions that will process your API requests and return responses ==> Example ==>
-        self.fn_sample_create_project = LambdaIntegation(self, "PostMethodsExample",
-                                                         func_name=f'{prefix_name}-create-project',
-                                                         description='Create a new project',
-                                                         source_dir='lambda_code/post_methods/create_project',
-                                                         layers=[self.fn_sample_layer.lambda_layer],
-                                                         handler='handler.create_project',
-                                                         runtime='python3.9',
-                                                         func_environment={
-                                                             'DATABASE': self.db_table.table_name
-                                                         })
-        self.db_table.grant_read_write_data(self.fn_sample_create_project.function)
-
-        self.fn_sample_get_project = LambdaIntegation(self, 'GetMethodsExample',
-                                                      func_name=f'{prefix_name}-list-project',
-                                                      description='List all projects or by project_id',
-                                                      source_dir='lambda_code/get_methods/get_project',
-                                                      layers=[self.fn_sample_layer.lambda_layer],
-                                                      handler='handler.get_project',
-                                                      runtime="python3.9",
-                                                      func_environment={
-                                                          'DATABASE': self.db_table.table_name
-                                                      })
-        self.db_table.grant_read_data(self.fn_sample_get_project.function)
-
-        self.fn_sample_update_project = LambdaIntegation(self, 'PutMethodsExample',
-                                                         func_name=f'{prefix_name}-update-project',
-                                                         description='Change project with the specified project_id',
-                                                         source_dir='lambda_code/put_methods/update_project',
-                                                         layers=[self.fn_sample_layer.lambda_layer],
-                                                         handler='handler.update_project',
-                                                         runtime="python3.9",
-                                                         func_environment={
-                                                             'DATABASE': self.db_table.table_name
-                                                         })
-        self.db_table.grant_read_write_data(self.fn_sample_update_project.function)
+        # BACKEND_MODE=router deploys a single router function for the create, get, update, patch and delete routes,
+        # the REST API proxies them to it. The default, functions, deploys a function per route
+        self.backend_mode = os.getenv('BACKEND_MODE', 'functions').lower()
+        if self.backend_mode == 'router':
+            self.fn_sample_router = LambdaIntegation(self, 'RouterMethodsExample',
+                                                     func_name=f'{prefix_name}-project-router',
+                                                     description='Create, get, update, patch and delete projects',
+                                                     source_dir='lambda_code',
+                                                     layers=[self.fn_sample_layer.lambda_layer],
+                                                     handler='router.handler.route',
+                                                     runtime="python3.9",
+                                                     profile=get_profile,
+                                                     func_environment={
+                                                         'DATABASE': self.db_table.table_name,
+                                                         'MEMBERSHIP_DATABASE': self.membership_table.table_name,
+                                                         'LOGGER_LVL': 'WARNING',
+                                                         'LOGGER_SAMPLE_RATE': '0.01',
+                                                         'SCAN_SEGMENTS': '4',
+                                                         'SCAN_MAX_BYTES': str(5 * 1024 * 1024),
+                                                         'PROJECT_CACHE_SIZE': os.getenv('PROJECT_CACHE_SIZE', '0'),
+                                                         'PROJECT_CACHE_TTL': os.getenv('PROJECT_CACHE_TTL', '30'),
+                                                         'PROJECT_TOMBSTONE_TTL': os.getenv('PROJECT_TOMBSTONE_TTL',
+                                                                                            str(30 * 24 * 60 * 60))
+                                                     })
+            self.db_table.grant_read_write_data(self.fn_sample_router.function)
+            self.membership_table.grant_read_write_data(self.fn_sample_router.function)
+            project_functions = [self.fn_sample_router]
+        else:
+            self.fn_sample_create_project = LambdaIntegation(self, "PostMethodsExample",
+                                                             func_name=f'{prefix_name}-create-project',
+                                                             description='Create a new project',
+                                                             source_dir='lambda_code/post_methods/create_project',
+                                                             layers=[self.fn_sample_layer.lambda_layer],
+                                                             handler='handler.create_project',
+                                                             runtime='python3.9',
+                                                             profile=write_profile,
+                                                             func_environment={
+                                                                 'DATABASE': self.db_table.table_name,
+                                                                 'MEMBERSHIP_DATABASE': self.membership_table.table_name,
+                                                                 'LOGGER_LVL': 'WARNING',
+                                                                 'LOGGER_SAMPLE_RATE': '0.01'
+                                                             })
+            self.db_table.grant_read_write_data(self.fn_sample_create_project.function)
+            self.membership_table.grant_write_data(self.fn_sample_create_project.function)
+
+            self.fn_sample_get_project = LambdaIntegation(self, 'GetMethodsExample',
+                                                          func_name=f'{prefix_name}-list-project',
+                                                          description='List all projects or by project_id',
+                                                          source_dir='lambda_code/get_methods/get_project',
+                                                          layers=[self.fn_sample_layer.lambda_layer],
+                                                          handler='handler.get_project',
+                                                          runtime="python3.9",
+                                                          profile=get_profile,
+                                                          func_environment={
+                                                              'DATABASE': self.db_table.table_name,
+                                                              'MEMBERSHIP_DATABASE': self.membership_table.table_name,
+                                                              'LOGGER_LVL': 'WARNING',
+                                                              'LOGGER_SAMPLE_RATE': '0.01',
+                                                              'SCAN_SEGMENTS': '4',
+                                                              'SCAN_MAX_BYTES': str(5 * 1024 * 1024),
+                                                              'PROJECT_CACHE_SIZE': os.getenv('PROJECT_CACHE_SIZE', '0'),
+                                                              'PROJECT_CACHE_TTL': os.getenv('PROJECT_CACHE_TTL', '30')
+                                                          })
+            self.db_table.grant_read_data(self.fn_sample_get_project.function)
+            self.membership_table.grant_read_data(self.fn_sample_get_project.function)
+
+            self.fn_sample_update_project = LambdaIntegation(self, 'PutMethodsExample',
+                                                             func_name=f'{prefix_name}-update-project',
+                                                             description='Change project with the specified project_id',
+                                                             source_dir='lambda_code/put_methods/update_project',
+                                                             layers=[self.fn_sample_layer.lambda_layer],
+                                                             handler='handler.update_project',
+                                                             runtime="python3.9",
+                                                             profile=write_profile,
+                                                             func_environment={
+                                                                 'DATABASE': self.db_table.table_name,
+                                                                 'MEMBERSHIP_DATABASE': self.membership_table.table_name,
+                                                                 'LOGGER_LVL': 'WARNING',
+                                                                 'LOGGER_SAMPLE_RATE': '0.01'
+                                                             })
+            self.db_table.grant_read_write_data(self.fn_sample_update_project.function)
+            self.membership_table.grant_write_data(self.fn_sample_update_project.function)
 
-        self.fn_sample_delete_project = LambdaIntegation(self, 'DeleteMethodsExample',
-                                                         func_name=f'{prefix_name}-delete-project',
-                                                         description='Delete project with a certain project_id',
-                                                         source_dir='lambda_code/delete_methods/delete_project',
+            self.fn_sample_patch_project = LambdaIntegation(self, 'PatchMethodsExample',
+                                                            func_name=f'{prefix_name}-patch-project',
+                                                            description='Add people to and remove people from a project',
+                                                            source_dir='lambda_code/patch_methods/patch_project',
+                                                            layers=[self.fn_sample_layer.lambda_layer],
+                                                            handler='handler.patch_project',
+                                                            runtime="python3.9",
+                                                            profile=write_profile,
+                                                            func_environment={
+                                                                'DATABASE': self.db_table.table_name,
+                                                                'MEMBERSHIP_DATABASE': self.membership_table.table_name,
+                                                                'LOGGER_LVL': 'WARNING',
+                                                                'LOGGER_SAMPLE_RATE': '0.01'
+                                                            })
+            self.db_table.grant_read_write_data(self.fn_sample_patch_project.function)
+            self.membership_table.grant_write_data(self.fn_sample_patch_project.function)
+
+            self.fn_sample_delete_project = LambdaIntegation(self, 'DeleteMethodsExample',
+                                                             func_name=f'{prefix_name}-delete-project',
+                                                             description='Delete project with a certain project_id',
+                                                             source_dir='lambda_code/delete_methods/delete_project',
+                                                             layers=[self.fn_sample_layer.lambda_layer],
+                                                             handler='handler.delete_project',
+                                                             runtime="python3.9",
+                                                             profile=write_profile,
+                                                             func_environment={
+                                                                 'DATABASE': self.db_table.table_name,
+                                                                 'MEMBERSHIP_DATABASE': self.membership_table.table_name,
+                                                                 'LOGGER_LVL': 'WARNING',
+                                                                 'LOGGER_SAMPLE_RATE': '0.01',
+                                                                 'PROJECT_TOMBSTONE_TTL': os.getenv('PROJECT_TOMBSTONE_TTL',
+                                                                                                    str(30 * 24 * 60 * 60))
+                                                             })
+            self.db_table.grant_read_write_data(self.fn_sample_delete_project.function)
+            self.membership_table.grant_write_data(self.fn_sample_delete_project.function)
+
+            project_functions = [self.fn_sample_create_project, self.fn_sample_get_project,
+                                 self.fn_sample_update_project, self.fn_sample_patch_project,
+                                 self.fn_sample_delete_project]
+
+        self.fn_sample_batch_create_project = LambdaIntegation(self, "BatchPostMethodsExample",
+                                                               func_name=f'{prefix_name}-batch-create-project',
+                                                               description='Create many new projects at once',
+                                                               source_dir='lambda_code/post_methods/batch_create_projects',
+                                                               layers=[self.fn_sample_layer.lambda_layer],
+                                                               handler='handler.create_projects',
+                                                               runtime='python3.9',
+                                                               profile=batch_profile,
+                                                               func_environment={
+                                                                   'DATABASE': self.db_table.table_name,
+                                                                   'MEMBERSHIP_DATABASE': self.membership_table.table_name,
+                                                                   'LOGGER_LVL': 'WARNING',
+                                                                   'LOGGER_SAMPLE_RATE': '0.01',
+                                                                   'BATCH_MAX_ITEMS': '1000'
+                                                               })
+        self.db_table.grant_write_data(self.fn_sample_batch_create_project.function)
+        self.membership_table.grant_write_data(self.fn_sample_batch_create_project.function)
+
+        self.fn_sample_batch_get_project = LambdaIntegation(self, 'BatchGetMethodsExample',
+                                                            func_name=f'{prefix_name}-batch-get-project',
+                                                            description='Get many projects by project_id at once',
+                                                            source_dir='lambda_code/post_methods/batch_get_projects',
+                                                            layers=[self.fn_sample_layer.lambda_layer],
+                                                            handler='handler.get_projects',
+                                                            runtime="python3.9",
+                                                            profile=batch_profile,
+                                                            func_environment={
+                                                                'DATABASE': self.db_table.table_name,
+                                                                'LOGGER_LVL': 'WARNING',
+                                                                'LOGGER_SAMPLE_RATE': '0.01',
+                                                                'BATCH_GET_MAX_IDS': '500'
+                                                            })
+        self.db_table.grant_read_data(self.fn_sample_batch_get_project.function)
+
+        self.fn_sample_search_project = LambdaIntegation(self, 'SearchMethodsExample',
+                                                         func_name=f'{prefix_name}-search-project',
+                                                         description='Full-text search over project names and descriptions',
+                                                         source_dir='lambda_code/get_methods/search_projects',
                                                          layers=[self.fn_sample_layer.lambda_layer],
-                                                         handler='handler.delete_project',
+                                                         handler='handler.search_projects',
                                                          runtime="python3.9",
+                                                         profile=read_profile,
                                                          func_environment={
-                                                             'DATABASE': self.db_table.table_name
+                                                             'DATABASE': self.db_table.table_name,
+                                                             'SEARCH_DATABASE': self.search_table.table_name,
+                                                             'LOGGER_LVL': 'WARNING',
+                                                             'LOGGER_SAMPLE_RATE': '0.01',
+                                                             'SEARCH_MAX_POSTINGS': '10000'
                                                          })
-        self.db_table.grant_read_write_data(self.fn_sample_delete_project.function)
+        self.db_table.grant_read_data(self.fn_sample_search_project.function)
+        self.search_table.grant_read_data(self.fn_sample_search_project.function)
+
+        # Consume the projects table stream to keep the search index up to date ==> Example ==>
+        self.fn_sample_search_index = LambdaIntegation(self, 'SearchIndexStreamExample',
+                                                       func_name=f'{prefix_name}-search-index',
+                                                       description='Update the search index from the projects table stream',
+                                                       source_dir='lambda_code/stream_methods/search_index',
+                                                       layers=[self.fn_sample_layer.lambda_layer],
+                                                       handler='handler.index_projects',
+                                                       runtime="python3.9",
+                                                       profile=stream_profile,
+                                                       func_environment={
+                                                           'SEARCH_DATABASE': self.search_table.table_name,
+                                                           'LOGGER_LVL': 'WARNING',
+                                                           'LOGGER_SAMPLE_RATE': '0.01'
+                                                       })
+        self.search_table.grant_write_data(self.fn_sample_search_index.function)
+        self.fn_sample_search_index.function.add_event_source(
+            event_sources.DynamoEventSource(self.db_table,
+                                            starting_position=_lambda.StartingPosition.TRIM_HORIZON,
+                                            batch_size=100,
+                                            bisect_batch_on_error=True,
+                                            retry_attempts=10))
+
+        self.fn_sample_get_stats = LambdaIntegation(self, 'StatsMethodsExample',
+                                                    func_name=f'{prefix_name}-project-stats',
+                                                    description='Read the project counters',
+                                                    source_dir='lambda_code/get_methods/project_stats',
+                                                    layers=[self.fn_sample_layer.lambda_layer],
+                                                    handler='handler.get_stats',
+                                                    runtime="python3.9",
+                                                    profile=read_profile,
+                                                    func_environment={
+                                                        'STATS_DATABASE': self.stats_table.table_name,
+                                                        'LOGGER_LVL': 'WARNING',
+                                                        'LOGGER_SAMPLE_RATE': '0.01',
+                                                        'STATS_SHARDS': '10',
+                                                        'STATS_MEMBER_PARTITIONS': '10'
+                                                    })
+        self.stats_table.grant_read_data(self.fn_sample_get_stats.function)
+
+        # Consume the projects table stream to keep the project counters up to date ==> Example ==>
+        # Batches are not bisected on error, a retried batch must contain the same records to be applied only once
+        self.fn_sample_update_stats = LambdaIntegation(self, 'StatsStreamExample',
+                                                       func_name=f'{prefix_name}-update-stats',
+                                                       description='Update the project counters from the projects table stream',
+                                                       source_dir='lambda_code/stream_methods/project_stats',
+                                                       layers=[self.fn_sample_layer.lambda_layer],
+                                                       handler='handler.update_stats',
+                                                       runtime="python3.9",
+                                                       profile=stream_profile,
+                                                       func_environment={
+                                                           'STATS_DATABASE': self.stats_table.table_name,
+                                                           'LOGGER_LVL': 'WARNING',
+                                                           'LOGGER_SAMPLE_RATE': '0.01',
+                                                           'STATS_SHARDS': '10',
+                                                           'STATS_MEMBER_PARTITIONS': '10'
+                                                       })
+        self.stats_table.grant_write_data(self.fn_sample_update_stats.function)
+        self.fn_sample_update_stats.function.add_event_source(
+            event_sources.DynamoEventSource(self.db_table,
+                                            starting_position=_lambda.StartingPosition.TRIM_HORIZON,
+                                            batch_size=1000,
+                                            max_batching_window=Duration.seconds(5),
+                                            retry_attempts=10))
+
+        # Format and write logs off the request thread in every function ==> Example ==>
+        for integration in project_functions + [self.fn_sample_batch_create_project, self.fn_sample_batch_get_project,
+                                                self.fn_sample_search_project, self.fn_sample_search_index,
+                                                self.fn_sample_get_stats, self.fn_sample_update_stats]:
+            integration.function.add_environment('LOGGER_MODE', os.getenv('LOGGER_MODE', 'fast'))
+
+        # Drop the cached responses made stale by writes from the search index stream function ==> Example ==>
+        # Table streams serve at most two readers per shard, so the stage cache does not consume the stream itself.
+        # Creating or deleting a project flushes the stage, other changes drop the cached project only, through the
+        # stage cache function, which runs in the VPC to reach the private API. Without a VPC every change flushes
+        self.fn_sample_stage_cache = None
+        if self.backed_api.cache_enabled:
+            self.backed_api.grant_flush_stage_cache(self.fn_sample_search_index.function)
+            if vpc is not None:
+                self.fn_sample_stage_cache = LambdaIntegation(self, 'StageCacheExample',
+                                                              func_name=f'{prefix_name}-invalidate-stage-cache',
+                                                              description='Drop cached project responses of the API stage',
+                                                              source_dir='lambda_code/stream_methods/stage_cache',
+                                                              layers=[self.fn_sample_layer.lambda_layer],
+                                                              handler='handler.invalidate_projects',
+                                                              runtime="python3.9",
+                                                              profile=stream_profile,
+                                                              vpc=vpc,
+                                                              func_environment={
+                                                                  'LOGGER_LVL': 'WARNING',
+                                                                  'LOGGER_SAMPLE_RATE': '0.01',
+                                                                  'LOGGER_MODE': os.getenv('LOGGER_MODE', 'fast')
+                                                              })
+                self.fn_sample_stage_cache.function.grant_invoke(self.fn_sample_search_index.function)
+                self.fn_sample_search_index.function.add_environment(
+                    'STAGE_CACHE_FUNCTION', self.fn_sample_stage_cache.function.function_name)
+
+        # Opt-in keep-warm schedule of the API functions, a cheaper alternative to provisioned concurrency ==> Example ==>
+        # Every WARMER_RATE_MINUTES each function gets a warm-up event and keeps WARMER_CONCURRENCY environments warm
+        warmer_concurrency = int(os.getenv('WARMER_CONCURRENCY', 0))
+        if warmer_concurrency > 0:
+            for integration in project_functions + [self.fn_sample_batch_create_project, self.fn_sample_batch_get_project,
+                                                    self.fn_sample_search_project, self.fn_sample_get_stats]:
+                integration.keep_warm(concurrency=warmer_concurrency,
+                                      rate_minutes=int(os.getenv('WARMER_RATE_MINUTES', 5)))
 
         # Add resources that will be used to access your API methods ==> Example ==> 
         self.projects = self.backed_api.version.add_resource('projects')
         self.project_id = self.projects.add_resource("{project_id}")
+        if self.fn_sample_stage_cache is not None:
+            self.backed_api.grant_invalidate_cache(self.fn_sample_stage_cache.function, self.projects)
 
         # Map your request body parameters and path parameters using the Velocity Template language ==> Example ==> 
 
@@ -115,121 +436,272 @@ class CdkBackend(Stack):
                             "#if($foreach.hasNext),#end\n" \
                             "#end\n}\n}"
 
+        # Map errors raised by the lambda functions (errors.errors in the lambda layer) to HTTP responses ==> Example ==>
+        # Their error message is a JSON document starting with the status code, e.g. {"status": 404, ...}.
+        # Anything else (timeouts, runtime crashes) is returned as a generic 500 error.
+        error_status_codes = ['400', '404', '409', '413', '429', '503']
+        internal_error_template = "#set($message = $input.path('$.errorMessage'))\n" \
+                                  "#if($message.startsWith('{\"status\": 500,'))$message\n" \
+                                  "#else{\"status\": 500, \"error\": \"InternalServerError\", " \
+                                  "\"message\": \"Internal server error\"}#end"
+        integration_responses = [apigw.IntegrationResponse(status_code='200')] + \
+                                [apigw.IntegrationResponse(status_code=status_code,
+                                                           selection_pattern=f'\\{{"status": {status_code},.*',
+                                                           response_templates={
+                                                               "application/json": "$input.path('$.errorMessage')"})
+                                 for status_code in error_status_codes] + \
+                                [apigw.IntegrationResponse(status_code='500',
+                                                           selection_pattern='\\{"status": 500,.*|(?!\\{"status": )[\\s\\S]+',
+                                                           response_templates={
+                                                               "application/json": internal_error_template})]
+        method_responses = [apigw.MethodResponse(status_code=status_code)
+                            for status_code in ['200'] + error_status_codes + ['500']]
+
         # Make models that describe your request body. Assigned to a particular method's 'request models' property ==> Example ==>
+        # Unknown attributes are rejected. Names are at most 256 characters, a description at most 65536 so that
+        # a project fits a DynamoDB item even uncompressed. The number of names on a project is not limited,
+        # membership changes that do not fit into one transaction are written in batches
+        project_attributes = ["project_id", "project_name", "description", "internal", "on_project", "version",
+                              "created_at", "updated_at"]
+        member_schema = apigw.JsonSchema(type=apigw.JsonSchemaType.STRING, min_length=1, max_length=256)
+        project_properties = {
+            "project_name": apigw.JsonSchema(type=apigw.JsonSchemaType.STRING, min_length=1, max_length=256),
+            "description": apigw.JsonSchema(type=apigw.JsonSchemaType.STRING, max_length=65536),
+            "internal": apigw.JsonSchema(type=apigw.JsonSchemaType.BOOLEAN),
+            "on_project": apigw.JsonSchema(type=apigw.JsonSchemaType.ARRAY, items=member_schema)
+        }
+
         update_project_api_model = self.backed_api.rest_api.add_model("ProjectUpdateModel",
                                                                       content_type='application/json',
                                                                       model_name="ProjectUpdate",
                                                                       schema=apigw.JsonSchema(
                                                                           schema=apigw.JsonSchemaVersion.DRAFT4,
                                                                           type=apigw.JsonSchemaType.OBJECT,
-                                                                          properties={
-                                                                              "project_name": apigw.JsonSchema(
-                                                                                  type=apigw.JsonSchemaType.STRING),
-                                                                              "description": apigw.JsonSchema(
-                                                                                  type=apigw.JsonSchemaType.STRING),
-                                                                              "internal": apigw.JsonSchema(
-                                                                                  type=apigw.JsonSchemaType.BOOLEAN),
-                                                                              "on_project": apigw.JsonSchema(
-                                                                                  type=apigw.JsonSchemaType.ARRAY)
-                                                                              },
-                                                                          required=[""]
-                                                                      ))   
-        
+                                                                          properties=project_properties,
+                                                                          additional_properties=False,
+                                                                          min_properties=1
+                                                                      ))
+
+        patch_project_api_model = self.backed_api.rest_api.add_model("ProjectPatchModel",
+                                                                     content_type='application/json',
+                                                                     model_name="ProjectPatch",
+                                                                     schema=apigw.JsonSchema(
+                                                                         schema=apigw.JsonSchemaVersion.DRAFT4,
+                                                                         type=apigw.JsonSchemaType.OBJECT,
+                                                                         properties={
+                                                                             "add_members": apigw.JsonSchema(
+                                                                                 type=apigw.JsonSchemaType.ARRAY,
+                                                                                 items=member_schema),
+                                                                             "remove_members": apigw.JsonSchema(
+                                                                                 type=apigw.JsonSchemaType.ARRAY,
+                                                                                 items=member_schema),
+                                                                             "expected_version": apigw.JsonSchema(
+                                                                                 type=apigw.JsonSchemaType.INTEGER,
+                                                                                 minimum=0)
+                                                                             },
+                                                                         additional_properties=False,
+                                                                         any_of=[apigw.JsonSchema(required=["add_members"]),
+                                                                                 apigw.JsonSchema(required=["remove_members"])]
+                                                                     ))
+
+        project_create_schema = apigw.JsonSchema(schema=apigw.JsonSchemaVersion.DRAFT4,
+                                                 type=apigw.JsonSchemaType.OBJECT,
+                                                 properties=project_properties,
+                                                 additional_properties=False,
+                                                 required=["project_name", "description",
+                                                           'internal', 'on_project'])
+
         create_project_api_model = self.backed_api.rest_api.add_model("ProjectPostModel",
                                                                       content_type='application/json',
                                                                       model_name="ProjectCreate",
-                                                                      schema=apigw.JsonSchema(
-                                                                          schema=apigw.JsonSchemaVersion.DRAFT4,
-                                                                          type=apigw.JsonSchemaType.OBJECT,
-                                                                          properties={
-                                                                              "project_name": apigw.JsonSchema(
-                                                                                  type=apigw.JsonSchemaType.STRING),
-                                                                              "description": apigw.JsonSchema(
-                                                                                  type=apigw.JsonSchemaType.STRING),
-                                                                              "internal": apigw.JsonSchema(
-                                                                                  type=apigw.JsonSchemaType.BOOLEAN),
-                                                                              "on_project": apigw.JsonSchema(
-                                                                                  type=apigw.JsonSchemaType.ARRAY)
-                                                                          },
-                                                                          required=["project_name", "description",
-                                                                                    'internal', 'on_project']
-                                                                      ))
+                                                                      schema=project_create_schema)
+
+        batch_create_project_api_model = self.backed_api.rest_api.add_model("ProjectBatchPostModel",
+                                                                            content_type='application/json',
+                                                                            model_name="ProjectCreateBatch",
+                                                                            schema=apigw.JsonSchema(
+                                                                                schema=apigw.JsonSchemaVersion.DRAFT4,
+                                                                                type=apigw.JsonSchemaType.ARRAY,
+                                                                                min_items=1,
+                                                                                max_items=1000,
+                                                                                items=project_create_schema
+                                                                            ))
+
+        batch_get_project_api_model = self.backed_api.rest_api.add_model("ProjectBatchGetModel",
+                                                                         content_type='application/json',
+                                                                         model_name="ProjectBatchGet",
+                                                                         schema=apigw.JsonSchema(
+                                                                             schema=apigw.JsonSchemaVersion.DRAFT4,
+                                                                             type=apigw.JsonSchemaType.OBJECT,
+                                                                             properties={
+                                                                                 "project_ids": apigw.JsonSchema(
+                                                                                     type=apigw.JsonSchemaType.ARRAY,
+                                                                                     min_items=1,
+                                                                                     max_items=500,
+                                                                                     items=apigw.JsonSchema(
+                                                                                         type=apigw.JsonSchemaType.STRING,
+                                                                                         min_length=1,
+                                                                                         max_length=256)),
+                                                                                 "fields": apigw.JsonSchema(
+                                                                                     type=apigw.JsonSchemaType.ARRAY,
+                                                                                     items=apigw.JsonSchema(
+                                                                                         type=apigw.JsonSchemaType.STRING,
+                                                                                         enum=project_attributes)),
+                                                                                 "consistent": apigw.JsonSchema(
+                                                                                     type=apigw.JsonSchemaType.BOOLEAN)
+                                                                             },
+                                                                             additional_properties=False,
+                                                                             required=["project_ids"]
+                                                                         ))
+
+        # Validate the request parameters, and the request body against its model, before invoking a lambda function ==> Example ==>
+        # Rejected requests get the same error document as errors raised by the lambda functions
+        body_validator = self.backed_api.rest_api.add_request_validator("BodyValidator",
+                                                                        request_validator_name=f'{prefix_name}-body-validator',
+                                                                        validate_request_body=True,
+                                                                        validate_request_parameters=True)
+        parameter_validator = self.backed_api.rest_api.add_request_validator("ParameterValidator",
+                                                                             request_validator_name=f'{prefix_name}-parameter-validator',
+                                                                             validate_request_parameters=True)
+        for response_type in [apigw.ResponseType.BAD_REQUEST_BODY, apigw.ResponseType.BAD_REQUEST_PARAMETERS]:
+            self.backed_api.rest_api.add_gateway_response(f"{response_type.response_type}Response",
+                                                          type=response_type,
+                                                          status_code='400',
+                                                          templates={
+                                                              "application/json": '{"status": 400, "error": "BadRequest", '
+                                                                                  '"message": $context.error.messageString}'})
+
+        # Query string parameters of GET /projects. Each parameter is also part of the stage cache key,
+        # cached pages differ in all of them
+        list_query_parameters = ['limit', 'next_token', 'fields', 'consistent', 'all', 'segments', 'member', 'order',
+                                 'changed_since']
+
+        # In router mode the project routes are proxied to the router function ==> Example ==>
+        # It maps each request to the event of its handler and sets the status code of the response itself,
+        # so request templates and integration responses are not used. The cached GET methods keep their cache keys
+        router_mode = self.backend_mode == 'router'
+        if router_mode:
+            router_integration = apigw.LambdaIntegration(handler=self.fn_sample_router.target, proxy=True)
+            router_get_integration = apigw.LambdaIntegration(handler=self.fn_sample_router.target,
+                                                             proxy=True,
+                                                             cache_key_parameters=["method.request.path.project_id"])
+            router_list_integration = apigw.LambdaIntegration(handler=self.fn_sample_router.target,
+                                                              proxy=True,
+                                                              cache_key_parameters=[f"method.request.querystring.{name}"
+                                                                                    for name in list_query_parameters])
 
         # Define  HTTP method/integration requests and responses for your methods  ==> Example ==>
         # Gets a project that has a project_id specified in a path parameter
         self.project_id.add_method(http_method='GET',
-                                   integration=apigw.LambdaIntegration(handler=self.fn_sample_get_project.function,
-                                                                       proxy=False,
-                                                                       integration_responses=[apigw.IntegrationResponse(
-                                                                           status_code='200')],
-                                                                       request_parameters={
-                                                                           "integration.request.header.x-apigw-api-id": "method.request.header.x-apigw-api-id",
-                                                                           "integration.request.path.project_id": "method.request.path.project_id"
-                                                                       },
-                                                                       passthrough_behavior=apigw.PassthroughBehavior.WHEN_NO_TEMPLATES,
-                                                                       request_templates={
-                                                                           "application/json": parameter_mapping}
-                                                                       ),
+                                   integration=router_get_integration if router_mode else
+                                   apigw.LambdaIntegration(handler=self.fn_sample_get_project.target,
+                                                           proxy=False,
+                                                           integration_responses=integration_responses,
+                                                           request_parameters={
+                                                               "integration.request.header.x-apigw-api-id": "method.request.header.x-apigw-api-id",
+                                                               "integration.request.path.project_id": "method.request.path.project_id"
+                                                           },
+                                                           cache_key_parameters=["method.request.path.project_id"],
+                                                           passthrough_behavior=apigw.PassthroughBehavior.WHEN_NO_TEMPLATES,
+                                                           request_templates={
+                                                               "application/json": parameter_mapping}
+                                                           ),
                                    request_parameters={"method.request.header.x-apigw-api-id": True,
                                                        "method.request.path.project_id": True},
-                                   method_responses=[apigw.MethodResponse(status_code='200')])
+                                   request_validator=parameter_validator,
+                                   method_responses=method_responses)
 
-        # Lists all projects within the database
+        # Lists a page of projects within the database. Optional query string parameters:
+        # limit (page size), next_token (cursor from the previous page), fields (comma separated projection),
+        # consistent (true for strongly consistent reads), all (true to read every project with a parallel scan),
+        # segments (parallel scan segment count), member (only the projects of this member, read from the membership index)
+        # order (newest or oldest first by created_at), changed_since (ISO 8601 timestamp, projects updated after it
+        # ordered by updated_at)
         self.projects.add_method(http_method='GET',
-                                 integration=apigw.LambdaIntegration(handler=self.fn_sample_get_project.function,
-                                                                     proxy=False,
-                                                                     integration_responses=[apigw.IntegrationResponse(
-                                                                         status_code='200')],
-                                                                     request_parameters={
-                                                                         "integration.request.header.x-apigw-api-id": "method.request.header.x-apigw-api-id"
-                                                                     }),
-                                 request_parameters={"method.request.header.x-apigw-api-id": True},
-                                 method_responses=[apigw.MethodResponse(status_code='200')])
+                                 integration=router_list_integration if router_mode else
+                                 apigw.LambdaIntegration(handler=self.fn_sample_get_project.target,
+                                                         proxy=False,
+                                                         integration_responses=integration_responses,
+                                                         request_parameters=dict({
+                                                             "integration.request.header.x-apigw-api-id": "method.request.header.x-apigw-api-id"
+                                                         }, **{f"integration.request.querystring.{name}": f"method.request.querystring.{name}"
+                                                               for name in list_query_parameters}),
+                                                         cache_key_parameters=[f"method.request.querystring.{name}"
+                                                                               for name in list_query_parameters],
+                                                         passthrough_behavior=apigw.PassthroughBehavior.WHEN_NO_TEMPLATES,
+                                                         request_templates={
+                                                             "application/json": parameter_mapping}),
+                                 request_parameters=dict({"method.request.header.x-apigw-api-id": True},
+                                                         **{f"method.request.querystring.{name}": False
+                                                            for name in list_query_parameters}),
+                                 request_validator=parameter_validator,
+                                 method_responses=method_responses)
 
         # Modifies database entry that has a project_id specified in the path parameter, and modifications specified in the request body
         self.project_id.add_method(http_method='PUT',
-                                   integration=apigw.LambdaIntegration(handler=self.fn_sample_update_project.function,
-                                                                       proxy=False,
-                                                                       integration_responses=[apigw.IntegrationResponse(
-                                                                           status_code='200')],
-                                                                       request_parameters={
-                                                                           "integration.request.header.x-apigw-api-id": "method.request.header.x-apigw-api-id",
-                                                                       },
-                                                                       passthrough_behavior=apigw.PassthroughBehavior.WHEN_NO_TEMPLATES,
-                                                                       request_templates={
-                                                                           "application/json": parameter_mapping}),
+                                   integration=router_integration if router_mode else
+                                   apigw.LambdaIntegration(handler=self.fn_sample_update_project.target,
+                                                           proxy=False,
+                                                           integration_responses=integration_responses,
+                                                           request_parameters={
+                                                               "integration.request.header.x-apigw-api-id": "method.request.header.x-apigw-api-id",
+                                                           },
+                                                           passthrough_behavior=apigw.PassthroughBehavior.WHEN_NO_TEMPLATES,
+                                                           request_templates={
+                                                               "application/json": parameter_mapping}),
                                    request_parameters={"method.request.header.x-apigw-api-id": True, },
                                    request_models={
                                        "application/json": update_project_api_model
                                    },
-                                   method_responses=[apigw.MethodResponse(status_code='200')])
+                                   request_validator=body_validator,
+                                   method_responses=method_responses)
+
+        # Adds people to and removes people from the project with the project_id specified in the path parameter,
+        # without sending the whole on_project list. Only the updated attributes are returned
+        self.project_id.add_method(http_method='PATCH',
+                                   integration=router_integration if router_mode else
+                                   apigw.LambdaIntegration(handler=self.fn_sample_patch_project.target,
+                                                           proxy=False,
+                                                           integration_responses=integration_responses,
+                                                           request_parameters={
+                                                               "integration.request.header.x-apigw-api-id": "method.request.header.x-apigw-api-id",
+                                                           },
+                                                           passthrough_behavior=apigw.PassthroughBehavior.WHEN_NO_TEMPLATES,
+                                                           request_templates={
+                                                               "application/json": parameter_mapping}),
+                                   request_parameters={"method.request.header.x-apigw-api-id": True, },
+                                   request_models={
+                                       "application/json": patch_project_api_model
+                                   },
+                                   request_validator=body_validator,
+                                   method_responses=method_responses)
 
         # Deletes a database entry that has the project_id specified in the path parameter
         self.project_id.add_method(http_method='DELETE',
-                                   integration=apigw.LambdaIntegration(handler=self.fn_sample_delete_project.function,
-                                                                       proxy=False,
-                                                                       integration_responses=[apigw.IntegrationResponse(
-                                                                           status_code='200')],
-                                                                       request_parameters={
-                                                                           "integration.request.header.x-apigw-api-id": "method.request.header.x-apigw-api-id",
-                                                                           "integration.request.path.project_id": "method.request.path.project_id"
-                                                                       },
-                                                                       passthrough_behavior=apigw.PassthroughBehavior.WHEN_NO_TEMPLATES,
-                                                                       request_templates={
-                                                                           "application/json": parameter_mapping}),
+                                   integration=router_integration if router_mode else
+                                   apigw.LambdaIntegration(handler=self.fn_sample_delete_project.target,
+                                                           proxy=False,
+                                                           integration_responses=integration_responses,
+                                                           request_parameters={
+                                                               "integration.request.header.x-apigw-api-id": "method.request.header.x-apigw-api-id",
+                                                               "integration.request.path.project_id": "method.request.path.project_id"
+                                                           },
+                                                           passthrough_behavior=apigw.PassthroughBehavior.WHEN_NO_TEMPLATES,
+                                                           request_templates={
+                                                               "application/json": parameter_mapping}),
                                    request_parameters={"method.request.header.x-apigw-api-id": True,
                                                        "method.request.path.project_id": True},
-                                   method_responses=[apigw.MethodResponse(status_code='200')])
+                                   request_validator=parameter_validator,
+                                   method_responses=method_responses)
 
         self.project_create = self.projects.add_resource("create")
 
         # Creates a new project with an automatically assigned project_id and other attributes specified in the request body
         self.project_create.add_method(http_method='POST',
-                                       integration=apigw.LambdaIntegration(
-                                           handler=self.fn_sample_create_project.function,
+                                       integration=router_integration if router_mode else apigw.LambdaIntegration(
+                                           handler=self.fn_sample_create_project.target,
                                            proxy=False,
-                                           integration_responses=[apigw.IntegrationResponse(
-                                               status_code='200')],
+                                           integration_responses=integration_responses,
                                            request_parameters={
                                                "integration.request.header.x-apigw-api-id": "method.request.header.x-apigw-api-id"
                                            }),
@@ -237,4 +709,84 @@ class CdkBackend(Stack):
                                        request_models={
                                            "application/json": create_project_api_model
                                        },
-                                       method_responses=[apigw.MethodResponse(status_code='200')])
+                                       request_validator=body_validator,
+                                       method_responses=method_responses)
+
+        self.project_batch = self.projects.add_resource("batch")
+
+        # Creates many projects at once, the request body is an array of project bodies
+        self.project_batch.add_method(http_method='POST',
+                                      integration=apigw.LambdaIntegration(
+                                          handler=self.fn_sample_batch_create_project.target,
+                                          proxy=False,
+                                          integration_responses=integration_responses,
+                                          request_parameters={
+                                              "integration.request.header.x-apigw-api-id": "method.request.header.x-apigw-api-id"
+                                          }),
+                                      request_parameters={"method.request.header.x-apigw-api-id": True},
+                                      request_models={
+                                          "application/json": batch_create_project_api_model
+                                      },
+                                      request_validator=body_validator,
+                                      method_responses=method_responses)
+
+        self.project_batch_get = self.projects.add_resource("batch-get")
+
+        # Gets many projects at once, the request body lists their project_ids and an optional projection
+        self.project_batch_get.add_method(http_method='POST',
+                                          integration=apigw.LambdaIntegration(
+                                              handler=self.fn_sample_batch_get_project.target,
+                                              proxy=False,
+                                              integration_responses=integration_responses,
+                                              request_parameters={
+                                                  "integration.request.header.x-apigw-api-id": "method.request.header.x-apigw-api-id"
+                                              }),
+                                          request_parameters={"method.request.header.x-apigw-api-id": True},
+                                          request_models={
+                                              "application/json": batch_get_project_api_model
+                                          },
+                                          request_validator=body_validator,
+                                          method_responses=method_responses)
+
+        self.project_search = self.projects.add_resource("search")
+
+        # Searches project names and descriptions. Query string parameters: q (search words, all of them must match),
+        # limit (number of ranked results), fields (comma separated projection)
+        self.project_search.add_method(http_method='GET',
+                                       integration=apigw.LambdaIntegration(
+                                           handler=self.fn_sample_search_project.target,
+                                           proxy=False,
+                                           integration_responses=integration_responses,
+                                           request_parameters={
+                                               "integration.request.header.x-apigw-api-id": "method.request.header.x-apigw-api-id"
+                                           },
+                                           passthrough_behavior=apigw.PassthroughBehavior.WHEN_NO_TEMPLATES,
+                                           request_templates={
+                                               "application/json": parameter_mapping}),
+                                       request_parameters={"method.request.header.x-apigw-api-id": True,
+                                                           "method.request.querystring.q": True,
+                                                           "method.request.querystring.limit": False,
+                                                           "method.request.querystring.fields": False},
+                                       request_validator=parameter_validator,
+                                       method_responses=method_responses)
+
+        self.project_stats = self.projects.add_resource("stats")
+
+        # Reads the project counters. Optional query string parameters: member (project count of one member),
+        # members (true to include the project count of every member)
+        self.project_stats.add_method(http_method='GET',
+                                      integration=apigw.LambdaIntegration(
+                                          handler=self.fn_sample_get_stats.target,
+                                          proxy=False,
+                                          integration_responses=integration_responses,
+                                          request_parameters={
+                                              "integration.request.header.x-apigw-api-id": "method.request.header.x-apigw-api-id"
+                                          },
+                                          passthrough_behavior=apigw.PassthroughBehavior.WHEN_NO_TEMPLATES,
+                                          request_templates={
+                                              "application/json": parameter_mapping}),
+                                      request_parameters={"method.request.header.x-apigw-api-id": True,
+                                                          "method.request.querystring.member": False,
+                                                          "method.request.querystring.members": False},
+                                      request_validator=parameter_validator,
+                                      method_responses=method_responses)
@@ -0,0 +1,129 @@
+"""
+Tests run with the Lambda layer on the path, against moto's DynamoDB mock:
+
+    pip install -r tests/requirements.txt
+    python -m pytest tests
+"""
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAYER_DIR = os.path.join(ROOT_DIR, 'lambda_layer', 'python')
+sys.path.insert(0, LAYER_DIR)
+
+os.environ.setdefault('DATABASE', 'test-projects')
+os.environ.setdefault('MEMBERSHIP_DATABASE', 'test-membership')
+os.environ.setdefault('STATS_DATABASE', 'test-stats')
+os.environ.setdefault('AWS_REGION', 'eu-west-1')
+os.environ.setdefault('AWS_DEFAULT_REGION', os.environ['AWS_REGION'])
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+os.environ.setdefault('LOGGER_LVL', 'WARNING')
+
+
+class FakeContext:
+    """Minimal stand-in for the Lambda context object"""
+
+    function_name = 'test'
+    aws_request_id = '00000000-0000-0000-0000-000000000000'
+    invoked_function_arn = 'arn:aws:lambda:eu-west-1:000000000000:function:test'
+    memory_limit_in_mb = 128
+
+    def get_remaining_time_in_millis(self):
+        return 60000
+
+
+class ThrottlingClient:
+    """DynamoDB client that never processes the project items and keys matching is_throttled"""
+
+    def __init__(self, client, is_throttled):
+        self.client = client
+        self.is_throttled = is_throttled
+        self.calls = 0
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        self.calls += 1
+        (table_name, requests), = RequestItems.items()
+        unprocessed = [request for request in requests if self.is_throttled(request['PutRequest']['Item'])]
+        processed = [request for request in requests if request not in unprocessed]
+        if processed:
+            self.client.batch_write_item(RequestItems={table_name: processed})
+        return {'UnprocessedItems': {table_name: unprocessed} if unprocessed else {}}
+
+    def batch_get_item(self, RequestItems, **kwargs):
+        self.calls += 1
+        (table_name, request), = RequestItems.items()
+        unprocessed = [key for key in request['Keys'] if self.is_throttled(key)]
+        processed = [key for key in request['Keys'] if not self.is_throttled(key)]
+        response = {'Responses': {}}
+        if processed:
+            response = self.client.batch_get_item(RequestItems={table_name: dict(request, Keys=processed)})
+        if unprocessed:
+            response['UnprocessedKeys'] = {table_name: dict(request, Keys=unprocessed)}
+        return response
+
+
+def load_handler_module(source_dir):
+    """Imports handler.py of a function source directory below lambda_code under a unique module name"""
+    spec = importlib.util.spec_from_file_location(f'{source_dir.replace("/", "_")}_handler',
+                                                  os.path.join(ROOT_DIR, 'lambda_code', source_dir, 'handler.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def key_schema(key_names):
+    return [{'AttributeName': name, 'KeyType': key_type} for name, key_type in zip(key_names, ('HASH', 'RANGE'))]
+
+
+def create_table(client, table_name, key_names=('project_id',), indexes=None):
+    indexes = indexes or {}
+    attribute_names = dict.fromkeys(list(key_names) + [name for names in indexes.values() for name in names])
+    table_arguments = {}
+    if indexes:
+        table_arguments['GlobalSecondaryIndexes'] = [{'IndexName': index_name, 'KeySchema': key_schema(names),
+                                                      'Projection': {'ProjectionType': 'ALL'}}
+                                                     for index_name, names in indexes.items()]
+    client.create_table(TableName=table_name,
+                        KeySchema=key_schema(key_names),
+                        AttributeDefinitions=[{'AttributeName': name, 'AttributeType': 'S'} for name in attribute_names],
+                        BillingMode='PAY_PER_REQUEST',
+                        **table_arguments)
+
+
+@pytest.fixture
+def dynamodb():
+    moto = pytest.importorskip('moto')
+    mock = getattr(moto, 'mock_dynamodb', None) or moto.mock_aws
+    import boto3
+
+    with mock():
+        yield boto3.client('dynamodb', region_name=os.environ['AWS_REGION'])
+
+
+@pytest.fixture
+def repository(dynamodb):
+    """Repository on empty projects and membership tables, shaped as in the backend stack"""
+    from database.repository import INDEX_SORT_KEYS, ProjectRepository
+
+    repository = ProjectRepository(client=dynamodb)
+    create_table(dynamodb, repository.table_name,
+                 indexes={index_name: ('entity_type', sort_key) for index_name, sort_key in INDEX_SORT_KEYS.items()})
+    create_table(dynamodb, repository.membership_table_name, key_names=('member', 'project_id'))
+    return repository
+
+
+@pytest.fixture
+def stats(dynamodb):
+    """Project stats on an empty stats table"""
+    from database.stats import ProjectStats
+
+    stats = ProjectStats(dynamodb)
+    create_table(dynamodb, stats.table_name, key_names=('counter', 'key'))
+    return stats
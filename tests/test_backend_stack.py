@@ -0,0 +1,156 @@
+import json
+import os
+
+import pytest
+
+from conftest import ROOT_DIR
+
+assertions = pytest.importorskip('aws_cdk.assertions')
+
+# Performance profile of every function: (architecture, memory in MB, timeout in seconds, reserved concurrency)
+PROFILES = {
+    'create-project': ('arm64', 512, 29, None),
+    'list-project': ('arm64', 1024, 29, None),
+    'update-project': ('arm64', 512, 29, None),
+    'patch-project': ('arm64', 512, 29, None),
+    'delete-project': ('arm64', 512, 29, None),
+    'batch-create-project': ('arm64', 1769, 29, 10),
+    'batch-get-project': ('arm64', 1769, 29, 10),
+    'search-project': ('arm64', 1024, 29, None),
+    'search-index': ('arm64', 512, 60, None),
+    'project-stats': ('arm64', 1024, 29, None),
+    'update-stats': ('arm64', 512, 60, None),
+}
+
+
+def synth_backend(**environment):
+    from aws_cdk import App, Environment
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.chdir(ROOT_DIR)
+        monkeypatch.syspath_prepend(ROOT_DIR)
+        monkeypatch.setenv('AWS_ACCOUNT', '123456789012')
+        for name in ('BACKEND_MODE', 'API_CACHE_CLUSTER_SIZE', 'WARMER_CONCURRENCY'):
+            monkeypatch.delenv(name, raising=False)
+        for name, value in environment.items():
+            monkeypatch.setenv(name, value)
+        from stacks.backend_stack import CdkBackend
+        from stacks.networking_stack import CdkNetworking
+
+        app = App()
+        env = Environment(account=os.environ['AWS_ACCOUNT'], region=os.environ['AWS_REGION'])
+        networking = CdkNetworking(app, 'networking', env=env)
+        backend = CdkBackend(app, 'backend', endpoint_id=networking.vpc.vpc_endpoint_api,
+                             vpc=networking.vpc.app_vpc, env=env)
+        return assertions.Template.from_stack(backend)
+
+
+@pytest.fixture(scope='module')
+def template():
+    """Backend stack synthesized with provisioned concurrency on the get function and reserved batch concurrency"""
+    return synth_backend(GET_PROVISIONED_CONCURRENCY='2', GET_MAX_PROVISIONED_CONCURRENCY='5',
+                         BATCH_RESERVED_CONCURRENCY='10')
+
+
+@pytest.fixture(scope='module')
+def cached_template():
+    """Backend stack synthesized with the stage cache enabled"""
+    return synth_backend(API_CACHE_CLUSTER_SIZE='0.5')
+
+
+def prefix_name():
+    return f"{os.environ['ENVIRONMENT'].lower()}-{os.environ['APP_NAME'].lower()}"
+
+
+def logical_id(template, resource_type, properties):
+    resources = template.find_resources(resource_type, {'Properties': properties})
+    assert len(resources) == 1, f'{len(resources)} {resource_type} resources match {properties}'
+    return next(iter(resources))
+
+
+@pytest.mark.parametrize('name', sorted(PROFILES))
+def test_function_performance_profile(template, name):
+    architecture, memory_size, timeout, reserved_concurrency = PROFILES[name]
+    function = template.find_resources('AWS::Lambda::Function', {'Properties': {
+        'FunctionName': f'{prefix_name()}-{name}'}})
+    assert len(function) == 1
+    properties = next(iter(function.values()))['Properties']
+    assert properties['Architectures'] == [architecture]
+    assert properties['MemorySize'] == memory_size
+    assert properties['Timeout'] == timeout
+    assert properties.get('ReservedConcurrentExecutions') == reserved_concurrency
+
+
+def test_get_function_has_provisioned_concurrency_on_the_live_alias(template):
+    function_id = logical_id(template, 'AWS::Lambda::Function', {'FunctionName': f'{prefix_name()}-list-project'})
+    alias_id = logical_id(template, 'AWS::Lambda::Alias', {'FunctionName': {'Ref': function_id}, 'Name': 'live'})
+    template.has_resource_properties('AWS::Lambda::Alias', {
+        'Name': 'live', 'ProvisionedConcurrencyConfig': {'ProvisionedConcurrentExecutions': 2}})
+    template.resource_count_is('AWS::Lambda::Alias', 1)
+
+    target_id = logical_id(template, 'AWS::ApplicationAutoScaling::ScalableTarget', {
+        'MinCapacity': 2, 'MaxCapacity': 5, 'ScalableDimension': 'lambda:function:ProvisionedConcurrency',
+        'ServiceNamespace': 'lambda'})
+    target = template.find_resources('AWS::ApplicationAutoScaling::ScalableTarget')[target_id]
+    assert alias_id in json.dumps(target['Properties']['ResourceId'])
+    template.has_resource_properties('AWS::ApplicationAutoScaling::ScalingPolicy', {
+        'ScalingTargetId': {'Ref': target_id},
+        'TargetTrackingScalingPolicyConfiguration': {
+            'PredefinedMetricSpecification': {'PredefinedMetricType': 'LambdaProvisionedConcurrencyUtilization'},
+            'TargetValue': 0.7}})
+
+
+def test_get_methods_invoke_the_alias(template):
+    function_id = logical_id(template, 'AWS::Lambda::Function', {'FunctionName': f'{prefix_name()}-list-project'})
+    alias_id = logical_id(template, 'AWS::Lambda::Alias', {'FunctionName': {'Ref': function_id}})
+    get_methods = [method for method in template.find_resources('AWS::ApiGateway::Method',
+                                                                {'Properties': {'HttpMethod': 'GET'}}).values()
+                   if alias_id in json.dumps(method['Properties']['Integration'].get('Uri'))]
+    # GET /projects and GET /projects/{project_id}
+    assert len(get_methods) == 2
+    for method in template.find_resources('AWS::ApiGateway::Method').values():
+        uri = json.dumps(method['Properties']['Integration'].get('Uri'))
+        assert function_id not in uri, 'an integration invokes $LATEST of the get function instead of its alias'
+        assert '$LATEST' not in uri
+    permissions = template.find_resources('AWS::Lambda::Permission', {'Properties': {
+        'Principal': 'apigateway.amazonaws.com'}})
+    assert any(permission['Properties']['FunctionName'] == {'Ref': alias_id} for permission in permissions.values())
+    assert not any(permission['Properties']['FunctionName'] == {'Fn::GetAtt': [function_id, 'Arn']}
+                   for permission in permissions.values())
+
+
+def test_member_lists_are_not_capped_at_the_transaction_size(template):
+    schemas = {model['Properties']['Name']: model['Properties']['Schema']
+               for model in template.find_resources('AWS::ApiGateway::Model').values()}
+    member_lists = [schemas['ProjectUpdate']['properties']['on_project'],
+                    schemas['ProjectCreate']['properties']['on_project'],
+                    schemas['ProjectPatch']['properties']['add_members'],
+                    schemas['ProjectPatch']['properties']['remove_members']]
+    for member_list in member_lists:
+        assert member_list['type'] == 'array'
+        assert 'maxItems' not in member_list
+
+
+def test_the_stage_cache_does_not_add_a_projects_stream_reader(template, cached_template):
+    for synthesized in (template, cached_template):
+        mappings = synthesized.find_resources('AWS::Lambda::EventSourceMapping')
+        projects_stream = [mapping for mapping in mappings.values()
+                           if 'BackedDynamoDBExample' in json.dumps(mapping['Properties']['EventSourceArn'])]
+        assert len(projects_stream) == 2
+
+
+def test_the_stage_cache_function_invalidates_projects_from_the_vpc(cached_template):
+    function = cached_template.find_resources('AWS::Lambda::Function', {'Properties': {
+        'FunctionName': f'{prefix_name()}-invalidate-stage-cache'}})
+    (function_id, properties), = ((key, value['Properties']) for key, value in function.items())
+    assert properties['VpcConfig']['SubnetIds']
+    assert {'API_ID', 'API_URL'} <= set(properties['Environment']['Variables'])
+
+    policies = json.dumps(cached_template.find_resources('AWS::IAM::Policy'))
+    assert 'execute-api:InvalidateCache' in policies
+    assert 'apigateway:DELETE' in policies
+    index_function = cached_template.find_resources('AWS::Lambda::Function', {'Properties': {
+        'FunctionName': f'{prefix_name()}-search-index'}})
+    variables = next(iter(index_function.values()))['Properties']['Environment']['Variables']
+    assert variables['STAGE_CACHE_FUNCTION'] == {'Ref': function_id}
+    assert {'API_ID', 'API_STAGE'} <= set(variables)
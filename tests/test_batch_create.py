@@ -0,0 +1,54 @@
+import pytest
+
+from database import batch
+from errors.errors import BadRequestError
+from conftest import FakeContext, ThrottlingClient, load_handler_module
+
+
+def new_project(name, on_project=()):
+    return {'project_name': name, 'description': 'Batch', 'internal': True, 'on_project': list(on_project)}
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(batch, 'backoff_delay', lambda attempt: 0)
+
+
+@pytest.fixture
+def create_handler(repository, monkeypatch):
+    handler = load_handler_module('post_methods/batch_create_projects')
+    monkeypatch.setattr(handler, 'get_repository', lambda: repository)
+    return handler
+
+
+def test_batch_create_reports_each_project(create_handler, repository):
+    event = [new_project('First', ['Member']), {'project_name': 'Incomplete'}, new_project('Third')]
+
+    response = create_handler.create_projects(event, FakeContext())
+
+    assert (response['created'], response['failed'], response['invalid']) == (2, 0, 1)
+    outcomes = [result['outcome'] for result in response['results']]
+    assert outcomes == ['created', 'invalid', 'created']
+    assert response['results'][1]['message'] == 'Missing attributes: description, internal, on_project'
+    first = repository.get(response['results'][0]['project_id'])
+    assert first['project_name'] == 'First' and first['on_project'] == ['Member']
+
+
+def test_batch_create_reports_projects_left_unprocessed(create_handler, repository, monkeypatch):
+    client = ThrottlingClient(repository.client, lambda item: item.get('project_name') == {'S': 'Throttled'})
+    monkeypatch.setattr(repository, '_client', client)
+
+    response = create_handler.create_projects([new_project('Kept'), new_project('Throttled')], FakeContext())
+
+    kept_id, throttled_id = (result['project_id'] for result in response['results'])
+    assert (response['created'], response['failed']) == (1, 1)
+    assert [result['outcome'] for result in response['results']] == ['created', 'failed']
+    assert client.calls == batch.BATCH_MAX_ATTEMPTS
+    assert repository.get(kept_id) is not None
+    assert repository.get(throttled_id) is None
+
+
+@pytest.mark.parametrize('event', [[], {}, [new_project('Name')] * 1001])
+def test_batch_create_rejects_invalid_bodies(create_handler, event):
+    with pytest.raises(BadRequestError):
+        create_handler.create_projects.__wrapped__(event, FakeContext())
@@ -0,0 +1,53 @@
+import pytest
+
+from database import batch
+from errors.errors import BadRequestError
+from conftest import FakeContext, ThrottlingClient, load_handler_module
+
+
+def new_project(project_id):
+    return {'project_id': project_id, 'project_name': project_id, 'description': 'Batch', 'internal': True,
+            'on_project': []}
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(batch, 'backoff_delay', lambda attempt: 0)
+
+
+@pytest.fixture
+def get_handler(repository, monkeypatch):
+    handler = load_handler_module('post_methods/batch_get_projects')
+    monkeypatch.setattr(handler, 'get_repository', lambda: repository)
+    return handler
+
+
+def test_batch_get_splits_found_missing_and_unprocessed(get_handler, repository, monkeypatch):
+    for project_id in ('p1', 'p2'):
+        repository.create(new_project(project_id))
+    client = ThrottlingClient(repository.client, lambda key: key['project_id'] == {'S': 'p2'})
+    monkeypatch.setattr(repository, '_client', client)
+
+    response = get_handler.get_projects({'project_ids': ['p1', 'p2', 'p3', 'p1'], 'fields': ['project_name']},
+                                        FakeContext())
+
+    assert response['Projects'] == {'p1': {'project_id': 'p1', 'project_name': 'p1'}}
+    assert response['missing'] == ['p3']
+    assert response['unprocessed'] == ['p2']
+    assert client.calls == batch.BATCH_MAX_ATTEMPTS
+
+
+def test_batch_get_reads_chunks_in_parallel(get_handler, repository):
+    project_ids = [f'p{number:03}' for number in range(batch.BATCH_GET_SIZE + 20)]
+    repository.batch_create([new_project(project_id) for project_id in project_ids])
+
+    response = get_handler.get_projects({'project_ids': project_ids + ['missing']}, FakeContext())
+
+    assert sorted(response['Projects']) == project_ids
+    assert response['missing'] == ['missing'] and response['unprocessed'] == []
+
+
+@pytest.mark.parametrize('event', [{}, {'project_ids': []}, {'project_ids': ['p1'] * 501}, ['p1']])
+def test_batch_get_rejects_invalid_bodies(get_handler, event):
+    with pytest.raises(BadRequestError):
+        get_handler.get_projects.__wrapped__(event, FakeContext())
@@ -0,0 +1,73 @@
+import pytest
+
+from cache.cache import ReadThroughCache
+from conftest import FakeContext, load_handler_module
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ReadThroughCache(max_size=2, ttl=30)
+    cache.put('a', 1, 1)
+    cache.put('b', 2, 1)
+    assert cache.read_through('a', lambda: pytest.fail('a is cached'), lambda: pytest.fail('a is fresh')) == 1
+    cache.put('c', 3, 1)
+
+    assert list(cache.entries) == ['a', 'c']
+    assert cache.stats['evictions'] == 1
+
+
+def test_expired_entries_are_revalidated_by_version():
+    clock, loads = Clock(), []
+    cache = ReadThroughCache(max_size=10, ttl=30, clock=clock)
+    version = {'p1': 1}
+
+    def load():
+        loads.append('p1')
+        return {'version': version['p1']}, version['p1']
+
+    assert cache.read_through('p1', load, lambda: version['p1']) == {'version': 1}
+    clock.now = 10
+    assert cache.read_through('p1', load, lambda: version['p1']) == {'version': 1}
+    clock.now = 40
+    assert cache.read_through('p1', load, lambda: version['p1']) == {'version': 1}
+    assert loads == ['p1']
+    assert cache.stats == {'hits': 1, 'misses': 1, 'revalidated': 1, 'evictions': 0}
+
+    version['p1'] = 2
+    clock.now = 80
+    assert cache.read_through('p1', load, lambda: version['p1']) == {'version': 2}
+    assert loads == ['p1', 'p1']
+
+
+def test_missing_records_are_not_cached():
+    cache = ReadThroughCache(max_size=10, ttl=30)
+    assert cache.read_through('p1', lambda: (None, None), lambda: None) is None
+    assert 'p1' not in cache.entries
+
+
+def test_get_emits_the_cache_counters_as_metrics(repository, monkeypatch):
+    handler = load_handler_module('get_methods/get_project')
+    monkeypatch.setattr(handler, 'get_repository', lambda: repository)
+    monkeypatch.setattr(handler, 'project_cache', ReadThroughCache(max_size=10, ttl=30))
+    emitted = []
+    monkeypatch.setattr(handler.metrics, 'put_metric',
+                        lambda name, value, unit, operation: emitted.append((operation, name, value)))
+    repository.create({'project_id': 'p1', 'project_name': 'Name', 'description': 'Text', 'internal': False,
+                       'on_project': []})
+    event = {'params': {'path': {'project_id': 'p1'}}}
+
+    handler.get_project(event, FakeContext())
+    handler.get_project(event, FakeContext())
+
+    cache_metrics = [(name, value) for operation, name, value in emitted if operation == 'ProjectCache']
+    assert cache_metrics == [('CacheHits', 0), ('CacheMisses', 1), ('CacheRevalidations', 0), ('CacheEvictions', 0),
+                             ('CacheSize', 1),
+                             ('CacheHits', 1), ('CacheMisses', 0), ('CacheRevalidations', 0), ('CacheEvictions', 0),
+                             ('CacheSize', 1)]
@@ -0,0 +1,70 @@
+import base64
+
+import pytest
+
+from database.compact import COMPRESSED_DESCRIPTION, DESCRIPTION_COMPRESS_MIN_BYTES, compact_changes, \
+    compact_project, load_image, load_project
+from database.serializer import serialize_item
+
+LONG_DESCRIPTION = 'Keeps the project catalogue in sync. ' * 100
+
+
+def stored(project):
+    return serialize_item(compact_project(project))
+
+
+def test_long_descriptions_are_stored_compressed():
+    item = stored({'project_id': 'p1', 'description': LONG_DESCRIPTION})
+
+    assert 'description' not in item
+    assert len(item[COMPRESSED_DESCRIPTION]['B']) < len(LONG_DESCRIPTION)
+    assert load_project(item) == {'project_id': 'p1', 'description': LONG_DESCRIPTION, 'on_project': []}
+
+
+@pytest.mark.parametrize('description', ['Short', 'x' * (DESCRIPTION_COMPRESS_MIN_BYTES - 1), None])
+def test_short_and_non_text_descriptions_are_stored_as_they_are(description):
+    item = stored({'project_id': 'p1', 'description': description})
+
+    assert COMPRESSED_DESCRIPTION not in item
+    assert load_project(item)['description'] == description
+
+
+def test_changing_the_description_removes_the_other_form():
+    assert compact_changes({'description': 'Short'}) == ({'description': 'Short'}, [COMPRESSED_DESCRIPTION])
+    changes, removed = compact_changes({'description': LONG_DESCRIPTION})
+    assert list(changes) == [COMPRESSED_DESCRIPTION] and removed == ['description']
+
+
+def test_members_are_stored_as_a_string_set():
+    item = stored({'project_id': 'p1', 'on_project': ['Mike Lee', 'Jane Roe', 'Mike Lee']})
+
+    assert item['on_project'] == {'SS': ['Jane Roe', 'Mike Lee']}
+    assert sorted(load_project(item)['on_project']) == ['Jane Roe', 'Mike Lee']
+    assert compact_changes({'on_project': []}) == ({}, ['on_project'])
+    assert load_project(stored({'project_id': 'p1', 'on_project': []}))['on_project'] == []
+    # Values a set can not hold are stored unchanged
+    assert stored({'on_project': ['Jane Roe', '']})['on_project'] == {'L': [{'S': 'Jane Roe'}, {'S': ''}]}
+
+
+def test_items_written_before_compaction_load_unchanged():
+    item = serialize_item({'project_id': 'p1', 'description': LONG_DESCRIPTION, 'on_project': ['Jane Roe']})
+    assert load_project(item) == {'project_id': 'p1', 'description': LONG_DESCRIPTION, 'on_project': ['Jane Roe']}
+
+
+def test_stream_images_carry_the_compressed_description_base64_encoded():
+    item = stored({'project_id': 'p1', 'description': LONG_DESCRIPTION, 'on_project': ['Jane Roe']})
+    image = dict(item, **{COMPRESSED_DESCRIPTION: {'B': base64.b64encode(item[COMPRESSED_DESCRIPTION]['B']).decode()}})
+
+    assert load_image({'NewImage': image}, 'NewImage')['description'] == LONG_DESCRIPTION
+    assert load_image({'NewImage': image}, 'OldImage') is None
+    tombstone = serialize_item({'project_id': 'p1', 'deleted': True})
+    assert load_image({'OldImage': tombstone}, 'OldImage') is None
+
+
+def test_stored_projects_round_trip_through_dynamodb(repository):
+    project = {'project_id': 'p1', 'project_name': 'Catalogue', 'description': LONG_DESCRIPTION, 'internal': True,
+               'on_project': ['Jane Roe', 'Mike Lee']}
+    repository.create(project)
+
+    loaded = repository.get('p1')
+    assert {key: loaded[key] for key in project} == project
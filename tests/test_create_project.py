@@ -0,0 +1,37 @@
+import pytest
+
+from conftest import FakeContext, load_handler_module
+from errors.errors import BadRequestError
+
+PROJECT = {'project_name': 'Name', 'description': 'Text', 'internal': False, 'on_project': ['Jane Roe']}
+
+
+@pytest.fixture
+def create_project(repository, monkeypatch):
+    handler = load_handler_module('post_methods/create_project')
+    monkeypatch.setattr(handler, 'get_repository', lambda: repository)
+    return handler.create_project
+
+
+def test_create_stores_the_project(create_project, repository):
+    response = create_project(dict(PROJECT), FakeContext())
+    project = repository.get(response['project id: '])
+    assert {key: project[key] for key in PROJECT} == PROJECT
+
+
+@pytest.mark.parametrize('event', [
+    ['not', 'an', 'object'],
+    'text',
+    {key: value for key, value in PROJECT.items() if key != 'internal'},
+    dict(PROJECT, project_name=42),
+    dict(PROJECT, description=None),
+    dict(PROJECT, internal='yes'),
+    dict(PROJECT, on_project='Jane Roe'),
+    dict(PROJECT, on_project=['Jane Roe', 7]),
+    dict(PROJECT, on_project=['']),
+])
+def test_invalid_body_is_a_bad_request(create_project, repository, event):
+    with pytest.raises(BadRequestError) as error:
+        create_project(event, FakeContext())
+    assert error.value.status_code == 400
+    assert repository.client.scan(TableName=repository.table_name)['Items'] == []
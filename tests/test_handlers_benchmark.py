@@ -0,0 +1,21 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT_DIR
+
+
+def test_handlers_benchmark_runs_concurrently_on_moto(tmp_path):
+    pytest.importorskip('moto')
+    output = tmp_path / 'handlers.json'
+
+    subprocess.run([sys.executable, os.path.join(ROOT_DIR, 'benchmarks', 'handlers_benchmark.py'),
+                    '--table-sizes', '20', '--iterations', '8', '--concurrency', '1', '4', '--output', str(output)],
+                   check=True, capture_output=True, timeout=300)
+
+    results = json.loads(output.read_text())['results']
+    assert {result['concurrency'] for result in results} == {1, 4}
+    assert all(result['invocations'] == 8 for result in results)
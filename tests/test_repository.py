@@ -0,0 +1,224 @@
+import itertools
+
+import pytest
+
+from database import repository as repository_module
+from database.repository import CREATED_INDEX, TRANSACT_MAX_ITEMS, UPDATED_INDEX
+
+
+def members(count, prefix='Member'):
+    return [f'{prefix} {number:03}' for number in range(count)]
+
+
+def new_project(project_id, on_project):
+    return {'project_id': project_id, 'project_name': 'Large team', 'description': 'Many members',
+            'internal': False, 'on_project': on_project}
+
+
+def member_projects(repository, member):
+    projects, _, _ = repository.list_member_page(member, limit=10)
+    return [project['project_id'] for project in projects]
+
+
+def test_create_writes_more_members_than_fit_into_a_transaction(repository):
+    team = members(TRANSACT_MAX_ITEMS + 20)
+    repository.create(new_project('p1', team))
+
+    assert sorted(repository.get('p1')['on_project']) == team
+    assert all(member_projects(repository, member) == ['p1'] for member in team)
+
+
+def test_update_and_patch_change_more_members_than_fit_into_a_transaction(repository):
+    repository.create(new_project('p1', members(10)))
+
+    team = members(TRANSACT_MAX_ITEMS + 20, prefix='Engineer')
+    repository.update('p1', {'on_project': team})
+    assert sorted(repository.get('p1')['on_project']) == team
+    assert member_projects(repository, 'Member 000') == []
+    assert member_projects(repository, team[-1]) == ['p1']
+
+    repository.patch_members('p1', remove_members=team)
+    assert member_projects(repository, team[0]) == []
+
+
+def test_member_page_skips_projects_that_no_longer_list_the_member(repository):
+    repository.create(new_project('p1', ['Jane Roe']))
+    repository.client.put_item(TableName=repository.membership_table_name,
+                               Item={'member': {'S': 'Mike Lee'}, 'project_id': {'S': 'p1'}})
+
+    assert member_projects(repository, 'Mike Lee') == []
+    projects, _, _ = repository.list_member_page('Jane Roe', limit=10, fields=['project_name'])
+    assert projects == [{'project_id': 'p1', 'project_name': 'Large team'}]
+
+
+def read_all(repository, index_name, limit, **arguments):
+    projects, next_token = repository.list_sorted_page(index_name, limit, **arguments)
+    pages = 1
+    while next_token:
+        page, next_token = repository.list_sorted_page(index_name, limit, next_token=next_token, **arguments)
+        projects.extend(page)
+        pages += 1
+    return projects, pages
+
+
+def stored_partition(repository, project_id):
+    item = repository.client.get_item(TableName=repository.table_name, Key={'project_id': {'S': project_id}})['Item']
+    return item['entity_type']['S']
+
+
+def test_sorted_pages_merge_the_index_partitions(repository, monkeypatch):
+    from database.partitions import index_partition
+
+    seconds, utc_timestamp = itertools.count(1664539200), repository_module.utc_timestamp
+    monkeypatch.setattr(repository_module, 'utc_timestamp', lambda: utc_timestamp(next(seconds)))
+    for number in range(25):
+        repository.create(new_project(f'p{number:02}', []))
+    assert len({stored_partition(repository, f'p{number:02}') for number in range(25)}) > 1
+
+    newest, pages = read_all(repository, CREATED_INDEX, limit=4, ascending=False,
+                           fields=['project_id', 'project_name'])
+    assert pages == 7
+    assert [project['project_id'] for project in newest] == [f'p{number:02}' for number in reversed(range(25))]
+    assert newest[0] == {'project_id': 'p24', 'project_name': 'Large team'}
+
+    since = repository.get('p19')['created_at']
+    oldest, _ = read_all(repository, CREATED_INDEX, limit=3, since=since)
+    assert [project['project_id'] for project in oldest] == [f'p{number:02}' for number in range(20, 25)]
+    assert all(stored_partition(repository, project['project_id']) == index_partition(project['project_id'])
+               for project in oldest)
+
+
+def test_sorted_pages_stay_in_order_when_a_partition_returns_a_short_page(repository, monkeypatch):
+    seconds, utc_timestamp = itertools.count(1664539200), repository_module.utc_timestamp
+    monkeypatch.setattr(repository_module, 'utc_timestamp', lambda: utc_timestamp(next(seconds)))
+    for number in range(25):
+        repository.create(new_project(f'p{number:02}', []))
+
+    query = repository.client.query
+
+    def short_query(**arguments):
+        # Cut every partition after its first item, as DynamoDB does when a response reaches 1 MB
+        return query(**dict(arguments, Limit=1))
+
+    monkeypatch.setattr(repository.client, 'query', short_query)
+    oldest, _ = read_all(repository, CREATED_INDEX, limit=10)
+    assert [project['project_id'] for project in oldest] == [f'p{number:02}' for number in range(25)]
+
+
+def test_deleted_projects_are_returned_by_changed_since_only(repository, monkeypatch):
+    seconds, utc_timestamp = itertools.count(1664539200), repository_module.utc_timestamp
+    monkeypatch.setattr(repository_module, 'utc_timestamp', lambda: utc_timestamp(next(seconds)))
+    repository.create(new_project('p1', ['Jane Roe']))
+    repository.create(new_project('p2', []))
+    since = repository.get('p2')['created_at']
+    repository.delete('p1')
+
+    changes, _ = read_all(repository, UPDATED_INDEX, limit=10, since=since)
+    assert [(change['project_id'], change.get('deleted')) for change in changes] == [('p1', True)]
+    assert changes[0]['updated_at'] > since
+    changes, _ = read_all(repository, UPDATED_INDEX, limit=10, since=since, fields=['project_id', 'updated_at'])
+    assert changes == [{'project_id': 'p1', 'updated_at': changes[0]['updated_at'], 'deleted': True}]
+
+    assert repository.get('p1') is None
+    assert repository.get_version('p1') is None
+    assert repository.batch_get(['p1', 'p2'])[0].keys() == {'p2'}
+    assert [project['project_id'] for project in repository.list_page(10)[0]] == ['p2']
+    assert [project['project_id'] for project in read_all(repository, CREATED_INDEX, limit=10)[0]] == ['p2']
+    assert member_projects(repository, 'Jane Roe') == []
+    assert repository.update('p1', {'project_name': 'Renamed'}) is None
+    assert repository.patch_members('p1', add_members=['Mike Lee']) is None
+    assert repository.get('p1') is None
+
+    repository.delete('p1')
+    repository.delete('p3')
+    assert repository.client.get_item(TableName=repository.table_name, Key={'project_id': {'S': 'p3'}}).get('Item') is None
+
+
+def test_removing_every_member_reads_back_an_empty_on_project(repository):
+    repository.create(new_project('p1', ['Jane Roe', 'Mike Lee']))
+    assert repository.patch_members('p1', remove_members=['Jane Roe', 'Mike Lee'])['on_project'] == []
+    assert 'on_project' not in repository.client.get_item(TableName=repository.table_name,
+                                                          Key={'project_id': {'S': 'p1'}})['Item']
+    assert repository.get('p1')['on_project'] == []
+    assert repository.get('p1', fields=['on_project']) == {'on_project': []}
+    assert repository.get('p1', fields=['project_name']) == {'project_name': 'Large team'}
+    assert repository.batch_get(['p1'])[0]['p1']['on_project'] == []
+    assert repository.list_page(10)[0][0]['on_project'] == []
+
+    repository.update('p1', {'on_project': ['Jane Roe']})
+    assert repository.update('p1', {'on_project': []})['on_project'] == []
+    assert repository.get('p1')['on_project'] == []
+    repository.create(new_project('p2', []))
+    assert repository.get('p2')['on_project'] == []
+
+
+def test_the_index_partition_key_is_not_returned(repository):
+    repository.create(new_project('p1', ['Jane Roe']))
+
+    assert 'entity_type' not in repository.get('p1')
+    assert 'entity_type' not in repository.list_page(10)[0][0]
+    assert 'entity_type' not in read_all(repository, CREATED_INDEX, limit=10)[0][0]
+    assert 'entity_type' not in repository.update('p1', {'project_name': 'Renamed'})
+    assert 'entity_type' not in repository.update('p1', {'on_project': ['John Doe']})
+    assert stored_partition(repository, 'p1').startswith('project#')
+
+
+def count_calls(monkeypatch, client, name):
+    calls = []
+    method = getattr(client, name)
+    monkeypatch.setattr(client, name, lambda **arguments: calls.append(arguments) or method(**arguments))
+    return calls
+
+
+def test_patch_members_updates_the_set_without_reading_it(repository, monkeypatch):
+    repository.create(new_project('p1', ['Jane Roe']))
+    reads = count_calls(monkeypatch, repository.client, 'get_item')
+    updates = count_calls(monkeypatch, repository.client, 'update_item')
+
+    added = repository.patch_members('p1', add_members=['Mike Lee', 'Jane Roe'])
+    removed = repository.patch_members('p1', remove_members=['Jane Roe', 'Nobody'])
+
+    assert reads == []
+    assert all('#version = :expected' not in update['ConditionExpression'] for update in updates)
+    assert added == {'on_project': ['Jane Roe', 'Mike Lee'], 'version': 2, 'updated_at': added['updated_at']}
+    assert removed == {'on_project': ['Mike Lee'], 'version': 3, 'updated_at': removed['updated_at']}
+    assert member_projects(repository, 'Mike Lee') == ['p1']
+    assert member_projects(repository, 'Jane Roe') == []
+
+
+def test_patch_members_checks_the_expected_version_in_the_update(repository):
+    from database.repository import VersionConflict
+
+    repository.create(new_project('p1', []))
+    assert repository.patch_members('p1', add_members=['Jane Roe'], expected_version=1)['version'] == 2
+    with pytest.raises(VersionConflict):
+        repository.patch_members('p1', add_members=['Mike Lee'], expected_version=1)
+    assert repository.get('p1')['on_project'] == ['Jane Roe']
+    assert member_projects(repository, 'Mike Lee') == []
+    assert repository.patch_members('missing', add_members=['Mike Lee']) is None
+    assert repository.patch_members('missing', add_members=['Mike Lee'], expected_version=1) is None
+
+
+def test_patch_members_rewrites_lists_and_mixed_changes(repository):
+    repository.create(new_project('p1', ['Jane Roe']))
+    repository.client.update_item(TableName=repository.table_name, Key={'project_id': {'S': 'p1'}},
+                                  UpdateExpression='SET on_project = :members REMOVE version',
+                                  ExpressionAttributeValues={':members': {'L': [{'S': 'Jane Roe'}]}})
+
+    assert repository.patch_members('p1', add_members=['Mike Lee'], expected_version=0)['on_project'] == \
+        ['Jane Roe', 'Mike Lee']
+    patched = repository.patch_members('p1', add_members=['Ann Poe'], remove_members=['Jane Roe'])
+    assert patched['on_project'] == ['Ann Poe', 'Mike Lee'] and patched['version'] == 2
+    assert [member_projects(repository, member) for member in ('Ann Poe', 'Jane Roe', 'Mike Lee')] == \
+        [['p1'], [], ['p1']]
+
+
+def test_membership_items_of_names_listed_again_are_kept(repository):
+    repository.create(new_project('p1', ['Jane Roe', 'Mike Lee']))
+    # A concurrent patch added Jane Roe again before the removal deleted the membership items
+    repository._delete_unlisted_memberships('p1', {'Jane Roe', 'Mike Lee', 'Ann Poe'})
+
+    assert member_projects(repository, 'Jane Roe') == ['p1']
+    assert member_projects(repository, 'Mike Lee') == ['p1']
+    repository.patch_members('p1', remove_members=['Jane Roe'])
+    assert member_projects(repository, 'Jane Roe') == []
@@ -0,0 +1,113 @@
+import base64
+import json
+
+import pytest
+
+from errors.errors import ConflictError
+from conftest import FakeContext, load_handler_module
+
+
+@pytest.fixture(scope='module')
+def router():
+    return load_handler_module('router')
+
+
+def proxy_event(method, resource, body=None, path=None, query=None, base64_encoded=False):
+    if body is not None and not isinstance(body, str):
+        body = json.dumps(body)
+    if base64_encoded:
+        body = base64.b64encode(body.encode('utf-8')).decode('ascii')
+    return {'httpMethod': method, 'resource': f'/api/v1{resource}', 'body': body, 'isBase64Encoded': base64_encoded,
+            'pathParameters': path, 'queryStringParameters': query, 'headers': {'x-apigw-api-id': 'api123'}}
+
+
+def replace_route(router, monkeypatch, key, handler):
+    monkeypatch.setitem(router.ROUTES, key, (handler, router.ROUTES[key][1]))
+
+
+def test_routes_map_the_proxy_event_to_the_handler_event(router, monkeypatch):
+    events = []
+    replace_route(router, monkeypatch, ('PUT', '/projects/{project_id}'),
+                  lambda event, context: events.append(event) or {'Attributes': {'project_name': 'New'}})
+    replace_route(router, monkeypatch, ('POST', '/projects/create'),
+                  lambda event, context: events.append(event) or {'project_id': 'p1'})
+
+    updated = router.route(proxy_event('PUT', '/projects/{project_id}', {'project_name': 'New'},
+                                       path={'project_id': 'p1'},
+                                       query={'fields': 'project_name'}), FakeContext())
+    created = router.route(proxy_event('POST', '/projects/create', {'project_name': 'New'}, base64_encoded=True),
+                           FakeContext())
+
+    assert updated == {'statusCode': 200, 'headers': {'Content-Type': 'application/json'},
+                       'body': json.dumps({'Attributes': {'project_name': 'New'}})}
+    assert created['statusCode'] == 200 and json.loads(created['body']) == {'project_id': 'p1'}
+    assert events == [{'body': {'project_name': 'New'},
+                       'params': {'path': {'project_id': 'p1'}, 'querystring': {'fields': 'project_name'},
+                                  'header': {'x-apigw-api-id': 'api123'}}},
+                      {'project_name': 'New'}]
+
+
+def test_unknown_routes_are_not_found(router):
+    response = router.route(proxy_event('POST', '/projects/{project_id}', path={'project_id': 'p1'}), FakeContext())
+
+    assert response['statusCode'] == 404
+    assert json.loads(response['body'])['error'] == 'NotFound'
+
+
+def test_invalid_json_bodies_are_bad_requests(router):
+    response = router.route(proxy_event('POST', '/projects/create', '{"project_name": '), FakeContext())
+
+    assert response['statusCode'] == 400
+    assert json.loads(response['body'])['message'] == 'Request body is not valid JSON'
+
+
+def test_handler_errors_keep_their_status_code(router, monkeypatch):
+    def conflict(event, context):
+        raise ConflictError('Project p1 has version 2, expected 1')
+
+    def crash(event, context):
+        raise KeyError('project_id')
+
+    replace_route(router, monkeypatch, ('PATCH', '/projects/{project_id}'), conflict)
+    replace_route(router, monkeypatch, ('DELETE', '/projects/{project_id}'), crash)
+
+    conflicted = router.route(proxy_event('PATCH', '/projects/{project_id}', {}, path={'project_id': 'p1'}),
+                              FakeContext())
+    crashed = router.route(proxy_event('DELETE', '/projects/{project_id}', path={'project_id': 'p1'}), FakeContext())
+
+    assert conflicted['statusCode'] == 409
+    assert json.loads(conflicted['body']) == {'status': 409, 'error': 'Conflict',
+                                              'message': 'Project p1 has version 2, expected 1'}
+    assert crashed['statusCode'] == 500
+    assert json.loads(crashed['body'])['error'] == 'InternalServerError'
+    assert 'project_id' not in crashed['body']
+
+
+def test_get_routes_share_the_get_handler(router):
+    assert router.ROUTES[('GET', '/projects')][0] is router.ROUTES[('GET', '/projects/{project_id}')][0]
+    assert not router.ROUTES[('GET', '/projects')][1] and router.ROUTES[('POST', '/projects/create')][1]
+
+
+def test_warm_up_events_are_answered_without_routing(router, monkeypatch):
+    monkeypatch.setattr(router, 'ROUTES', {})
+    monkeypatch.setattr('warmer.warmer.prime_connection', lambda: True)
+
+    result = router.route({'warmer': True, 'concurrency': 1}, FakeContext())
+
+    assert 'statusCode' not in result
+
+
+def test_created_projects_are_read_back_through_the_router(router, repository, monkeypatch):
+    from database import repository as repository_module
+
+    monkeypatch.setattr(repository_module, '_repository', repository)
+    created = router.route(proxy_event('POST', '/projects/create', {
+        'project_name': 'Routed', 'description': 'Text', 'internal': False, 'on_project': ['Jane Roe']}), FakeContext())
+    project_id = json.loads(created['body'])['project id: ']
+
+    found = router.route(proxy_event('GET', '/projects/{project_id}', path={'project_id': project_id}), FakeContext())
+    missing = router.route(proxy_event('GET', '/projects/{project_id}', path={'project_id': 'missing'}), FakeContext())
+
+    assert created['statusCode'] == 200 and found['statusCode'] == 200
+    assert json.loads(found['body'])['project_name'] == 'Routed'
+    assert missing['statusCode'] == 404
@@ -0,0 +1,81 @@
+import pytest
+
+from search.index import SearchIndex, posting_changes
+from search.tokenizer import MAX_TOKENS_PER_PROJECT, MAX_TOKEN_LENGTH, token_weights, tokenize
+from conftest import create_table
+
+
+def new_project(project_id, project_name, description):
+    return {'project_id': project_id, 'project_name': project_name, 'description': description, 'internal': False,
+            'on_project': []}
+
+
+@pytest.fixture
+def search_index(repository):
+    index = SearchIndex(repository, table_name='test-search')
+    create_table(repository.client, index.table_name, key_names=('token', 'project_id'))
+    return index
+
+
+def index_projects(search_index, projects):
+    search_index.repository.batch_create(projects)
+    search_index.write({(token, project['project_id']): weight for project in projects
+                        for token, weight in posting_changes(None, project).items()})
+
+
+def test_tokenize_normalizes_and_drops_stopwords_and_short_words():
+    assert tokenize('The Café über-API, v2 of X_ray') == ['cafe', 'uber', 'api', 'v2', 'ray']
+    assert tokenize('a' * 100) == ['a' * MAX_TOKEN_LENGTH]
+    assert tokenize(None) == []
+
+
+def test_token_weights_rank_names_above_descriptions():
+    weights = token_weights({'project_name': 'Search service', 'description': 'Search for projects by name'})
+    assert weights == {'search': 4, 'service': 3, 'projects': 1, 'name': 1}
+
+    many = token_weights({'project_name': 'kept', 'description': ' '.join(f'w{number}' for number in range(300))})
+    assert len(many) == MAX_TOKENS_PER_PROJECT and many['kept'] == 3
+
+
+def test_posting_changes_only_touch_changed_tokens():
+    old = {'project_name': 'Billing', 'description': 'Invoices and payments'}
+    new = {'project_name': 'Billing', 'description': 'Invoices and refunds'}
+
+    assert posting_changes(old, new) == {'refunds': 1, 'payments': None}
+    assert posting_changes(old, None) == {'billing': None, 'invoices': None, 'payments': None}
+
+
+def test_search_returns_projects_with_every_token_ranked(search_index):
+    index_projects(search_index, [new_project('p1', 'Payments gateway', 'Card payments'),
+                                  new_project('p2', 'Reporting', 'Monthly payments report for the gateway'),
+                                  new_project('p3', 'Payments archive', 'Old invoices')])
+
+    result = search_index.search('payments gateway', limit=10, fields=['project_name'])
+
+    assert [project['project_id'] for project in result['Projects']] == ['p1', 'p2']
+    assert result['Projects'][0]['project_name'] == 'Payments gateway'
+    assert result['Projects'][0]['score'] > result['Projects'][1]['score']
+    assert (result['total'], result['truncated']) == (2, False)
+    assert search_index.search('the of', limit=10) == {'Projects': [], 'total': 0, 'truncated': False}
+
+
+def test_search_limits_results_and_marks_truncated_postings(search_index, monkeypatch):
+    index_projects(search_index, [new_project(f'p{number}', 'Common name', '') for number in range(5)])
+    search_index.max_postings = 2
+    query = search_index.repository.client.query
+    monkeypatch.setattr(search_index.repository.client, 'query', lambda **arguments: query(**dict(arguments, Limit=2)))
+
+    result = search_index.search('common', limit=1)
+
+    assert len(result['Projects']) == 1
+    assert result['truncated'] is True
+
+
+def test_search_skips_deleted_projects_still_in_the_index(search_index):
+    index_projects(search_index, [new_project('p1', 'Deleted soon', ''), new_project('p2', 'Deleted later', '')])
+    search_index.repository.delete('p1')
+
+    result = search_index.search('deleted', limit=10)
+
+    assert [project['project_id'] for project in result['Projects']] == ['p2']
+    assert result['total'] == 2
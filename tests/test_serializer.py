@@ -0,0 +1,42 @@
+import pytest
+
+from database.serializer import deserialize_item, deserialize_project, serialize_item, serialize_value
+
+PROJECT = {'project_id': 'p1', 'project_name': 'Name', 'description': 'Text', 'internal': False, 'version': 3,
+           'on_project': ['Jane Roe'], 'entity_type': 'project#3', 'created_at': '2022-10-01T00:00:00Z',
+           'updated_at': '2022-10-02T00:00:00Z', 'deleted': True, 'expires_at': 1667260800}
+
+
+@pytest.mark.parametrize('value, attribute', [
+    ('text', {'S': 'text'}),
+    (True, {'BOOL': True}),
+    (3, {'N': '3'}),
+    (1.5, {'N': '1.5'}),
+    (None, {'NULL': True}),
+    (b'\x00', {'B': b'\x00'}),
+    ({'Mike Lee', 'Jane Roe'}, {'SS': ['Jane Roe', 'Mike Lee']}),
+    ({'team': ['core', 2]}, {'M': {'team': {'L': [{'S': 'core'}, {'N': '2'}]}}}),
+])
+def test_values_round_trip(value, attribute):
+    assert serialize_value(value) == attribute
+    expected = sorted(value) if isinstance(value, set) else value
+    assert deserialize_item({'value': attribute})['value'] == expected
+
+
+def test_unsupported_values_are_rejected():
+    with pytest.raises(TypeError):
+        serialize_value(object())
+    with pytest.raises(TypeError):
+        serialize_value({'Jane Roe', 1})
+
+
+def test_deserialize_project_matches_deserialize_item():
+    item = serialize_item(dict(PROJECT, on_project={'Jane Roe'}, score=1.5, tags={'team': ['core']}, nothing=None))
+
+    assert deserialize_project(item) == deserialize_item(item)
+
+
+def test_deserialize_project_falls_back_on_unexpected_types():
+    item = serialize_item(dict(PROJECT, version='v3', internal=1, on_project=['Jane Roe', 2]))
+
+    assert deserialize_project(item) == deserialize_item(item)
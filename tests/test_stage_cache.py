@@ -0,0 +1,142 @@
+import json
+from urllib.error import HTTPError
+
+import pytest
+
+from cache import stage_cache
+from database.serializer import serialize_item
+from conftest import FakeContext, load_handler_module
+
+PROJECT = {'project_id': 'p1', 'project_name': 'Name', 'description': 'Text', 'internal': False}
+TOMBSTONE = {'project_id': 'p1', 'updated_at': '2022-10-01T00:00:00Z', 'deleted': True}
+
+
+def record(event_name, old=None, new=None, project_id='p1', principal=None):
+    images = {'Keys': {'project_id': {'S': project_id}}}
+    if old is not None:
+        images['OldImage'] = serialize_item(dict(old, project_id=project_id))
+    if new is not None:
+        images['NewImage'] = serialize_item(dict(new, project_id=project_id))
+    result = {'eventID': f'{event_name}-{project_id}', 'eventName': event_name, 'dynamodb': images}
+    if principal:
+        result['userIdentity'] = {'type': 'Service', 'principalId': principal}
+    return result
+
+
+class FakeLambda:
+    def __init__(self):
+        self.invocations = []
+
+    def invoke(self, **arguments):
+        self.invocations.append(arguments)
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """Stage cache settings of the search index function, with the calls to API Gateway and Lambda recorded"""
+    monkeypatch.setenv('API_ID', 'api123')
+    monkeypatch.setenv('API_STAGE', 'dev')
+    monkeypatch.setenv('STAGE_CACHE_FUNCTION', 'invalidate-stage-cache')
+    flushes, lambda_client = [], FakeLambda()
+    monkeypatch.setattr(stage_cache, 'flush_stage_cache', lambda: flushes.append(True) or True)
+    monkeypatch.setattr(stage_cache, '_clients', {'lambda': lambda_client})
+    return flushes, lambda_client
+
+
+def test_updates_invalidate_only_the_changed_projects(api):
+    flushes, lambda_client = api
+    records = [record('MODIFY', PROJECT, PROJECT), record('MODIFY', PROJECT, PROJECT, project_id='p2'),
+               record('MODIFY', PROJECT, PROJECT)]
+
+    assert stage_cache.refresh_stage_cache(records) == {'flushed': False, 'invalidated': 2}
+    assert flushes == []
+    (invocation,) = lambda_client.invocations
+    assert invocation['FunctionName'] == 'invalidate-stage-cache' and invocation['InvocationType'] == 'Event'
+    assert json.loads(invocation['Payload']) == {'project_ids': ['p1', 'p2']}
+
+
+@pytest.mark.parametrize('change', [record('INSERT', new=PROJECT), record('MODIFY', PROJECT, TOMBSTONE),
+                                    record('REMOVE', old=PROJECT)])
+def test_created_and_deleted_projects_flush_the_stage(api, change):
+    flushes, lambda_client = api
+
+    assert stage_cache.refresh_stage_cache([record('MODIFY', PROJECT, PROJECT, project_id='p2'), change]) == \
+        {'flushed': True, 'invalidated': 0}
+    assert flushes == [True] and lambda_client.invocations == []
+
+
+def test_expired_tombstones_change_no_cached_response(api):
+    flushes, lambda_client = api
+    expired = record('REMOVE', old=TOMBSTONE, principal=stage_cache.TTL_PRINCIPAL)
+
+    assert stage_cache.refresh_stage_cache([expired]) == {'flushed': False, 'invalidated': 0}
+    assert flushes == [] and lambda_client.invocations == []
+
+
+def test_without_the_stage_cache_function_changes_flush_the_stage(api, monkeypatch):
+    flushes, lambda_client = api
+    monkeypatch.delenv('STAGE_CACHE_FUNCTION')
+
+    assert stage_cache.refresh_stage_cache([record('MODIFY', PROJECT, PROJECT)])['flushed'] is True
+    assert flushes == [True] and lambda_client.invocations == []
+
+
+def test_nothing_is_invalidated_without_the_stage_cache(api, monkeypatch):
+    flushes, lambda_client = api
+    monkeypatch.delenv('API_ID')
+
+    assert stage_cache.refresh_stage_cache([record('INSERT', new=PROJECT)]) == {'flushed': False, 'invalidated': 0}
+    assert flushes == [] and lambda_client.invocations == []
+
+
+def test_search_index_batches_refresh_the_stage_cache(monkeypatch):
+    handler = load_handler_module('stream_methods/search_index')
+    written, refreshed = [], []
+    monkeypatch.setattr(handler, 'get_search_index', lambda: type('Index', (), {
+        'write': staticmethod(lambda postings: written.append(postings) or [])}))
+    monkeypatch.setattr(handler, 'refresh_stage_cache',
+                        lambda records: refreshed.append(records) or {'flushed': False, 'invalidated': 1})
+    records = [record('MODIFY', PROJECT, dict(PROJECT, project_name='Renamed'))]
+
+    assert handler.index_projects({'Records': records}, FakeContext()) == \
+        {'flushed': False, 'invalidated': 1, 'postings': 2}
+    assert refreshed == [records] and len(written) == 1
+
+
+def test_cached_projects_are_requested_with_a_signed_cache_control_header(monkeypatch):
+    monkeypatch.setenv('API_ID', 'api123')
+    monkeypatch.setenv('API_URL', 'https://api123.execute-api.eu-west-1.amazonaws.com/dev/api/v1/projects/')
+    requests = []
+
+    class Response:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            return False
+
+    def opener(request, timeout):
+        requests.append(request)
+        if 'gone' in request.full_url:
+            raise HTTPError(request.full_url, 404, 'Not Found', {}, None)
+        if 'broken' in request.full_url:
+            raise HTTPError(request.full_url, 502, 'Bad Gateway', {}, None)
+        return Response()
+
+    failed = stage_cache.invalidate_cached_projects(['p1', 'a b', 'gone', 'broken'], opener=opener)
+
+    assert failed == ['broken']
+    assert sorted(request.full_url.rsplit('/', 1)[1] for request in requests) == ['a%20b', 'broken', 'gone', 'p1']
+    headers = {name.lower(): value for name, value in requests[0].header_items()}
+    assert headers['cache-control'] == 'max-age=0'
+    assert headers['x-apigw-api-id'] == 'api123'
+    assert headers['authorization'].startswith('AWS4-HMAC-SHA256')
+    assert '/execute-api/aws4_request' in headers['authorization']
+
+
+def test_stage_cache_function_reports_failed_invalidations(monkeypatch):
+    handler = load_handler_module('stream_methods/stage_cache')
+    monkeypatch.setattr(handler, 'invalidate_cached_projects', lambda project_ids: project_ids[1:])
+
+    assert handler.invalidate_projects({'project_ids': ['p1', 'p2']}, FakeContext()) == {'invalidated': 1, 'failed': 1}
+    assert handler.invalidate_projects({}, FakeContext()) == {'invalidated': 0, 'failed': 0}
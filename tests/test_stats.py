@@ -0,0 +1,40 @@
+from conftest import FakeContext, load_handler_module
+from database.serializer import serialize_item
+
+
+def stream_record(event_id, old_project=None, new_project=None):
+    images = {}
+    if old_project is not None:
+        images['OldImage'] = serialize_item(old_project)
+    if new_project is not None:
+        images['NewImage'] = serialize_item(new_project)
+    return {'eventID': event_id, 'dynamodb': images}
+
+
+def test_apply_counts_a_batch_once(stats):
+    assert stats.apply('1#2', {'total': 1, 'internal': 1}, {'Jane Roe': 1}) is True
+    assert stats.apply('1#2', {'total': 1, 'internal': 1}, {'Jane Roe': 1}) is False
+    assert stats.summary() == {'total': 1, 'internal': 1, 'external': 0}
+    assert stats.member('Jane Roe') == 1
+
+
+def test_apply_of_a_batch_without_changes_writes_nothing(stats):
+    assert stats.apply('1#1', {}, {}) is True
+    assert stats.client.scan(TableName=stats.table_name)['Items'] == []
+
+
+def test_batch_without_counter_changes_is_not_reported_as_applied_before(stats, monkeypatch):
+    handler = load_handler_module('stream_methods/project_stats')
+    monkeypatch.setattr(handler, 'get_project_stats', lambda: stats)
+    warnings = []
+    monkeypatch.setattr(handler.log, 'warning', lambda *args: warnings.append(args))
+    project = {'project_id': 'p1', 'project_name': 'Name', 'internal': True, 'on_project': ['Jane Roe']}
+
+    renamed = [stream_record('3', project, dict(project, project_name='New name'))]
+    assert handler.update_stats({'Records': renamed}, FakeContext()) == {'applied': True}
+    assert warnings == []
+
+    created = [stream_record('4', None, project)]
+    assert handler.update_stats({'Records': created}, FakeContext()) == {'applied': True}
+    assert handler.update_stats({'Records': created}, FakeContext()) == {'applied': False}
+    assert [args[0] for args in warnings] == ['Stats batch %s was already applied']
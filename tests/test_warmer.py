@@ -0,0 +1,69 @@
+import io
+import json
+
+import pytest
+
+from warmer import warmer
+from conftest import FakeContext
+
+
+class FakeLambda:
+    """Lambda client answering every warm-up invocation like a freshly started environment"""
+
+    def __init__(self, failures=0):
+        self.invocations = []
+        self.failures = failures
+
+    def invoke(self, FunctionName, Payload):
+        self.invocations.append((FunctionName, json.loads(Payload)))
+        if len(self.invocations) <= self.failures:
+            return {'FunctionError': 'Unhandled', 'Payload': io.BytesIO(b'{"errorMessage": "boom"}')}
+        return {'Payload': io.BytesIO(json.dumps({'warm': 1, 'cold_starts': 1, 'primed': True}).encode())}
+
+
+@pytest.fixture
+def lambda_client(monkeypatch):
+    client = FakeLambda()
+    monkeypatch.setattr(warmer, '_client', client)
+    monkeypatch.setattr(warmer, 'prime_connection', lambda: True)
+    monkeypatch.setattr(warmer, 'WARMER_HOLD_MS', 0)
+    return client
+
+
+def test_warm_up_events_do_not_reach_the_handler(lambda_client):
+    handled = []
+    handler = warmer.warm_up(lambda event, context: handled.append(event) or 'handled')
+
+    result = handler(warmer.warmup_event(), FakeContext())
+
+    assert handled == [] and result['warm'] == 1 and result['primed'] is True
+    assert lambda_client.invocations == []
+    assert handler({'warmer': 'yes'}, FakeContext()) == 'handled'
+    assert handler([], FakeContext()) == 'handled'
+
+
+def test_warm_up_fans_out_to_the_invoked_alias(lambda_client):
+    context = FakeContext()
+    context.invoked_function_arn = 'arn:aws:lambda:eu-west-1:000000000000:function:test:live'
+
+    result = warmer.warm(warmer.warmup_event(concurrency=4), context)
+
+    assert result['warm'] == 4 and result['cold_starts'] >= 3
+    assert lambda_client.invocations == [(context.invoked_function_arn, warmer.warmup_event())] * 3
+
+
+def test_failed_fan_out_invocations_are_not_counted(lambda_client):
+    lambda_client.failures = 2
+
+    result = warmer.warm(warmer.warmup_event(concurrency=4), FakeContext())
+
+    assert result['warm'] == 2
+    assert len(lambda_client.invocations) == 3
+
+
+@pytest.mark.parametrize('concurrency, invocations', [(0, 0), (-3, 0), ('many', 0), (None, 0),
+                                                      (warmer.MAX_CONCURRENCY + 10, warmer.MAX_CONCURRENCY - 1)])
+def test_concurrency_is_clamped(lambda_client, concurrency, invocations):
+    warmer.warm({'warmer': True, 'concurrency': concurrency}, FakeContext())
+
+    assert len(lambda_client.invocations) == invocations